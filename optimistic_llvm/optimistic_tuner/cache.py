@@ -0,0 +1,93 @@
+import os
+import json
+import shutil
+import hashlib
+from utils import atomic_copy, atomic_write
+
+
+def hash_file(path, hasher=None):
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher
+
+
+def hash_json(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode('utf8')
+                          ).hexdigest()
+
+
+class ObjectCache(object):
+    """A persistent, content-addressed cache for compiled objects.
+
+    Entries are keyed by a hash of everything that determines the object file
+    (see getKey). Each entry holds the object file and the verification
+    verdicts of it, one per verification fingerprint (benchmark setup).
+    Entries of opportunity discovery runs hold the parsed opportunities
+    instead. All writes are atomic, thus the cache can be shared between
+    processes.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self):
+        return self.directory
+
+    @staticmethod
+    def getCompilerId(compiler):
+        compiler_path = shutil.which(compiler)
+        if not compiler_path:
+            return compiler
+        stat = os.stat(compiler_path)
+        return f'{compiler_path}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    @staticmethod
+    def getKey(compiler, options, source_path, control_string, extra=[]):
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps([ObjectCache.getCompilerId(compiler),
+                                  options, control_string,
+                                  extra]).encode('utf8'))
+        return hash_file(source_path, hasher).hexdigest()
+
+    def getEntryPath(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def getObject(self, key):
+        object_path = os.path.join(self.getEntryPath(key), 'object.o')
+        return object_path if os.path.isfile(object_path) else None
+
+    def putObject(self, key, object_path):
+        entry_path = self.getEntryPath(key)
+        os.makedirs(entry_path, exist_ok=True)
+        atomic_copy(object_path, os.path.join(entry_path, 'object.o'))
+
+    def getOpportunities(self, key):
+        opportunities_path = os.path.join(self.getEntryPath(key),
+                                          'opportunities.json')
+        if not os.path.isfile(opportunities_path):
+            return None
+        with open(opportunities_path, 'r') as fd:
+            return [tuple(opportunity) for opportunity in json.load(fd)]
+
+    def putOpportunities(self, key, opportunities):
+        entry_path = self.getEntryPath(key)
+        os.makedirs(entry_path, exist_ok=True)
+        atomic_write(os.path.join(entry_path, 'opportunities.json'),
+                     json.dumps(opportunities).encode('utf8'))
+
+    def getVerdict(self, key, fingerprint):
+        verdict_path = os.path.join(self.getEntryPath(key),
+                                    f'verdict.{fingerprint}')
+        if not os.path.isfile(verdict_path):
+            return None
+        with open(verdict_path, 'r') as fd:
+            return fd.read().strip() == '1'
+
+    def putVerdict(self, key, fingerprint, verdict):
+        entry_path = self.getEntryPath(key)
+        os.makedirs(entry_path, exist_ok=True)
+        atomic_write(os.path.join(entry_path, f'verdict.{fingerprint}'),
+                     b'1' if verdict else b'0')
@@ -0,0 +1,224 @@
+from array import array
+from utils import serializable
+
+# The columns of a ChoiceTable and their array type codes, None for columns
+# kept in a list. String columns hold ids into the (interned) string pool of
+# the table, the names are unique and therefore kept as they are.
+COLUMNS = [('max_options', 'i'), ('opportunity_no', 'i'),
+           ('function_no', 'i'), ('category', 'i'), ('kind', 'i'),
+           ('name', None), ('function', 'i'), ('position', 'i'),
+           ('fixed', 'b'), ('value', 'i')]
+STRING_COLUMNS = {'category', 'kind', 'function'}
+
+
+class ChoiceTable(serializable):
+    """Struct-of-arrays storage for optimistic choices.
+
+    Every attribute of the choices is kept in one array, strings (category,
+    kind and function) are interned and stored as small integer ids. Indexing
+    the table yields OptimisticChoice views of its rows, bulk operations
+    should work on the columns (see getColumn) instead.
+    """
+    __type__ = 'ChoiceTable'
+
+    def __init__(self, strings=[], columns={}):
+        self._strings = list(strings)
+        self._string_ids = {s: i for i, s in enumerate(self._strings)}
+        self._columns = {name: (array(typecode, columns.get(name, []))
+                                if typecode else list(columns.get(name, [])))
+                         for name, typecode in COLUMNS}
+
+    def to_dict(self):
+        return {'strings': self._strings,
+                'columns': {name: list(column)
+                            for name, column in self._columns.items()}}
+
+    @staticmethod
+    def fromChoices(optimistic_choices):
+        if isinstance(optimistic_choices, ChoiceTable):
+            return optimistic_choices
+        table = ChoiceTable()
+        table.extend(optimistic_choices)
+        return table
+
+    def __len__(self):
+        return len(self._columns['position'])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield OptimisticChoice.view(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [OptimisticChoice.view(self, i)
+                    for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('choice table index out of range')
+        return OptimisticChoice.view(self, index)
+
+    def intern(self, string):
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(string)
+            self._string_ids[string] = string_id
+        return string_id
+
+    def getString(self, string_id):
+        return self._strings[string_id]
+
+    def getStringId(self, string):
+        """Return the id of an interned string, None if it is unknown."""
+        return self._string_ids.get(string)
+
+    def getColumn(self, column):
+        """Return the array of a column, ids for string columns. Updates of
+        the array are updates of the table."""
+        return self._columns[column]
+
+    def get(self, column, index):
+        value = self._columns[column][index]
+        if column in STRING_COLUMNS:
+            return self._strings[value]
+        if column == 'fixed':
+            return bool(value)
+        return value
+
+    def set(self, column, index, value):
+        if column in STRING_COLUMNS:
+            value = self.intern(value)
+        elif column != 'name':
+            value = int(value)
+        self._columns[column][index] = value
+
+    def add(self, max_options, opportunity_no, function_no, category, kind,
+            name, function, position, fixed=False, value=None):
+        """Add a choice and return its index."""
+        max_options = int(max_options)
+        columns = self._columns
+        columns['max_options'].append(max_options)
+        columns['opportunity_no'].append(int(opportunity_no))
+        columns['function_no'].append(int(function_no))
+        columns['category'].append(self.intern(category))
+        columns['kind'].append(self.intern(kind))
+        columns['name'].append(name)
+        columns['function'].append(self.intern(function))
+        columns['position'].append(int(position))
+        columns['fixed'].append(int(fixed))
+        columns['value'].append(max_options - 1 if value is None
+                                else int(value))
+        return len(self) - 1
+
+    def addRows(self, rows):
+        """Add choices in bulk, rows are (max_options, opportunity_no,
+        function_no, category, kind, name, function) tuples, e.g., the fields
+        of the [OC] lines. The positions are the indices of the rows."""
+        if not rows:
+            return
+        first = len(self)
+        (max_options, opportunity_nos, function_nos, categories, kinds,
+         names, functions) = zip(*rows)
+        max_options = [int(options) for options in max_options]
+        columns = self._columns
+        columns['max_options'].extend(max_options)
+        columns['opportunity_no'].extend(map(int, opportunity_nos))
+        columns['function_no'].extend(map(int, function_nos))
+        for column, strings in [('category', categories), ('kind', kinds),
+                                ('function', functions)]:
+            for string in set(strings):
+                self.intern(string)
+            columns[column].extend(map(self._string_ids.__getitem__, strings))
+        columns['name'].extend(names)
+        columns['position'].extend(range(first, first + len(rows)))
+        columns['fixed'].extend(bytes(len(rows)))
+        columns['value'].extend(options - 1 for options in max_options)
+
+    def append(self, optimistic_choice):
+        return self.add(**optimistic_choice.to_dict())
+
+    def extend(self, optimistic_choices):
+        for optimistic_choice in optimistic_choices:
+            self.append(optimistic_choice)
+
+    def take(self, indices):
+        """Keep only the rows at indices, in that order. Views of this table
+        are invalidated, the columns are updated in place."""
+        for column in self._columns.values():
+            rows = [column[i] for i in indices]
+            column[:] = (array(column.typecode, rows)
+                         if isinstance(column, array) else rows)
+
+    def sort(self, key):
+        """Sort the rows (stable) by key, which is called with the row
+        indices. Views of this table are invalidated."""
+        self.take(sorted(range(len(self)), key=key))
+
+
+def _column_property(column):
+    if column in STRING_COLUMNS:
+        def getter(self):
+            table = self._table
+            return table._strings[table._columns[column][self._index]]
+    elif column == 'fixed':
+        def getter(self):
+            return bool(self._table._columns[column][self._index])
+    else:
+        def getter(self):
+            return self._table._columns[column][self._index]
+
+    def setter(self, value):
+        self._table.set(column, self._index, value)
+
+    return property(getter, setter)
+
+
+class OptimisticChoice(serializable):
+    """A view of one row of a ChoiceTable.
+
+    Constructing an OptimisticChoice directly creates a table of its own.
+    """
+    __type__ = 'OptimisticChoice'
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, max_options, opportunity_no, function_no, category,
+                 kind, name, function, position, fixed=False, value=None):
+        self._table = ChoiceTable()
+        self._index = self._table.add(max_options, opportunity_no,
+                                      function_no, category, kind, name,
+                                      function, position, fixed, value)
+
+    @classmethod
+    def view(cls, table, index):
+        optimistic_choice = cls.__new__(cls)
+        optimistic_choice._table = table
+        optimistic_choice._index = index
+        return optimistic_choice
+
+    def to_dict(self):
+        return {name: self._table.get(name, self._index)
+                for name, _ in COLUMNS}
+
+    max_options = _column_property('max_options')
+    opportunity_no = _column_property('opportunity_no')
+    function_no = _column_property('function_no')
+    category = _column_property('category')
+    kind = _column_property('kind')
+    name = _column_property('name')
+    function = _column_property('function')
+    position = _column_property('position')
+    fixed = _column_property('fixed')
+    value = _column_property('value')
+
+    def getOptimisticValue(self):
+        return self.value
+
+    def setOptimisticValue(self, value):
+        assert not self.fixed
+        self.value = value
+
+    def fix(self, value):
+        assert not self.fixed
+        self.fixed = True
+        self.value = value
@@ -0,0 +1,68 @@
+from array import array
+from utils import serializable
+
+
+class ControlString(serializable):
+    """A mutable control string in the '#f<function>f#c<opportunity><values>'
+    wire format.
+
+    The string is kept in a bytearray and the offsets of the values in an
+    int array, thus values are read and updated in O(1) and prefixes are
+    serialized with a single slice.
+    """
+    __type__ = 'ControlString'
+
+    def __init__(self, string='', positions=[]):
+        self._buffer = bytearray(string.encode('ascii'))
+        self._positions = array('l', positions)
+        self._function_no = -1
+        self._opportunity_no = -1
+
+    def __str__(self):
+        return self._buffer.decode('ascii')
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def to_dict(self):
+        return {'string': str(self), 'positions': self._positions.tolist()}
+
+    def getNumValues(self):
+        return len(self._positions)
+
+    def append(self, function_no, opportunity_no, value):
+        """Append a value, preceded by the function and opportunity markers
+        if they changed. Returns the offset of the value."""
+        if self._function_no != function_no:
+            self._buffer += f'#f{function_no}f'.encode('ascii')
+            self._function_no = function_no
+        if self._opportunity_no != opportunity_no:
+            self._buffer += b'#c' + bytes([ord('0') + opportunity_no])
+            self._opportunity_no = opportunity_no
+
+        self._positions.append(len(self._buffer))
+        self._buffer.append(ord('0') + value)
+        return self._positions[-1]
+
+    def getPosition(self, index):
+        """Return the offset of the index-th value, the end of the string
+        for the index past the last value."""
+        if index == len(self._positions):
+            return len(self._buffer)
+        return self._positions[index]
+
+    def getValue(self, index):
+        return self._buffer[self._positions[index]] - ord('0')
+
+    def setValue(self, index, value):
+        self._buffer[self._positions[index]] = ord('0') + value
+
+    def getPrefix(self, index):
+        """Return the string up to, and including, the index-th value."""
+        return self._buffer[:self.getPosition(index) + 1].decode('ascii')
+
+    def truncate(self, num_values):
+        """Drop everything after the first num_values values."""
+        end = self.getPosition(num_values - 1) + 1 if num_values else 0
+        del self._buffer[end:]
+        del self._positions[num_values:]
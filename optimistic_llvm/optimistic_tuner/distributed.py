@@ -0,0 +1,202 @@
+import os
+import time
+import queue
+import logging
+import secrets
+import threading
+import traceback
+import concurrent.futures
+import multiprocessing.connection as mpc
+
+logger = logging.getLogger('')
+
+# The environment variable with the key coordinator and workers authenticate
+# each other with
+AUTHKEY_ENV = 'OPTIMISTIC_TUNER_AUTHKEY'
+# Interval (in seconds) in which workers try to reach the coordinator
+CONNECT_RETRY_INTERVAL = 1.0
+
+
+def parse_address(address):
+    """Return the address and family of 'host:port' (TCP) or a path (Unix
+    socket)."""
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit():
+        return (host or 'localhost', int(port)), 'AF_INET'
+    return os.path.abspath(address), 'AF_UNIX'
+
+
+class WorkerError(RuntimeError):
+    """A worker failed to evaluate a task, see Coordinator.serve."""
+
+
+def get_authkey(address, generate=False):
+    """Return the key for the coordinator at address, AUTHKEY_ENV if it is
+    set. Otherwise, if generate is set (the coordinator) a random one is
+    generated, put in the environment and printed, such that workers can be
+    started with it, else a ValueError is raised. Unix sockets require a
+    secret key too, others can connect before the permissions of the socket
+    file are restricted (see Coordinator)."""
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if authkey:
+        return authkey.encode('utf8')
+    if not generate:
+        raise ValueError(f'{AUTHKEY_ENV} has to be set to the key of the '
+                         f'coordinator at {address}')
+    authkey = secrets.token_hex(16)
+    os.environ[AUTHKEY_ENV] = authkey
+    print(f'Workers of the coordinator at {address} have to be started with '
+          f'{AUTHKEY_ENV}={authkey}', flush=True)
+    return authkey.encode('utf8')
+
+
+class Coordinator(object):
+    """Serves tasks to workers connected over TCP or a Unix socket.
+
+    Every connection is served by a thread that sends one task at a time and
+    waits for the result, thus a worker evaluates one task at a time. Tasks
+    of workers that disconnect are handed to the next one, once the last
+    worker disconnected the remaining ones fail with a ConnectionError. Tasks
+    and results are pickled, workers have to run the same version of the
+    tuner and have to know the key of the coordinator (see get_authkey).
+    """
+
+    def __init__(self, address):
+        self.address = address
+        listener_address, family = parse_address(address)
+        if family == 'AF_UNIX' and os.path.exists(listener_address):
+            os.remove(listener_address)
+        self._listener = mpc.Listener(listener_address, family,
+                                      authkey=get_authkey(address,
+                                                          generate=True))
+        if family == 'AF_UNIX':
+            os.chmod(listener_address, 0o600)
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._num_workers = 0
+        self._closed = False
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def __repr__(self):
+        return self.address
+
+    def getNumWorkers(self):
+        with self._lock:
+            return self._num_workers
+
+    def waitForWorkers(self):
+        """Block until at least one worker is connected."""
+        if self.getNumWorkers():
+            return
+        logger.info(f'Wait for workers to connect to {self.address}')
+        while not self.getNumWorkers():
+            time.sleep(CONNECT_RETRY_INTERVAL)
+
+    def accept(self):
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, mpc.AuthenticationError) as e:
+                if not self._closed:
+                    logger.warn(f'Rejected a worker connection: {e!s}')
+                continue
+            threading.Thread(target=self.serve, args=(connection,),
+                             daemon=True).start()
+
+    def serve(self, connection):
+        with self._lock:
+            self._num_workers += 1
+        logger.info(f'A worker connected, {self.getNumWorkers()} workers')
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is None:
+                    connection.send(None)
+                    return
+                task, future = item
+                try:
+                    connection.send(task)
+                    success, result = connection.recv()
+                except (OSError, EOFError):
+                    self._tasks.put(item)
+                    logger.warn(f'A worker disconnected, its task is '
+                                f'handed to the next worker')
+                    return
+                if success:
+                    future.set_result(result)
+                else:
+                    future.set_exception(WorkerError(
+                        f'Worker failed:\n{result}'))
+        finally:
+            connection.close()
+            with self._lock:
+                self._num_workers -= 1
+                if not self._num_workers and not self._closed:
+                    self.failTasks(ConnectionError('All workers '
+                                                   'disconnected'))
+
+    def failTasks(self, error):
+        """Fail the queued tasks with error, the lock has to be held."""
+        while True:
+            try:
+                item = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(error)
+
+    def submit(self, task):
+        """Queue the task, returns a future of the result. Fails with a
+        WorkerError if the worker failed on the task, with a ConnectionError
+        if no worker is connected."""
+        future = concurrent.futures.Future()
+        with self._lock:
+            if not self._num_workers:
+                future.set_exception(ConnectionError('No worker is '
+                                                     'connected'))
+            else:
+                self._tasks.put((task, future))
+        return future
+
+    def map(self, tasks):
+        self.waitForWorkers()
+        futures = [self.submit(task) for task in tasks]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Stop the connected workers and stop accepting new ones."""
+        self._closed = True
+        for _ in range(self.getNumWorkers()):
+            self._tasks.put(None)
+        self._listener.close()
+
+
+def run_worker(address, handler):
+    """Evaluate the tasks of the coordinator at address with handler until
+    the coordinator stops. Connections are retried until the coordinator is
+    up."""
+    worker_address, family = parse_address(address)
+    authkey = get_authkey(address)
+    while True:
+        try:
+            connection = mpc.Client(worker_address, family, authkey=authkey)
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            time.sleep(CONNECT_RETRY_INTERVAL)
+    logger.info(f'Connected to the coordinator at {address}')
+
+    with connection:
+        while True:
+            try:
+                task = connection.recv()
+            except (OSError, EOFError):
+                logger.info(f'The coordinator at {address} disconnected')
+                return
+            if task is None:
+                logger.info(f'The coordinator at {address} is done')
+                return
+            try:
+                result = True, handler(task)
+            except Exception:
+                result = False, traceback.format_exc()
+            connection.send(result)
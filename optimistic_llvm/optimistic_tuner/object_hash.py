@@ -0,0 +1,212 @@
+import struct
+import hashlib
+
+SHT_SYMTAB = 2
+SHT_STRTAB = 3
+SHT_RELA = 4
+SHT_NOBITS = 8
+SHT_REL = 9
+SHT_GROUP = 17
+
+SHF_ALLOC = 0x2
+
+STB_LOCAL = 0
+STT_NOTYPE = 0
+STT_SECTION = 3
+STT_FILE = 4
+
+SHN_UNDEF = 0
+SHN_LORESERVE = 0xff00
+SHN_XINDEX = 0xffff
+
+IGNORED_SECTION_PREFIXES = ('.debug', '.zdebug', '.rela.debug', '.rel.debug',
+                            '.comment', '.llvm_addrsig', '.note.gnu.property',
+                            '.GCC.command.line')
+# The symbols and names are hashed on their own, the sizes of these sections
+# change with the debug information.
+IGNORED_SECTION_TYPES = (SHT_SYMTAB, SHT_STRTAB)
+
+
+class ELFError(Exception):
+    pass
+
+
+class ELFObject(object):
+    """Minimal reader for relocatable ELF object files."""
+
+    def __init__(self, data):
+        if data[:4] != b'\x7fELF':
+            raise ELFError('Not an ELF file')
+        self.data = data
+        self.is64 = data[4] == 2
+        self.endian = '<' if data[5] == 1 else '>'
+
+        if self.is64:
+            header = struct.unpack_from(self.endian + 'HHIQQQIHHHHHH', data, 16)
+        else:
+            header = struct.unpack_from(self.endian + 'HHIIIIIHHHHHH', data, 16)
+        shoff, shentsize, shnum, shstrndx = (header[5], header[10],
+                                             header[11], header[12])
+        if not shoff:
+            raise ELFError('No section headers')
+
+        self.sections = []
+        first = self.readSectionHeader(shoff)
+        if shnum == 0:
+            shnum = first['size']
+        if shstrndx == SHN_XINDEX:
+            shstrndx = first['link']
+        for i in range(shnum):
+            self.sections.append(self.readSectionHeader(shoff + i * shentsize))
+
+        names = self.sections[shstrndx]
+        for section in self.sections:
+            section['name'] = self.readString(names['offset'],
+                                              section['name_offset'])
+
+    def readSectionHeader(self, offset):
+        if self.is64:
+            fields = struct.unpack_from(self.endian + 'IIQQQQIIQQ', self.data,
+                                        offset)
+        else:
+            fields = struct.unpack_from(self.endian + 'IIIIIIIIII', self.data,
+                                        offset)
+        keys = ['name_offset', 'type', 'flags', 'addr', 'offset', 'size',
+                'link', 'info', 'addralign', 'entsize']
+        return dict(zip(keys, fields))
+
+    def readString(self, table_offset, offset):
+        start = table_offset + offset
+        end = self.data.index(b'\0', start)
+        return self.data[start:end].decode('utf8', 'replace')
+
+    def getContents(self, section):
+        if section['type'] == SHT_NOBITS:
+            return b''
+        return self.data[section['offset']:section['offset'] + section['size']]
+
+    def getSectionName(self, index):
+        if index == SHN_UNDEF:
+            return '*UND*'
+        if index >= SHN_LORESERVE or index >= len(self.sections):
+            return f'*ABS{index:x}*'
+        return self.sections[index]['name']
+
+    def getSymbols(self, symtab):
+        strtab = self.sections[symtab['link']]
+        symbols = []
+        entry_size = symtab['entsize'] or (24 if self.is64 else 16)
+        for offset in range(symtab['offset'], symtab['offset'] +
+                            symtab['size'], entry_size):
+            if self.is64:
+                name, info, other, shndx, value, size = struct.unpack_from(
+                    self.endian + 'IBBHQQ', self.data, offset)
+            else:
+                name, value, size, info, other, shndx = struct.unpack_from(
+                    self.endian + 'IIIBBH', self.data, offset)
+            symbols.append({'name': self.readString(strtab['offset'], name),
+                            'bind': info >> 4, 'type': info & 0xf,
+                            'shndx': shndx, 'value': value, 'size': size})
+        return symbols
+
+    def getRelocations(self, section):
+        is_rela = section['type'] == SHT_RELA
+        if self.is64:
+            fmt = 'QQq' if is_rela else 'QQ'
+        else:
+            fmt = 'IIi' if is_rela else 'II'
+        entry_size = section['entsize'] or struct.calcsize(fmt)
+        relocations = []
+        for offset in range(section['offset'], section['offset'] +
+                            section['size'], entry_size):
+            fields = struct.unpack_from(self.endian + fmt, self.data, offset)
+            if self.is64:
+                symbol, kind = fields[1] >> 32, fields[1] & 0xffffffff
+            else:
+                symbol, kind = fields[1] >> 8, fields[1] & 0xff
+            addend = fields[2] if is_rela else 0
+            relocations.append((fields[0], symbol, kind, addend))
+        return relocations
+
+
+def is_ignored_section(section):
+    return section['name'].startswith(IGNORED_SECTION_PREFIXES)
+
+
+def hash_object_code(path):
+    """Return a hash of the code and data of an ELF object file.
+
+    Only the allocated sections (.text, .data, .rodata, ...), their
+    relocations (with symbolic targets), section groups and the symbols that
+    define code and data are hashed. Debug information and similar metadata
+    are ignored, thus objects that only differ in, e.g., line information
+    hash to the same value. Returns None if the file is not an ELF object.
+    """
+    try:
+        with open(path, 'rb') as fd:
+            elf = ELFObject(fd.read())
+
+        symbols = []
+        for section in elf.sections:
+            if section['type'] == SHT_SYMTAB:
+                symbols = elf.getSymbols(section)
+
+        def symbolName(index):
+            if index >= len(symbols):
+                return f'*SYM{index}*'
+            symbol = symbols[index]
+            if symbol['type'] == STT_SECTION:
+                return elf.getSectionName(symbol['shndx'])
+            return symbol['name']
+
+        hasher = hashlib.sha256()
+        for section in elf.sections:
+            if (is_ignored_section(section) or
+                    section['type'] in IGNORED_SECTION_TYPES):
+                continue
+            hasher.update(repr((section['name'], section['type'],
+                                section['flags'], section['size'],
+                                section['addralign'])).encode('utf8'))
+
+            if section['flags'] & SHF_ALLOC:
+                hasher.update(elf.getContents(section))
+            elif section['type'] == SHT_GROUP:
+                contents = elf.getContents(section)
+                words = struct.unpack(elf.endian + 'I' * (len(contents) // 4),
+                                      contents)
+                hasher.update(repr((symbolName(section['info']), words[0],
+                                    [elf.getSectionName(w) for w in words[1:]])
+                                   ).encode('utf8'))
+            elif section['type'] in [SHT_RELA, SHT_REL]:
+                target = elf.sections[section['info']]
+                if is_ignored_section(target) or not (target['flags'] &
+                                                      SHF_ALLOC):
+                    continue
+                for offset, symbol, kind, addend in elf.getRelocations(section):
+                    hasher.update(repr((offset, symbolName(symbol), kind,
+                                        addend)).encode('utf8'))
+
+        for symbol in symbols:
+            if symbol['type'] in [STT_SECTION, STT_FILE]:
+                continue
+            if symbol['bind'] == STB_LOCAL and symbol['type'] == STT_NOTYPE:
+                continue
+            section_name = elf.getSectionName(symbol['shndx'])
+            if symbol['shndx'] < SHN_LORESERVE and symbol['shndx'] < len(
+                    elf.sections) and is_ignored_section(
+                        elf.sections[symbol['shndx']]):
+                continue
+            hasher.update(repr((symbol['name'], symbol['bind'],
+                                symbol['type'], section_name, symbol['value'],
+                                symbol['size'])).encode('utf8'))
+
+        return hasher.hexdigest()
+    except (ELFError, IndexError, ValueError, struct.error, OSError):
+        return None
+
+
+def same_object_code(path, other_path):
+    """Return True if both object files contain the same code and data."""
+    object_hash = hash_object_code(path)
+    return object_hash is not None and object_hash == hash_object_code(
+        other_path)
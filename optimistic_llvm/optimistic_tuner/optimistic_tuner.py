@@ -1,15 +1,38 @@
 import os
 import re
+import json
+import math
 import sys
+import copy
 import time
+import argparse
 import shutil
+import queue
 import random
+import hashlib
 import filecmp
 import tempfile
+import threading
 import collections
+import collections.abc
+import multiprocessing
+import multiprocessing.connection
+import contextlib
+import concurrent.futures
 import logging as log
+import signal
 import subprocess as sp
-from utils import serializable
+from array import array
+from utils import serializable, atomic_write
+from sandbox import Sandbox
+from cache import ObjectCache, hash_file
+from object_hash import same_object_code
+from control_string import ControlString
+from choice_table import ChoiceTable, OptimisticChoice
+from tracing import Tracer, summarize_trace
+from distributed import Coordinator, WorkerError, run_worker
+from resources import CoreScheduler
+from results import ResultsDatabase
 # from pathlib import Path
 
 temp_directory = os.path.join(tempfile.gettempdir(),
@@ -19,6 +42,11 @@ os.mkdir(temp_directory)
 DEBUG_CONSOLE = False
 ANNOTATE_SOURCE = True
 REPORT_EVERY_NUM_TRIES = 10
+CHECKPOINT_EVERY_NUM_TRIES = 10
+# Interval (in seconds) in which cancelled verification runs are noticed
+CANCEL_POLL_INTERVAL = 0.1
+# Lower bound (in seconds) of the timeouts derived from the baseline run time
+MIN_DERIVED_TIMEOUT = 1.0
 
 # Use None to disable
 DEBUG_TIME = '%b %d, %H:%M:%S'
@@ -73,100 +101,171 @@ if STORE_MISMATCH_PATH:
     logger.info(f'Mismatch outputs is stored to {STORE_MISMATCH_PATH}')
 
 
-class OptimisticChoice(object):
-    def __init__(self, max_options, opportunity_no, function_no, category,
-                 kind, name, function, position):
-        self.category = category
-        self.kind = kind
-        self.opportunity_no = int(opportunity_no)
-        self.function_no = int(function_no)
-        self.max_options = int(max_options)
-        self.name = name
-        self.function = function
-        self.position = int(position)
-        self.fixed = False
-        self.value = self.max_options - 1
-
-    def getOptimisticValue(self):
-        return self.value
-
-    def setOptimisticValue(self, value):
-        assert not self.fixed
-        self.value = value
+class ChoiceExplorer(serializable):
+    __type__ = 'ChoiceExplorer'
 
-    def fix(self, value):
-        assert not self.fixed
-        self.fixed = True
-        self.value = value
-
-
-class ChoiceExplorer(object):
     def __init__(self, max_tries, max_time, time_end, num_opportunities,
-                 optimistic_choices, initial_control_string):
+                 optimistic_choices, initial_control_string='',
+                 control_string=None, finished=False, first_pos=0,
+                 last_pos=None, oc_start_position=0, tries=0,
+                 current_first_pos=0, initial_distance=None,
+                 current_distance=None, problems=[],
+                 changed_since_problem=True, window_sizes=None):
         assert isinstance(num_opportunities, int)
-        assert isinstance(optimistic_choices, collections.Iterable)
+        assert isinstance(optimistic_choices, collections.abc.Iterable)
         assert len(optimistic_choices) > 0
-        assert all([isinstance(oc, OptimisticChoice)
-                    for oc in optimistic_choices])
+        assert (isinstance(optimistic_choices, ChoiceTable) or
+                all([isinstance(oc, OptimisticChoice)
+                     for oc in optimistic_choices]))
 
         self.time_end = time_end
         self.max_time = max_time
         self.max_tries = max_tries
         self.num_opportunities = num_opportunities
-        self.optimistic_choices = optimistic_choices
+        self.optimistic_choices = ChoiceTable.fromChoices(optimistic_choices)
 
-        self.finished = False
-        self.first_pos = 0 #optimistic_choices[0].position
-        self.last_pos = len(optimistic_choices)
+        self.finished = finished
+        self.first_pos = first_pos #optimistic_choices[0].position
         asciistr = '['+(''.join(chr(i) for i in range(ord('0'), ord('~'))))+']'
-        self.optimistic_value_re = re.compile(asciistr)
-
-        self.current_oc = self.optimistic_choices[0]
-        self.control_string = initial_control_string #'0' * self.num_opportunities
-        self.oc_start_position = 0
-        self.position_map = {}
-        last_function_no = -1
-        last_opportunity_no = -1
-        for oc in self.optimistic_choices:
-            if last_function_no != oc.function_no:
-                self.control_string += '#f' + str(oc.function_no) + 'f'
-                last_function_no = oc.function_no
-            if last_opportunity_no != oc.opportunity_no:
-                self.control_string += '#c' + chr(ord('0') + oc.opportunity_no)
-                last_opportunity_no = oc.opportunity_no
-
-            oc.position = len(self.control_string)
-            self.control_string += chr(ord('0') + oc.getOptimisticValue())
-            self.position_map[oc.position] = oc
-
-        dummy_oc = OptimisticChoice(1, -1, -1, '[n/a]','[n/a]', 'dummy','dummy',
-                                    len(self.control_string))
-        self.optimistic_choices.append(dummy_oc)
-        self.position_map[len(self.control_string)] = dummy_oc
-
-        logger.info(self.control_string)
+        self._optimistic_value_re = re.compile(asciistr)
+
+        self.oc_start_position = oc_start_position
+        if control_string is not None:
+            # Restored from a checkpoint, the dummy choice is already there.
+            self.control_string = control_string
+            self.last_pos = last_pos
+        else:
+            self.last_pos = len(optimistic_choices)
+            self.control_string = ControlString(initial_control_string) #'0' * self.num_opportunities
+            self.optimistic_choices.getColumn('position')[:] = array('i', map(
+                self.control_string.append,
+                self.optimistic_choices.getColumn('function_no'),
+                self.optimistic_choices.getColumn('opportunity_no'),
+                self.optimistic_choices.getColumn('value')))
+
+            dummy_oc = OptimisticChoice(1, -1, -1, '[n/a]','[n/a]', 'dummy','dummy',
+                                        len(self.control_string))
+            self.optimistic_choices.append(dummy_oc)
+        self._current_oc = self.optimistic_choices[self.first_pos]
+
+        # The exploration state, kept in the explorer (not the generator) such
+        # that copies of the explorer can be used to speculate and such that
+        # it can be checkpointed.
+        self.tries = tries
+        self.current_first_pos = current_first_pos
+        self.initial_distance = (self.last_pos - self.first_pos
+                                 if initial_distance is None
+                                 else initial_distance)
+        self.current_distance = (self.initial_distance
+                                 if current_distance is None
+                                 else current_distance)
+        self.problems = [tuple(problem) for problem in problems]
+        self.changed_since_problem = changed_since_problem
+        self._speculative = False
+
+        # Window sizes per (category, kind) learned in earlier runs, see
+        # ChoicePrior. Without them the first window is the whole range.
+        self._window_sizes = window_sizes or {}
+        if current_distance is None:
+            self.current_distance = self.getPriorWindow(self.first_pos)
+
+        logger.info(str(self.control_string))
 
     @staticmethod
     def getNumOptimisticChoices(control_string):
         return (len(control_string) - 3*control_string.count('c') -
                 3*control_string.count('f'))
 
-    def replacePosition(self, position, value):
-        self.control_string = (self.control_string[:position] +
-                               chr(ord('0') + value) +
-                               self.control_string[position + 1:])
+    @staticmethod
+    def normalizeControlString(control_string):
+        """Return the effective control string.
+
+        A value of '0' (no optimistic choice) at the end of a function and
+        opportunity kind section is the same as no value at all and therefore
+        dropped. Marker that are not followed by a value are dropped as well.
+        """
+        tokens = []
+        function, opportunity = None, None
+        i = 0
+        while i < len(control_string):
+            if control_string[i] != '#':
+                tokens.append((control_string[i], (function, opportunity)))
+                i += 1
+            elif control_string[i + 1] == 'c':
+                opportunity = control_string[i + 2]
+                tokens.append((control_string[i:i + 3], None))
+                i += 3
+            else:
+                end = control_string.index('f', i + 2) + 1
+                function = control_string[i + 2:end - 1]
+                tokens.append((control_string[i:end], None))
+                i = end
+
+        # Drop trailing zeros per section, walking backwards.
+        nonzero_sections = set()
+        for idx in range(len(tokens) - 1, -1, -1):
+            token, section = tokens[idx]
+            if section is None:
+                continue
+            if token == '0' and section not in nonzero_sections:
+                tokens[idx] = None
+            else:
+                nonzero_sections.add(section)
+
+        normalized = ''
+        markers = []
+        for token in tokens:
+            if token is None:
+                continue
+            if token[1] is None:
+                # Only the last function and opportunity marker in a row
+                # matter.
+                markers = [m for m in markers if m[1] != token[0][1]]
+                markers.append(token[0])
+                continue
+            normalized += ''.join(markers) + token[0]
+            markers = []
+        return normalized
+
+    @staticmethod
+    def renumberFunctions(control_string, function_numbers):
+        """Return the control string with the function numbers replaced by
+        function_numbers[number], and a dict from the offsets of the values
+        to their new offsets. Values of functions without a new number are
+        dropped."""
+        renumbered = ControlString()
+        offsets = {}
+        function, opportunity = None, None
+        i = 0
+        while i < len(control_string):
+            if control_string[i] != '#':
+                if function in function_numbers:
+                    offsets[i] = renumbered.append(
+                        function_numbers[function], opportunity,
+                        ord(control_string[i]) - ord('0'))
+                i += 1
+            elif control_string[i + 1] == 'c':
+                opportunity = ord(control_string[i + 2]) - ord('0')
+                i += 3
+            else:
+                end = control_string.index('f', i + 2) + 1
+                function = int(control_string[i + 2:end - 1])
+                i = end
+        return str(renumbered), offsets
+
+    def replacePosition(self, pos, value):
+        self.control_string.setValue(pos, value)
 
     def isFinished(self):
         return self.finished
 
     def computeStats(self, last_pos, current_pos):
-        max_options = self.optimistic_choices[last_pos].max_options
-        for i in range(last_pos, current_pos):
-            max_options = max(max_options, self.optimistic_choices[i].max_options)
+        max_options = max(self.optimistic_choices.getColumn('max_options')[
+            last_pos:max(current_pos, last_pos + 1)])
         stats = [0 for x in range(max_options)]
         i = last_pos
         while i < current_pos:
-            value = (ord(self.control_string[self.getControlStringPositionForPosition(i)]) - ord('0'))
+            value = self.control_string.getValue(i)
             while len(stats) <= value:
                 stats.append(0)
             stats[value] += 1
@@ -177,31 +276,40 @@ class ChoiceExplorer(object):
         return self.optimistic_choices[pos]
 
     def getControlStringPositionForPosition(self, pos):
-        return self.optimistic_choices[pos].position
+        return self.control_string.getPosition(pos)
 
     def advance(self, tries, n):
-        last_oc = self.current_oc
-        oc = self.getOptimisticChoiceForPosition(self.first_pos)
-        category, kind = oc.category, oc.kind
+        # The choices are fixed and compared on the columns of the table,
+        # string columns hold ids, views are only created for the log.
+        fixed = self.optimistic_choices.getColumn('fixed')
+        categories = self.optimistic_choices.getColumn('category')
+        kinds = self.optimistic_choices.getColumn('kind')
+        last_index = self._current_oc._index
+        last_category, last_kind = categories[last_index], kinds[last_index]
+        category, kind = categories[self.first_pos], kinds[self.first_pos]
         # advanced_oc = self.getOptimisticChoiceForPosition(self.first_pos + n)
         # advanced_category, advanced_kind = advanced_oc.category, advanced_oc.kind
         for i in range(n):
-            oc.fix(oc.getOptimisticValue())
+            assert not fixed[self.first_pos]
+            fixed[self.first_pos] = 1
 
             self.first_pos += 1
             # if self.first_pos not in self.position_map:
                 # continue
-            oc = self.getOptimisticChoiceForPosition(self.first_pos)
-            # oc = self.position_map[self.first_pos]
-            self.current_oc = oc
-            if oc.kind == kind and oc.category == category:
+            if (kinds[self.first_pos] == kind and
+                    categories[self.first_pos] == category):
                 continue
 
-            stats = self.computeStats(self.oc_start_position, self.first_pos)
-            logger.info(f' Finished   [{category}][{kind}] @ {self.first_pos:4} '
-                        f' [try #{tries:4}]{stats!s}')
+            if not self._speculative:
+                oc = self.getOptimisticChoiceForPosition(self.first_pos - 1)
+                stats = self.computeStats(self.oc_start_position,
+                                          self.first_pos)
+                logger.info(f' Finished   [{oc.category}][{oc.kind}] @ {self.first_pos:4} '
+                            f' [try #{tries:4}]{stats!s}')
             self.oc_start_position = self.first_pos
-            category, kind = oc.category, oc.kind
+            category, kind = categories[self.first_pos], kinds[self.first_pos]
+        oc = self.getOptimisticChoiceForPosition(self.first_pos)
+        self._current_oc = oc
 
         if self.first_pos >= self.last_pos:
             # stats = self.computeStats(self.oc_start_position, self.last_pos)
@@ -209,95 +317,168 @@ class ChoiceExplorer(object):
                         # f' [try #{tries:4}]{stats!s}')
             return
 
-        if last_oc.kind == kind and last_oc.category == category:
+        if last_kind == kind and last_category == category:
+            return
+
+        if self._speculative:
             return
 
         logger.info(f' Working on [{oc.category}][{oc.kind}] '
                     f'@ {self.first_pos:4}')
 
-    def generator(self):
-        current_first_pos = self.first_pos
-        initial_distance = self.last_pos - current_first_pos
-        current_distance = initial_distance
+    def setWindowSizes(self, window_sizes):
+        self._window_sizes = window_sizes or {}
+
+    def getPriorWindow(self, pos):
+        """Return the size of the window starting at pos that is likely safe,
+        according to the prior, or the whole remaining range."""
+        remaining = self.last_pos - pos
+        oc = self.getOptimisticChoiceForPosition(pos)
+        window_size = self._window_sizes.get((oc.category, oc.kind))
+        if window_size is None:
+            return remaining
+        return max(1, min(window_size, remaining))
+
+    def getWindow(self):
+        """Return the first position and the size of the window the current
+        candidate tries."""
+        return self.current_first_pos, self.current_distance
+
+    def getLastProblemEnd(self):
+        if not self.problems:
+            return 0
+        return self.problems[-1][0] + self.problems[-1][1]
+
+    def dropFinishedProblems(self):
+        last_problem_end = self.getLastProblemEnd()
+        while last_problem_end and self.current_first_pos >= last_problem_end:
+            self.problems.pop()
+            last_problem_end = self.getLastProblemEnd()
+        return last_problem_end
+
+    def getCandidate(self):
+        """Return the control string the next try has to evaluate.
+
+        The result only depends on the state of the explorer, thus a copy of
+        the explorer will yield the same candidate.
+        """
+        if self.first_pos >= self.last_pos:
+            return None
 
-        problems = []
-        changed_since_problem = True
+        self.dropFinishedProblems()
+        current_last_pos = self.current_first_pos + self.current_distance
+        return self.control_string.getPrefix(current_last_pos)
 
-        logger.info(f' Working on [{self.current_oc.category}]'
-                    f'[{self.current_oc.kind}] @ {self.first_pos:4} '
-                    f'- {self.last_pos:4}')
+    def update(self, result):
+        """Update the exploration state with the result of the last candidate."""
+        assert isinstance(result, bool), '  Expected a boolean value to be send'
+        current_last_pos = self.current_first_pos + self.current_distance
 
-        tries = 0
-        time_cur = time.time()
-        while ((self.max_tries is None or tries < self.max_tries) and
-               (self.time_end is None or time_cur < self.time_end)):
-            # current_distance = min(current_distance, self.last_pos - current_first_pos)
+        if result is True:
+            self.advance(self.tries, self.current_distance)
+            self.current_first_pos = self.first_pos
 
-            if REPORT_EVERY_NUM_TRIES and tries % REPORT_EVERY_NUM_TRIES == 0:
-                remaining_cs = self.control_string[self.getControlStringPositionForPosition(self.first_pos):]
-                remaining = ChoiceExplorer.getNumOptimisticChoices(remaining_cs)
-                rem_perc = (self.last_pos - self.first_pos) / (initial_distance)
-                done_perc = int((1 - rem_perc) * 100)
-                logger.info(f'Try: {tries}, Done: {done_perc:-3}%,'
-                            f' Remaining: {remaining:-5}')
+            last_problem_end = self.dropFinishedProblems()
+            if not self.problems:
+                # Only a window sized by the prior does not reach the end.
+                if self.first_pos < self.last_pos:
+                    self.current_distance = self.getPriorWindow(self.first_pos)
+                return
 
-            if self.first_pos >= self.last_pos:
-                return tries, False
-
-            logger.debug(f' A problems: {problems}')
-            logger.debug(f' cf: {current_first_pos}  cd: {current_distance}')
-            last_problem_end = (0 if not problems else
-                                problems[-1][0] + problems[-1][1])
-
-            tries += 1
-            current_last_pos = current_first_pos + current_distance
-            while last_problem_end and current_first_pos >= last_problem_end:
-                problems.pop()
-                last_problem_end = (0 if not problems else
-                                    problems[-1][0] + problems[-1][1])
-
-            result = (yield self.control_string[:self.getControlStringPositionForPosition(current_last_pos)+1])
-            assert(isinstance(result, bool))
-            time_cur = time.time()
+            assert last_problem_end > current_last_pos
 
-            if result is True:
-                self.advance(tries, current_distance)
-                current_first_pos = self.first_pos
+            self.current_distance = last_problem_end - current_last_pos
+            if not self.changed_since_problem:
+                self.current_distance = max(1, int(self.current_distance / 2))
 
-                while (last_problem_end and
-                       current_first_pos >= last_problem_end):
-                    problems.pop()
-                    last_problem_end = (0 if not problems else
-                                        problems[-1][0] + problems[-1][1])
+            assert self.current_distance > 0
+            return
 
-                if not problems:
-                    assert self.first_pos >= self.last_pos
-                    continue
+        if self.current_distance > 1:
+            self.changed_since_problem = False
+            self.problems.append((self.current_first_pos,
+                                  self.current_distance))
+            self.current_distance = max(1, int(self.current_distance / 2))
+            return
 
-                last_problem_end = problems[-1][0] + problems[-1][1]
-                assert last_problem_end > current_last_pos
+        self.findAndLimitNextOptimisticChoice(self.tries,
+                                              self.current_first_pos)
+        if self.current_first_pos < self.first_pos:
+            self.current_first_pos = self.first_pos
+            self.dropFinishedProblems()
+            if not self.problems and self.first_pos < self.last_pos:
+                self.current_distance = self.getPriorWindow(self.first_pos)
+        self.changed_since_problem = True
+
+    def speculate(self, num_candidates, known_results):
+        """Return up to num_candidates control strings the exploration will
+        likely ask for next, starting with the current candidate.
+
+        The decision tree is walked breadth first on copies of the explorer,
+        e.g., the current window, its first half (on failure) and the next
+        window (on success). Results in known_results are not speculated on,
+        only the branch they determine is followed.
+        """
+        candidates = []
+        worklist = collections.deque([(self, None)])
+        num_explored = 0
+        while (worklist and len(candidates) < num_candidates and
+               num_explored < 4 * num_candidates):
+            explorer, result = worklist.popleft()
+            num_explored += 1
+            if result is not None:
+                explorer = copy.deepcopy(explorer)
+                explorer._speculative = True
+                explorer.tries += 1
+                explorer.update(result)
+
+            candidate = explorer.getCandidate()
+            if candidate is None:
+                continue
 
-                current_distance = last_problem_end - current_last_pos
-                if not changed_since_problem:
-                    current_distance = max(1, int(current_distance / 2))
+            if candidate in known_results:
+                worklist.append((explorer, known_results[candidate]))
+                continue
 
-                assert current_distance > 0
+            if candidate not in candidates:
+                candidates.append(candidate)
+            worklist.append((explorer, True))
+            worklist.append((explorer, False))
 
-                continue
-            elif result is False:
-                if current_distance > 1:
-                    changed_since_problem = False
-                    problems.append((current_first_pos, current_distance))
-                    current_distance = max(1, int(current_distance / 2))
-                    continue
-            else:
-                assert '  Expected a boolean value to be send'
+        return candidates
 
-            self.findAndLimitNextOptimisticChoice(tries, current_first_pos)
-            current_first_pos = max(current_first_pos, self.first_pos)
-            changed_since_problem = True
+    def generator(self):
+        logger.info(f' Working on [{self._current_oc.category}]'
+                    f'[{self._current_oc.kind}] @ {self.first_pos:4} '
+                    f'- {self.last_pos:4}')
 
-        if not (self.max_tries is None or tries < self.max_tries):
+        time_cur = time.time()
+        while ((self.max_tries is None or self.tries < self.max_tries) and
+               (self.time_end is None or time_cur < self.time_end)):
+
+            if (REPORT_EVERY_NUM_TRIES and
+                    self.tries % REPORT_EVERY_NUM_TRIES == 0):
+                remaining = (self.control_string.getNumValues() -
+                             self.first_pos)
+                rem_perc = (self.last_pos - self.first_pos) / (self.initial_distance)
+                done_perc = int((1 - rem_perc) * 100)
+                logger.info(f'Try: {self.tries}, Done: {done_perc:-3}%,'
+                            f' Remaining: {remaining:-5}')
+
+            if self.first_pos >= self.last_pos:
+                return self.tries, False
+
+            logger.debug(f' A problems: {self.problems}')
+            logger.debug(f' cf: {self.current_first_pos}  '
+                         f'cd: {self.current_distance}')
+
+            control_string = self.getCandidate()
+            result = (yield control_string)
+            self.tries += 1
+            time_cur = time.time()
+            self.update(result)
+
+        if not (self.max_tries is None or self.tries < self.max_tries):
             logger.info(f'  Reached the limit of {self.max_tries} tries, '
                         f'limiting control string to {self.first_pos} positions '
                         f'out of {self.last_pos}')
@@ -306,43 +487,415 @@ class ChoiceExplorer(object):
                         f'limiting control string to {self.first_pos} positions '
                         f'out of {self.last_pos}')
 
-        for i in range(len(self.optimistic_choices)):
-            oc = self.optimistic_choices[i]
-            if i < self.first_pos:
-                assert oc.fixed
-            else:
-                assert not oc.fixed
-                oc.fix(0)
+        fixed = self.optimistic_choices.getColumn('fixed')
+        values = self.optimistic_choices.getColumn('value')
+        assert all(fixed[:self.first_pos])
+        assert not any(fixed[self.first_pos:])
+        for i in range(self.first_pos, len(fixed)):
+            fixed[i], values[i] = 1, 0
 
-        if self.first_pos == 0:
-            self.control_string = ''
-        else:
-            self.control_string = self.control_string[:self.getControlStringPositionForPosition(self.first_pos - 1)+1]
-        return tries, True
+        self.control_string.truncate(self.first_pos)
+        return self.tries, True
 
     def findAndLimitNextOptimisticChoice(self, tries, current_first_pos):
-        logger.debug(f'Old control string: {self.control_string[:self.getControlStringPositionForPosition(current_first_pos)+1]}')
+        if not self._speculative:
+            logger.debug(f'Old control string: {self.control_string.getPrefix(current_first_pos)}')
 
         oc = self.getOptimisticChoiceForPosition(current_first_pos)
         assert(oc.getOptimisticValue() > 0)
-        old_value = self.control_string[oc.position]
-        new_value = ord(old_value) - 1 - ord('0')
+        old_value = self.control_string.getValue(current_first_pos)
+        new_value = old_value - 1
         assert oc.getOptimisticValue() == new_value + 1
         oc.setOptimisticValue(new_value)
-        self.replacePosition(oc.position, new_value)
+        self.replacePosition(current_first_pos, new_value)
 
-        logger.debug(f'  Changed position {oc.position} from {old_value}'
-                     f' to {new_value}: [{oc.category}][{oc.kind}]'
-                     f'[{oc.name}][{oc.function}]')
+        if not self._speculative:
+            logger.debug(f'  Changed position {oc.position} from {old_value}'
+                         f' to {new_value}: [{oc.category}][{oc.kind}]'
+                         f'[{oc.name}][{oc.function}]')
 
         if new_value is 0:
             self.advance(tries, 1)
 
 
+class GroupTestingExplorer(ChoiceExplorer):
+    """Explore the optimistic choices with adaptive group testing.
+
+    Implements Hwang's generalized binary splitting on the remaining range:
+    The next group of choices is sized by the density of culprits (choices
+    that had to be limited) found so far. A failing group is split in halves
+    until the culprit is found, halves that follow a passing half are known
+    to fail and are not tried. This needs O(k log(n/k)) tries for k culprits
+    among n choices.
+    """
+    __type__ = 'GroupTestingExplorer'
+
+    def __init__(self, *args, defect_end=None, num_culprits=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        # If set, the choices [first_pos, defect_end) contain a culprit.
+        self.defect_end = defect_end
+        self.num_culprits = num_culprits
+
+    def getGroupSize(self):
+        if self.defect_end is not None:
+            return max(1, (self.defect_end - self.first_pos) // 2)
+
+        # A culprit that was limited, but not to 0, is tried on its own again.
+        oc = self.getOptimisticChoiceForPosition(self.first_pos)
+        if oc.getOptimisticValue() < oc.max_options - 1:
+            return 1
+
+        # The density of culprits is estimated on the tried choices and half
+        # of the remaining ones, a culprit among the first few choices does
+        # not make the whole remaining range look dense.
+        remaining = self.last_pos - self.first_pos
+        num_defects = max(1, round(self.num_culprits * remaining /
+                                   (self.first_pos + remaining / 2)))
+        if remaining <= 2 * num_defects - 2:
+            return 1
+        # Unlike in Hwang's algorithm the group size is not rounded down to a
+        # power of two. The number of culprits is only an estimate, if there
+        # is none left, a single try covers the remaining choices.
+        group_size = (remaining - num_defects + 1) // num_defects
+        return max(1, min(group_size, self.getPriorWindow(self.first_pos)))
+
+    def getWindow(self):
+        return self.first_pos, self.getGroupSize()
+
+    def getCandidate(self):
+        if self.first_pos >= self.last_pos:
+            return None
+
+        last_pos = self.first_pos + self.getGroupSize() - 1
+        return self.control_string.getPrefix(last_pos)
+
+    def update(self, result):
+        assert isinstance(result, bool), '  Expected a boolean value to be send'
+        group_size = self.getGroupSize()
+        if result is True:
+            self.advance(self.tries, group_size)
+        else:
+            self.defect_end = self.first_pos + group_size
+
+        # A single choice that is known to fail is limited without a try.
+        if (self.defect_end is not None and
+                self.defect_end - self.first_pos <= 1):
+            self.limitCulprit()
+
+    def limitCulprit(self):
+        self.defect_end = None
+        oc = self.getOptimisticChoiceForPosition(self.first_pos)
+        if oc.getOptimisticValue() == oc.max_options - 1:
+            self.num_culprits += 1
+        self.findAndLimitNextOptimisticChoice(self.tries, self.first_pos)
+
+
+# The available exploration strategies, see Experiment(strategy=...)
+STRATEGIES = {'bisection': ChoiceExplorer,
+              'group_testing': GroupTestingExplorer}
+
+
+def evaluateCandidate(task):
+    """Compile and verify a control string in a scratch build directory.
+
+    Runs in a worker process of the SpeculativeEvaluator. Valid and broken
+    outputs are copied to the artifact paths, the caller decides later if they
+    become a numbered (last valid) version.
+    """
+    (experiment, benchmark, source_file, control_string, sandbox_path,
+     last_valid_path, artifact_prefix, full) = task
+    experiment._check_records = []
+    experiment._timed_out_checks = []
+    experiment._trace = collections.Counter()
+
+    cache_key = experiment.getObjectCacheKey(benchmark, source_file,
+                                             control_string, cwd=sandbox_path)
+    time_start = time.time()
+    if not experiment.compileSource(benchmark, source_file, control_string,
+                                    cwd=sandbox_path, cache_key=cache_key):
+        return False, None, [], dict(experiment._trace), None
+    compile_time = time.time() - time_start
+
+    time_start = time.time()
+    verified = experiment.verifyCompiledSource(benchmark, source_file,
+                                               control_string, last_valid_path,
+                                               cwd=sandbox_path, full=full)
+    # Verdicts of runs that timed out might not hold on a less loaded system.
+    timed_out = bool(experiment._timed_out_checks)
+    if not timed_out:
+        experiment.storeCachedVerdict(benchmark, source_file, cache_key,
+                                      verified is not False, cwd=sandbox_path,
+                                      full=full)
+    # The result is recorded by the process that owns the database.
+    result = None
+    if experiment._results and not timed_out:
+        result = experiment.describeResult(benchmark, source_file,
+                                           control_string, verified,
+                                           compile_time,
+                                           time.time() - time_start,
+                                           cwd=sandbox_path, full=full)
+    if verified is None:
+        return (True, None, experiment._check_records, dict(experiment._trace),
+                result)
+
+    artifacts = (artifact_prefix + '.o', artifact_prefix + '.exe')
+    for path, artifact in zip([source_file.output_file, benchmark.executable],
+                              artifacts):
+        path = os.path.join(sandbox_path, path)
+        if os.path.isfile(path):
+            shutil.copyfile(path, artifact)
+    return (verified, artifacts, experiment._check_records,
+            dict(experiment._trace), result)
+
+
+# The experiment, benchmark, and source file the candidates evaluated by a
+# pool worker of a SpeculativeEvaluator belong to, see initEvaluationContext
+evaluation_context = None
+
+
+def initEvaluationContext(experiment, benchmark, source_file):
+    """Initialize a pool worker of a SpeculativeEvaluator. The context is
+    sent once per worker, the tasks only carry the candidates."""
+    global evaluation_context
+    evaluation_context = (experiment, benchmark, source_file)
+
+
+def evaluateInContext(task):
+    """Evaluate a candidate in a pool worker, see evaluateCandidate."""
+    return evaluateCandidate(evaluation_context + task)
+
+
+# The sandboxes of a worker per benchmark directory, see evaluateRemotely
+worker_sandboxes = {}
+
+
+def evaluateRemotely(task):
+    """Evaluate a candidate for the coordinator a worker is connected to.
+
+    The benchmark directory has to be reachable under the same path on the
+    worker (e.g., a shared file system), the worker evaluates in a sandbox of
+    its own. The last valid object is sent along, the artifacts are sent back.
+    """
+    (experiment, benchmark, source_file, control_string, cwd,
+     last_valid_object, full) = task
+    # The cores of the worker are partitioned, not the ones of the
+    # coordinator.
+    if experiment.cores_per_run:
+        experiment._scheduler = CoreScheduler(experiment.cores_per_run)
+    sandbox = worker_sandboxes.get((cwd, benchmark.name))
+    if sandbox:
+        # Previous source files might have been annotated and rebuilt.
+        sandbox.refresh()
+    else:
+        sandbox = experiment.createSandbox(
+            benchmark, cwd, os.path.join(temp_directory,
+                                         f'sandbox.{len(worker_sandboxes)}'))
+        worker_sandboxes[(cwd, benchmark.name)] = sandbox
+
+    last_valid_path = os.path.join(temp_directory, 'last_valid.o')
+    with open(last_valid_path, 'wb') as fd:
+        fd.write(last_valid_object)
+    verified, artifacts, check_records, trace, result = evaluateCandidate(
+        (experiment, benchmark, source_file, control_string, sandbox.path,
+         last_valid_path, os.path.join(temp_directory, 'remote'), full))
+
+    artifact_data = None
+    if artifacts:
+        artifact_data = []
+        for artifact in artifacts:
+            data = None
+            if os.path.isfile(artifact):
+                with open(artifact, 'rb') as fd:
+                    data = fd.read()
+                os.remove(artifact)
+            artifact_data.append(data)
+    return verified, artifact_data, check_records, trace, result
+
+
+class SpeculativeEvaluator(object):
+    """Evaluate the control strings a ChoiceExplorer asks for concurrently.
+
+    Whenever the explorer asks for a control string that was not evaluated
+    yet, the likely next candidates are determined (ChoiceExplorer.speculate)
+    and evaluated in a process pool, each worker in its own sandbox (a clone of
+    the benchmark directory). With a coordinator the candidates are evaluated
+    by the connected (remote) workers instead, one per worker. Results are
+    handed to the explorer in the order it asks for them, thus the
+    exploration is the same as the sequential one.
+    """
+
+    def __init__(self, experiment, benchmark, source_file, sandboxes,
+                 cwd=os.curdir, full=False, coordinator=None):
+        self.experiment = experiment
+        self.benchmark = benchmark
+        self.source_file = source_file
+        self.sandboxes = sandboxes
+        self.cwd = cwd
+        # Verify with the full verification tier, see
+        # Benchmark.getInputOutputPairs
+        self.full = full
+        self.coordinator = coordinator
+        self.jobs = len(sandboxes)
+        self.results = {}
+        # Candidates with cached verdicts, they are built when committed.
+        self.cached = set()
+        self.artifacts = {}
+        self.num_evaluated = 0
+
+        # Previous source files might have been annotated and rebuilt.
+        for sandbox in self.sandboxes:
+            sandbox.refresh()
+
+        self.pool = None
+        if not self.coordinator:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.jobs, initializer=initEvaluationContext,
+                initargs=(experiment, benchmark, source_file))
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+        for artifacts in self.artifacts.values():
+            for artifact in artifacts:
+                if os.path.isfile(artifact):
+                    os.remove(artifact)
+
+    def getNumJobs(self):
+        if not self.coordinator:
+            return self.jobs
+        self.coordinator.waitForWorkers()
+        return max(1, self.coordinator.getNumWorkers())
+
+    def evaluate(self, explorer, control_string):
+        while control_string not in self.results:
+            candidates = explorer.speculate(self.getNumJobs(), self.results)
+            assert candidates and candidates[0] == control_string
+
+            # Cached verdicts are known results, speculate again with them.
+            num_cached = 0
+            for candidate in candidates:
+                verdict = self.experiment.getCachedVerdict(self.benchmark,
+                                                           self.source_file,
+                                                           candidate,
+                                                           cwd=self.cwd,
+                                                           full=self.full)
+                if verdict is not None:
+                    self.results[candidate] = verdict
+                    self.cached.add(candidate)
+                    num_cached += 1
+            if num_cached:
+                logger.debug(f'  Found {num_cached} cached verdicts')
+                self.experiment._trace['verdict_cache_hits'] += num_cached
+                continue
+
+            logger.debug(f'  Evaluate {len(candidates)} candidates '
+                         f'speculatively')
+
+            last_valid_path = os.path.join(
+                temp_directory, self.source_file.output_file +
+                f'.{self.benchmark._num_out_versions}')
+            if self.coordinator:
+                results = self.evaluateRemotely(candidates, last_valid_path)
+            else:
+                tasks = []
+                for candidate, sandbox in zip(candidates, self.sandboxes):
+                    self.num_evaluated += 1
+                    artifact_prefix = os.path.join(
+                        temp_directory, f'speculative.{self.num_evaluated}')
+                    tasks.append((candidate, sandbox.path, last_valid_path,
+                                  artifact_prefix, self.full))
+                results = self.pool.map(evaluateInContext, tasks)
+
+            for candidate, (verified, artifacts, check_records, trace,
+                            result) in zip(candidates, results):
+                self.experiment._check_records += check_records
+                if result:
+                    self.experiment._results.record(result)
+                # The time of speculative evaluations is accounted to the try
+                # that triggered them.
+                self.experiment._trace.update(trace)
+                self.results[candidate] = verified
+                if artifacts:
+                    self.artifacts[candidate] = artifacts
+
+        # Commit the result as if the candidate was evaluated just now.
+        verified = self.results[control_string]
+        if control_string in self.cached:
+            cache_key = self.experiment.getObjectCacheKey(
+                self.benchmark, self.source_file, control_string,
+                cwd=self.cwd)
+            if not self.experiment.applyCachedVerdict(
+                    self.benchmark, self.source_file, control_string,
+                    verified, cache_key, self.cwd):
+                return self.experiment.compileSourceOptimistically(
+                    self.benchmark, self.source_file, control_string,
+                    force_validation=True, cwd=self.cwd, full=self.full)
+            return verified
+        artifacts = self.artifacts.pop(control_string, None)
+        if artifacts:
+            last_valid_path = os.path.join(
+                temp_directory, self.source_file.output_file +
+                f'.{self.benchmark._num_out_versions}')
+            if verified and self.experiment.isSameObject(last_valid_path,
+                                                         artifacts[0]):
+                pass
+            elif verified:
+                self.experiment.storeValidVersion(self.benchmark,
+                                                  self.source_file,
+                                                  *artifacts)
+            else:
+                self.experiment.storeBrokenVersion(self.benchmark,
+                                                   self.source_file,
+                                                   *artifacts)
+            for artifact in artifacts:
+                if os.path.isfile(artifact):
+                    os.remove(artifact)
+
+        return verified
+
+    def evaluateRemotely(self, candidates, last_valid_path):
+        """Evaluate the candidates with the workers of the coordinator, see
+        evaluateRemotely. Returns the results in the evaluateCandidate
+        format, the artifacts are written to the temporary directory.
+        Candidates a worker failed on are rejected, like the ones that fail
+        locally."""
+        with open(last_valid_path, 'rb') as fd:
+            last_valid_object = fd.read()
+        tasks = [(self.experiment, self.benchmark, self.source_file, candidate,
+                  os.path.abspath(self.cwd), last_valid_object, self.full)
+                 for candidate in candidates]
+
+        self.coordinator.waitForWorkers()
+        futures = [self.coordinator.submit(task) for task in tasks]
+        results = []
+        for candidate, future in zip(candidates, futures):
+            try:
+                (verified, artifact_data, check_records, trace,
+                 result) = future.result()
+            except WorkerError as e:
+                logger.warn(f'  Evaluation of {candidate} failed, reject '
+                            f'it:\n{e!s}')
+                results.append((False, None, [], {}, None))
+                continue
+            artifacts = None
+            if artifact_data:
+                self.num_evaluated += 1
+                artifact_prefix = os.path.join(
+                    temp_directory, f'speculative.{self.num_evaluated}')
+                artifacts = (artifact_prefix + '.o', artifact_prefix + '.exe')
+                for data, artifact in zip(artifact_data, artifacts):
+                    if data is not None:
+                        with open(artifact, 'wb') as fd:
+                            fd.write(data)
+            results.append((verified, artifacts, check_records, trace, result))
+        return results
+
+
 class Sourcefile(serializable):
     __type__ = 'SourceFile'
 
-    def __init__(self, path, options=[], only_functions=[], output_file=''):
+    def __init__(self, path, options=[], only_functions=[], output_file='',
+                 optimistic_choices=[], current_control_string=''):
         assert(path.endswith('.c') or path.endswith('.cc') or
                path.endswith('.cpp'))
         self.path = path
@@ -350,8 +903,12 @@ class Sourcefile(serializable):
         self.only_functions = only_functions
         self.output_file = (output_file if output_file
                             else self.getFileName() + '.o')
-        self.optimistic_choices = []
-        self.current_control_string = ''
+        self.optimistic_choices = ChoiceTable.fromChoices(optimistic_choices)
+        self.current_control_string = current_control_string
+        # Unoptimized bitcode of the source, see Experiment.emitBitcode
+        self._bitcode_path = None
+        # Files the source includes, see Experiment.getDependencies
+        self._dependencies = None
 
     def __repr__(self):
         return self.getFileName()
@@ -366,7 +923,7 @@ class Sourcefile(serializable):
             return 'clang++'
         assert(0 and "Don't know what compiler should be used!")
 
-    def writeControl(self, optimistic_choices):
+    def writeControl(self, optimistic_choices, cwd=os.curdir):
         if not ANNOTATE_SOURCE:
             return
 
@@ -387,8 +944,9 @@ class Sourcefile(serializable):
 
         ls = os.linesep
 
+        path = os.path.join(cwd, self.path)
         lines = []
-        with open(self.path, 'r') as fd:
+        with open(path, 'r') as fd:
             for line in fd.readlines():
                 include = True
                 for f, c2cs in f2_c2cs.items():
@@ -423,7 +981,7 @@ class Sourcefile(serializable):
                          f'{self.getFileName()} = ')
             lines.append(f'&{f}_OptimisticChoices;{ls}')
 
-        with open(self.path, 'w') as fd:
+        with open(path, 'w') as fd:
             fd.writelines(lines)
 
 
@@ -431,13 +989,44 @@ class InputOutputPair(serializable):
     __type__ = 'InputOutputPair'
 
     def __init__(self, input, output, timeout, returncode=0, use_stdout=True,
-                 use_stderr=True):
+                 use_stderr=True, streaming=None, tier='full'):
         self.input = input
         self.output = output
         self.timeout = timeout
         self.returncode = returncode
         self.use_stdout = use_stdout
         self.use_stderr = use_stderr
+        # Verify the output line by line while the benchmark runs and kill it
+        # on the first mismatch. If None, streaming is used if the expected
+        # pattern can be matched line by line (see isLineWisePattern).
+        self.streaming = streaming
+        # 'smoke' pairs are cheap, if a benchmark has any, they verify the
+        # tries and the 'full' ones (and the verify command) only the final
+        # and periodically the accepted control strings.
+        assert tier in ['smoke', 'full']
+        self.tier = tier
+
+    def isSmoke(self):
+        return self.tier == 'smoke'
+
+    def getCheckKey(self):
+        """The key of the verification check of this pair, see
+        VerificationStatistics."""
+        return f'io_pair {json.dumps([self.input, self.output])}'
+
+    # Pattern constructs that (can) match a line break.
+    LINE_CROSSING_PATTERNS = ['\\n', '\\s', '\\D', '\\W', '[^', '(?s', '(?m', '(?x']
+
+    @staticmethod
+    def isLineWisePattern(pattern):
+        if any(p in pattern for p in InputOutputPair.LINE_CROSSING_PATTERNS):
+            return False
+        try:
+            for line in pattern.splitlines():
+                re.compile(line)
+        except re.error:
+            return False
+        return True
 
 
 class Benchmark(serializable):
@@ -445,8 +1034,8 @@ class Benchmark(serializable):
 
     def __init__(self, name, source_files, options, executable,
                  input_output_pairs, verify_cmd='', verify_cmd_timeout=86400,
-                 make_cmd='make'):
-        assert(isinstance(options, collections.Iterable) and
+                 make_cmd='make', link_cmd='', independent_sources=False):
+        assert(isinstance(options, collections.abc.Iterable) and
                all([isinstance(x, str) for x in options]))
 
         self.name = name
@@ -455,9 +1044,21 @@ class Benchmark(serializable):
         self.options = options
         self.executable = executable
         self.make_cmd = make_cmd
+        self.link_cmd = link_cmd
         self.verify_cmd = verify_cmd
         self.verify_cmd_timeout = verify_cmd_timeout
+        # The source files can be tuned concurrently, each one against the
+        # original version of the others (see Experiment.runConcurrently).
+        self.independent_sources = independent_sources
         self._num_out_versions = 0
+        self._link_cmds = [link_cmd] if link_cmd else []
+        self._statistics = VerificationStatistics()
+        # Share of the execution time per function, see
+        # Experiment.profileBenchmark
+        self._profile = {}
+        # Timeouts per verification check derived from the baseline run time,
+        # see Experiment.deriveTimeouts
+        self._timeouts = {}
 
         for source_file in source_files:
             if isinstance(source_file, Sourcefile):
@@ -479,30 +1080,299 @@ class Benchmark(serializable):
                 raise ValueError('Input/Output pairs benchmark need to be '
                                  '"InputOutputPair" objects or a string pairs')
 
+    def hasVerificationTiers(self):
+        return any(io_pair.isSmoke() for io_pair in self.input_output_pairs)
+
+    def getInputOutputPairs(self, full=True):
+        """The input/output pairs of the full or the smoke verification
+        tier, the latter are all pairs if there are no smoke pairs."""
+        if full or not self.hasVerificationTiers():
+            return self.input_output_pairs
+        return [io_pair for io_pair in self.input_output_pairs
+                if io_pair.isSmoke()]
+
+    def getVerifyCommand(self, full=True):
+        if full or not self.hasVerificationTiers():
+            return self.verify_cmd
+        return ''
+
+
+class PersistentStatistics(serializable):
+    """Statistics kept in a JSON file across runs."""
+
+    _path = None
+
+    @classmethod
+    def load(cls, path):
+        statistics = None
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r') as fd:
+                    statistics = cls.from_json(fd.read())
+            except Exception as e:
+                logger.warn(f'Failed to read statistics @ {path}:\n{e}')
+        if not isinstance(statistics, cls):
+            statistics = cls()
+        statistics._path = path
+        return statistics
+
+    def save(self):
+        if self._path:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            atomic_write(self._path, self.to_json().encode('utf8'))
+
+
+class VerificationStatistics(PersistentStatistics):
+    """How often, and how fast, the verification checks of a benchmark (the
+    verify command and the input/output pairs) rejected a candidate.
+
+    Used to run the checks that are cheap and likely to fail first.
+    """
+    __type__ = 'VerificationStatistics'
+
+    def __init__(self, checks={}):
+        # check key -> {'runs': #runs, 'failures': #failures, 'time': seconds}
+        self.checks = dict(checks)
+
+    def record(self, key, passed, duration):
+        check = self.checks.setdefault(key, {'runs': 0, 'failures': 0,
+                                             'time': 0.0})
+        check['runs'] += 1
+        check['failures'] += 0 if passed else 1
+        check['time'] += duration
+
+    def getExpectedCostToReject(self, key):
+        """The expected run time spent on this check per rejected candidate;
+        checks that were never run come first."""
+        check = self.checks.get(key)
+        if not check or not check['runs']:
+            return 0.0
+        # Laplace smoothing such that checks that never failed are not ignored
+        failure_rate = (check['failures'] + 1) / (check['runs'] + 2)
+        return (check['time'] / check['runs']) / failure_rate
+
+    def order(self, checks):
+        """Sort (key, check) pairs, the most promising check first."""
+        return sorted(checks,
+                      key=lambda check: self.getExpectedCostToReject(check[0]))
+
+
+class ChoicePrior(PersistentStatistics):
+    """How often optimistic choices of a [category][kind] had to be limited
+    in earlier runs.
+
+    The failure probability p of a kind determines the size of the first
+    window the ChoiceExplorer tries, the largest window that is safe with
+    probability 1/2, i.e., (1 - p)^w >= 1/2.
+    """
+    __type__ = 'ChoicePrior'
+
+    def __init__(self, kinds={}):
+        # '[category][kind]' -> {'choices': #choices, 'failures': #limited}
+        self.kinds = dict(kinds)
+
+    def record(self, oc):
+        kind = self.kinds.setdefault(f'[{oc.category}][{oc.kind}]',
+                                     {'choices': 0, 'failures': 0})
+        kind['choices'] += 1
+        if oc.getOptimisticValue() < oc.max_options - 1:
+            kind['failures'] += 1
+
+    def getWindowSizes(self):
+        window_sizes = {}
+        for key, kind in self.kinds.items():
+            if not kind['choices']:
+                continue
+            category, kind_name = key[1:-1].split('][', 1)
+            # Laplace smoothing, kinds that never failed are not certainly safe
+            p = (kind['failures'] + 1) / (kind['choices'] + 2)
+            window_sizes[(category, kind_name)] = max(
+                1, int(math.log(0.5) / math.log(1 - p)))
+        return window_sizes
+
+
+class SpeedupReport(PersistentStatistics):
+    """Run times of a benchmark built with the tuned source files, without
+    their optimistic choices, and with the choices of one category only.
+
+    Written by Experiment.measureSpeedups.
+    """
+    __type__ = 'SpeedupReport'
+
+    def __init__(self, source_files={}):
+        # source path -> {'baseline': seconds, 'tuned': seconds,
+        #                 'final': seconds, 'categories': {category: seconds},
+        #                 'rejected': [category, ...],
+        #                 'rejection_applied': bool}
+        self.source_files = dict(source_files)
+
 
 class Experiment(serializable):
     __type__ = 'Experiment'
 
     def __init__(self, benchmark_files, max_tries=None, max_time=None,
-                 oc_blacklist=[], oc_whitelist=None):
+                 oc_blacklist=[], oc_whitelist=None, jobs=1, verify_jobs=1,
+                 sandbox_root=None, sandbox_link_mode='auto',
+                 cache_directory=None, compare_object_code=True,
+                 relink=False, frontend_once=False, prior_file=None,
+                 strategy='bisection', cores=1, measure_runtime=False,
+                 runtime_repetitions=5, runtime_warmup=1, pin_cpu=None,
+                 min_speedup=None, profile=False, profile_min_weight=0.0,
+                 function_shards=1, timeout_factor=None, timeout_runs=3,
+                 trace_file=None, coordinator_address=None,
+                 cores_per_run=None, results_file=None,
+                 checkpoint_file=None, time_used=0, annotation_run=0,
+                 finished_benchmark_files=[], current_benchmark=None,
+                 current_benchmark_file='', current_source_file=0,
+                 explorer=None):
         self.benchmark_files = benchmark_files
         self.max_tries = max_tries
         self.max_time = max_time
-        self.time_end = (time.time() + max_time) if max_time else None
+        self.time_used = time_used
+        self._time_start = time.time()
+        self._time_end = ((self._time_start + max_time - time_used)
+                          if max_time else None)
         self.oc_blacklist = (oc_blacklist if isinstance(oc_blacklist, list)
                              else [oc_blacklist])
         self.oc_whitelist = oc_whitelist if oc_whitelist != [] else None
-        self.annotation_run = 0
+        self.jobs = max(1, jobs)
+        self.verify_jobs = max(1, verify_jobs)
+        self.sandbox_root = sandbox_root
+        self.sandbox_link_mode = sandbox_link_mode
+        self.cache_directory = cache_directory
+        self.compare_object_code = compare_object_code
+        self.relink = relink
+        self.frontend_once = frontend_once
+        self.prior_file = prior_file
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Unknown exploration strategy "{strategy}", '
+                             f'available are: {", ".join(STRATEGIES)}')
+        self.strategy = strategy
+        # Core budget, see getNumConcurrentJobs
+        self.cores = max(1, cores)
+        # Run time measurement of the tuned source files, see measureSpeedups
+        self.measure_runtime = measure_runtime
+        self.runtime_repetitions = max(1, runtime_repetitions)
+        self.runtime_warmup = runtime_warmup
+        self.pin_cpu = pin_cpu
+        self.min_speedup = min_speedup
+        # Tune the choices in hot functions first and skip the ones in
+        # functions with less than profile_min_weight percent of the samples,
+        # see profileBenchmark
+        self.profile = profile
+        self.profile_min_weight = profile_min_weight
+        # Tune the functions of a source file in this many shards
+        # concurrently, see optimizeShards
+        self.function_shards = max(1, function_shards)
+        # Kill verification runs after timeout_factor times the median
+        # baseline run time (of timeout_runs runs), see deriveTimeouts
+        self.timeout_factor = timeout_factor
+        self.timeout_runs = max(1, timeout_runs)
+        # Append an event per try to trace_file, see traceTry
+        self.trace_file = (os.path.abspath(trace_file) if trace_file
+                           else None)
+        self._tracer = Tracer(self.trace_file) if trace_file else None
+        # Serve the candidates to workers connected to coordinator_address
+        # (host:port or a Unix socket path), see SpeculativeEvaluator
+        self.coordinator_address = coordinator_address
+        self._coordinator = None
+        # Place each verification run on cores_per_run cores (of one NUMA
+        # node) with as many OpenMP threads, runs wait for free cores, see
+        # CoreScheduler
+        self.cores_per_run = cores_per_run
+        self._scheduler = (CoreScheduler(cores_per_run) if cores_per_run
+                           else None)
+        if self._scheduler:
+            logger.info(f'Verification runs are placed on '
+                        f'{self._scheduler}')
+            if not self._scheduler.canBind():
+                logger.warn(f'Neither numactl nor taskset was found, '
+                            f'verification runs are not bound to the cores '
+                            f'of their slot')
+        # Record every evaluated control string in the results_file database,
+        # its verdicts are reused like cached ones, see ResultsDatabase
+        self.results_file = (os.path.abspath(results_file) if results_file
+                             else None)
+        self._results = (ResultsDatabase(results_file) if results_file
+                         else None)
+        if self._results:
+            logger.info(f'Results are recorded in {results_file}')
+        self._prior = ChoicePrior.load(prior_file) if prior_file else None
+        self.checkpoint_file = (os.path.abspath(checkpoint_file)
+                                if checkpoint_file else None)
+
+        # The progress of the experiment, checkpointed to resume it later.
+        self.annotation_run = annotation_run
+        self.finished_benchmark_files = list(finished_benchmark_files)
+        self.current_benchmark = current_benchmark
+        self.current_benchmark_file = current_benchmark_file
+        self.current_source_file = current_source_file
+        self.explorer = explorer
+        if self.explorer:
+            self.explorer.time_end = self._time_end
+            self.explorer.setWindowSizes(self.getWindowSizes())
+
+        self._sandboxes = []
+        self._check_records = []
+        # Keys of the checks that timed out, appended to by the verification
+        # threads. Verdicts of timed out checks are not cached.
+        self._timed_out_checks = []
+        # Phase timings and cache hits of the current try, see traceTry
+        self._trace = collections.Counter()
+        self._object_cache = (ObjectCache(cache_directory) if cache_directory
+                              else None)
+        if self._object_cache:
+            logger.info(f'Objects and verdicts are cached in '
+                        f'{cache_directory}')
+
+    def __getstate__(self):
+        # The coordinator (sockets and threads) stays in this process.
+        state = dict(self.__dict__)
+        state['_coordinator'] = None
+        return state
 
     def run(self):
-        base_path = os.path.abspath(os.curdir)
+        if self.coordinator_address:
+            self._coordinator = Coordinator(self.coordinator_address)
+            logger.info(f'Candidates are evaluated by the workers connected '
+                        f'to {self.coordinator_address}')
+        try:
+            self.runBenchmarkFiles()
+        finally:
+            if self._coordinator:
+                self._coordinator.close()
+                self._coordinator = None
+
+    def runBenchmarkFiles(self):
+        self.benchmark_files = [os.path.abspath(benchmark_file)
+                                for benchmark_file in self.benchmark_files]
 
+        benchmark_files = []
         for benchmark_file in self.benchmark_files:
-            # Reset the base direcotry
-            os.chdir(base_path)
+            if benchmark_file in self.finished_benchmark_files:
+                logger.info(f'Skip finished benchmark file {benchmark_file}')
+                continue
+            benchmark_files.append(benchmark_file)
 
-            benchmark_file = os.path.abspath(benchmark_file)
-            benchmark = self.readBenchmarkFile(benchmark_file)
+        num_concurrent = self.getNumConcurrentJobs()
+        if num_concurrent > 1:
+            logger.info(f'Tune up to {num_concurrent} benchmarks (or source '
+                        f'files) concurrently')
+            self.runConcurrently(benchmark_files, num_concurrent)
+            return
+
+        for benchmark_file in benchmark_files:
+            if (self.current_benchmark and
+                    self.current_benchmark_file == benchmark_file):
+                logger.info(f'Resume benchmark file {benchmark_file}')
+                benchmark = self.current_benchmark
+            else:
+                benchmark = self.readBenchmarkFile(benchmark_file)
+                self.current_benchmark = benchmark
+                self.current_benchmark_file = benchmark_file
+                self.current_source_file = 0
+                self.annotation_run = 0
+                self.explorer = None
             if not benchmark:
                 continue
 
@@ -514,6 +1384,214 @@ class Experiment(serializable):
                 logger.error(f' The execution of {benchmark} ended in an '
                              f' uncaught exception:\n{e!s}', exc_info=True)
 
+            self.finished_benchmark_files.append(benchmark_file)
+            self.current_benchmark = None
+            self.current_benchmark_file = ''
+            self.writeCheckpoint()
+
+    def getNumConcurrentJobs(self):
+        """Each benchmark (or source file) tuned uses up to jobs * verify_jobs
+        cores, run as many of them concurrently as the core budget allows.
+        With a coordinator the workers evaluate, benchmarks are tuned one at a
+        time."""
+        if self.coordinator_address:
+            return 1
+        return max(1, self.cores // (self.jobs * self.verify_jobs))
+
+    def runConcurrently(self, benchmark_files, num_concurrent):
+        """Tune the benchmarks in up to num_concurrent forked processes.
+
+        The source files of benchmarks with independent sources are tuned in
+        separate jobs, each in a sandbox of the benchmark directory. The
+        annotated sources are copied back once a job finished and verified
+        together once all jobs of the benchmark finished, see
+        verifyIndependentSources. Checkpoints are written per finished
+        benchmark.
+        """
+        jobs = []
+        benchmarks = {}
+        # benchmark file -> {source path: original content}
+        original_sources = collections.defaultdict(dict)
+        for benchmark_file in benchmark_files:
+            resumed = (self.current_benchmark and
+                       self.current_benchmark_file == benchmark_file)
+            if resumed:
+                logger.info(f'Resume benchmark file {benchmark_file}')
+                benchmark = self.current_benchmark
+            else:
+                benchmark = self.readBenchmarkFile(benchmark_file)
+            if not benchmark:
+                continue
+
+            assert isinstance(benchmark, Benchmark)
+            benchmarks[benchmark_file] = benchmark
+            # A resumed benchmark continues where it stopped, as a whole.
+            if (benchmark.independent_sources and not resumed and
+                    len(benchmark.source_files) > 1):
+                jobs += [(benchmark_file, idx)
+                         for idx in range(len(benchmark.source_files))]
+            else:
+                jobs.append((benchmark_file, None))
+
+        num_remaining = collections.Counter(job[0] for job in jobs)
+        running = {}
+        num_started = 0
+        while jobs or running:
+            while jobs and len(running) < num_concurrent:
+                benchmark_file, source_index = jobs.pop(0)
+                job_directory = os.path.join(temp_directory,
+                                             f'job.{num_started}')
+                num_started += 1
+                process, sandbox = self.startJob(benchmarks[benchmark_file],
+                                                 benchmark_file, source_index,
+                                                 job_directory)
+                running[process.sentinel] = (process, sandbox, benchmark_file,
+                                             source_index)
+
+            for sentinel in multiprocessing.connection.wait(list(running)):
+                process, sandbox, benchmark_file, source_index = running.pop(
+                    sentinel)
+                process.join()
+                benchmark = benchmarks[benchmark_file]
+                if process.exitcode != 0:
+                    logger.error(f'The job tuning {benchmark.name} failed, '
+                                 f'exit code was {process.exitcode}')
+                elif sandbox:
+                    source_file = benchmark.source_files[source_index]
+                    logger.debug(f'- Copy tuned {source_file.path} of '
+                                 f'{benchmark.name} from {sandbox}')
+                    path = os.path.join(os.path.dirname(benchmark_file),
+                                        source_file.path)
+                    with open(path, 'rb') as fd:
+                        original_sources[benchmark_file][
+                            source_file.path] = fd.read()
+                    shutil.copyfile(sandbox.getPath(source_file.path), path)
+                if sandbox:
+                    sandbox.remove()
+
+                num_remaining[benchmark_file] -= 1
+                if num_remaining[benchmark_file]:
+                    continue
+                success = True
+                if benchmark.independent_sources:
+                    success = self.verifyIndependentSources(
+                        benchmark, benchmark_file,
+                        original_sources.pop(benchmark_file, {}))
+                logger.info(f'Finished benchmark file {benchmark_file}, '
+                            f'{"" if success else "un"}successful')
+                self.finished_benchmark_files.append(benchmark_file)
+                if self.current_benchmark_file == benchmark_file:
+                    self.current_benchmark = None
+                    self.current_benchmark_file = ''
+                self.writeCheckpoint()
+
+    def startJob(self, benchmark, benchmark_file, source_index,
+                 job_directory):
+        """Fork a process that tunes the benchmark, or only its source file
+        with source_index in a sandbox. Returns the process and the sandbox
+        (or None)."""
+        os.makedirs(job_directory)
+        sandbox = None
+        if source_index is not None:
+            sandbox = self.createSandbox(benchmark,
+                                         os.path.dirname(benchmark_file),
+                                         os.path.join(job_directory,
+                                                      'benchmark'))
+
+        logger.info(f'Start job {os.path.basename(job_directory)} for '
+                    f'{benchmark.name}' +
+                    (f', source file '
+                     f'{benchmark.source_files[source_index].path}'
+                     if sandbox else ''))
+        process = multiprocessing.Process(target=self.runJob,
+                                          args=(benchmark, benchmark_file,
+                                                source_index, job_directory,
+                                                sandbox))
+        process.start()
+        return process, sandbox
+
+    def runJob(self, benchmark, benchmark_file, source_index, job_directory,
+               sandbox):
+        """Body of a process started by startJob. The job has a temporary
+        directory of its own and does not write checkpoints."""
+        global temp_directory
+        temp_directory = job_directory
+        if self.sandbox_root:
+            self.sandbox_root = os.path.join(self.sandbox_root,
+                                             os.path.basename(job_directory))
+        self.checkpoint_file = None
+        if benchmark is not self.current_benchmark:
+            self.current_benchmark = benchmark
+            self.current_benchmark_file = benchmark_file
+            self.current_source_file = 0
+            self.annotation_run = 0
+            self.explorer = None
+
+        try:
+            if sandbox:
+                self.runBenchmark(benchmark, benchmark_file, cwd=sandbox.path,
+                                  source_indices=[source_index])
+            else:
+                self.runBenchmark(benchmark, benchmark_file)
+        except Exception as e:
+            logger.error(f' The execution of {benchmark} ended in an '
+                         f' uncaught exception:\n{e!s}', exc_info=True)
+            sys.exit(1)
+
+    def verifyIndependentSources(self, benchmark, benchmark_file,
+                                 original_sources):
+        """The source files were tuned against the original version of the
+        other ones, verify the tuned versions together. If they fail, the
+        original sources are restored and the tuned versions are added back
+        one at a time, each is kept only if the benchmark still passes the
+        verification. Returns True if all tuned versions are kept."""
+        cwd = os.path.dirname(benchmark_file)
+        success = self.makeAndVerify(benchmark, initial=True, cwd=cwd)
+        if success:
+            logger.info(f'- The tuned source files of {benchmark.name} pass '
+                        f'the verification together')
+        else:
+            logger.error(f'- The tuned source files of {benchmark.name} fail '
+                         f'the verification together, the benchmark should '
+                         f'not be marked with independent sources')
+
+            def write_source(path, content):
+                with open(os.path.join(cwd, path), 'wb') as fd:
+                    fd.write(content)
+
+            tuned_sources = {}
+            for path, content in original_sources.items():
+                with open(os.path.join(cwd, path), 'rb') as fd:
+                    tuned_sources[path] = fd.read()
+                write_source(path, content)
+
+            verified = False
+            for path in tuned_sources:
+                write_source(path, tuned_sources[path])
+                verified = self.makeAndVerify(benchmark, initial=True, cwd=cwd)
+                if verified:
+                    logger.info(f'- Keep the tuned version of {path}')
+                else:
+                    logger.info(f'- Restore the original version of {path}')
+                    write_source(path, original_sources[path])
+            # Leave a build of the restored sources behind.
+            if not verified and not self.makeAndVerify(benchmark, initial=True,
+                                                       cwd=cwd):
+                logger.error(f'- The restored source files of '
+                             f'{benchmark.name} fail the verification')
+        self._check_records = []
+        return success
+
+    def writeCheckpoint(self):
+        if not self.checkpoint_file:
+            return
+
+        time_cur = time.time()
+        self.time_used += time_cur - self._time_start
+        self._time_start = time_cur
+        logger.debug(f' Write checkpoint to {self.checkpoint_file}')
+        atomic_write(self.checkpoint_file, self.to_json().encode('utf8'))
+
     def readBenchmarkFile(self, benchmark_file):
         if not os.path.isfile(benchmark_file):
             logger.error(f'Benchmark file @ {benchmark_file} does not exist')
@@ -527,25 +1605,57 @@ class Experiment(serializable):
                          f'{e}')
             return None
 
-    def runBenchmark(self, benchmark, benchmark_file):
+    def runBenchmark(self, benchmark, benchmark_file, cwd=None,
+                     source_indices=None):
+        """Tune the benchmark in cwd, by default the directory of the
+        benchmark file. If source_indices is given, only these source files
+        are tuned."""
         logger.info(f'Start benchmark {benchmark.name}')
-        benchmark_path = os.path.dirname(benchmark_file)
+        cwd = cwd or os.path.dirname(benchmark_file)
 
         success = False
-        logger.debug(f'- Change base directory to: {benchmark_path}')
+        logger.debug(f'- Working directory is: {cwd}')
+        if not os.path.isdir(cwd):
+            logger.error(f'Working directory "{cwd}" does not exist')
+            return
+
         try:
-            os.chdir(benchmark_path)
-        except Exception as e:
-            logger.error(f'Failed to change path to "{benchmark_path}":\n{e}')
-        else:
-            if self.makeAndVerify(benchmark, initial=True):
+            benchmark._statistics = VerificationStatistics.load(
+                os.path.splitext(benchmark_file)[0] + '.stats.json')
+            initial_success = self.makeAndVerify(benchmark, initial=True,
+                                                 cwd=cwd)
+            self.updateStatistics(benchmark)
+            if initial_success:
                 logger.info(f'- Initial build successful, proceed to '
                             f'optimistic optimization for '
                             f'{len(benchmark.source_files)} source files')
-                for source_file in benchmark.source_files:
+                if self.profile:
+                    benchmark._profile = self.profileBenchmark(benchmark, cwd)
+                if self.jobs > 1:
+                    self.createSandboxes(benchmark, cwd)
+                for idx, source_file in enumerate(benchmark.source_files):
+                    if source_indices is not None and idx not in source_indices:
+                        continue
+                    if idx < self.current_source_file:
+                        logger.info(f'- Skip finished source file '
+                                    f'{source_file.path}')
+                        continue
                     logger.info(f'- Source file is {source_file.path}')
                     benchmark._num_out_versions = 0
-                    success = self.optimizeAndRun(benchmark, source_file)
+                    if self.frontend_once:
+                        source_file._bitcode_path = self.emitBitcode(
+                            benchmark, source_file, cwd)
+                    if self.function_shards > 1:
+                        success = self.optimizeShards(benchmark, source_file,
+                                                      cwd)
+                    else:
+                        success = self.optimizeAndRun(benchmark, source_file,
+                                                      cwd)
+                    source_file._bitcode_path = None
+                    if (success and source_file.current_control_string and
+                            self.measure_runtime):
+                        self.measureSpeedups(benchmark, benchmark_file,
+                                             source_file, cwd)
                     if success and source_file.current_control_string:
                         logger.info(f'- Optimistic optimization of '
                                     f'{source_file} from {benchmark.name} '
@@ -554,67 +1664,484 @@ class Experiment(serializable):
                                     f'output versions{os.linesep}- Final '
                                     f'control string: '
                                     f'{source_file.current_control_string}')
-                        source_file.writeControl(source_file.optimistic_choices)
+                        source_file.writeControl(source_file.optimistic_choices,
+                                                 cwd)
                     else:
                         logger.info(f'- Optimistic optimization of '
                                     f'{source_file} from {benchmark.name} '
                                     f'unsuccessful.')
+                    self.current_source_file = idx + 1
+                    self.annotation_run = 0
+                    self.explorer = None
+                    self.writeCheckpoint()
+                    self.updateStatistics(benchmark, save=True)
             else:
                 logger.info(f'- Initial build of {benchmark.name} failed')
+        finally:
+            self.removeSandboxes()
+            self.updateStatistics(benchmark, save=True)
 
         logger.info(f'Finished benchmark {benchmark.name}, '
                     f'{"" if success else "un"}successful')
 
-    def optimizeAndRun(self, benchmark, source_file):
-        logger.debug(f' Determine optimistic optimization choices for '
-                     f'{source_file} in {benchmark.name}')
+    def measureSpeedups(self, benchmark, benchmark_file, source_file,
+                        cwd=os.curdir):
+        """Time the benchmark built without the optimistic choices of the
+        tuned source file, with the choices of one category only, and with all
+        of them. If min_speedup is set, the choices of categories that are
+        not at least min_speedup times faster than the baseline are reset to 0
+        (no optimistic choice). The report is stored next to the benchmark
+        file."""
+        control_string = source_file.current_control_string
+        optimistic_choices = [oc for oc in source_file.optimistic_choices
+                              if oc.opportunity_no >= 0]
+        categories = sorted(set(oc.category for oc in optimistic_choices))
+        logger.info(f'- Measure the run time of {benchmark.name} for '
+                    f'{source_file} ({self.runtime_repetitions} repetitions, '
+                    f'{self.runtime_warmup} warmup runs)')
+
+        measured = {}
+
+        def measure(keep):
+            variant = self.limitControlString(control_string,
+                                              optimistic_choices, keep)
+            if variant not in measured:
+                measured[variant] = self.measureControlString(
+                    benchmark, source_file, variant, cwd)
+            return measured[variant]
+
+        baseline = measure(lambda oc: False)
+        tuned = measure(lambda oc: True)
+        runtimes = {category: measure(lambda oc, category=category:
+                                      oc.category == category)
+                    for category in categories}
+
+        def speedup(runtime):
+            if not baseline or not runtime:
+                return None
+            return baseline / runtime
+
+        def describe(runtime):
+            if runtime is None:
+                return 'n/a'
+            if not baseline:
+                return f'{runtime:.4f}s'
+            return f'{runtime:.4f}s, speedup {speedup(runtime):.3f}x'
+
+        rejected = []
+        if self.min_speedup and baseline:
+            rejected = [category for category in categories
+                        if (speedup(runtimes[category]) or 0) <
+                        self.min_speedup]
+
+        logger.info(f'- Baseline run time: {describe(baseline)}')
+        for category in categories:
+            logger.info(f'  - [{category}] only: {describe(runtimes[category])}'
+                        f'{" (rejected)" if category in rejected else ""}')
+        logger.info(f'- Tuned run time: {describe(tuned)}')
+
+        def validate(control_string):
+            if self.compileSourceOptimistically(benchmark, source_file,
+                                                control_string,
+                                                force_validation=True,
+                                                cwd=cwd):
+                return True
+            logger.error(f'- Final control string of {source_file} failed '
+                         f'the verification: {control_string}')
+            return False
 
-        stop = False
-        self.annotation_run = 0
-        while self.annotation_run < 14 and not stop:
-            self.annotation_run += 1
-            logger.debug(f' Determine optimistic optimization coices for '
-                         f'annoator run number {self.annotation_run}')
+        final = tuned
+        tuned_control_string = control_string
+        tuned_values = [oc.value for oc in optimistic_choices]
+        if rejected:
+            for oc in optimistic_choices:
+                if oc.category in rejected:
+                    oc.value = 0
+            control_string = self.limitControlString(
+                control_string, optimistic_choices,
+                lambda oc: oc.category not in rejected)
+            final = measure(lambda oc: oc.category not in rejected)
+            source_file.current_control_string = control_string
+            logger.info(f'- Final run time without the rejected categories: '
+                        f'{describe(final)}')
+
+        # Leave the (validated) final version in the benchmark directory. If
+        # the rejection breaks it, the tuned (verified) version is kept.
+        applied = bool(rejected)
+        if not validate(control_string) and rejected:
+            logger.info(f'- Keep the tuned control string of {source_file}, '
+                        f'the rejected categories are not reset')
+            for oc, value in zip(optimistic_choices, tuned_values):
+                oc.value = value
+            source_file.current_control_string = tuned_control_string
+            final = tuned
+            applied = False
+            validate(tuned_control_string)
+
+        report = SpeedupReport.load(os.path.splitext(benchmark_file)[0] +
+                                    '.speedups.json')
+        report.source_files[source_file.path] = {
+            'baseline': baseline, 'tuned': tuned, 'final': final,
+            'categories': runtimes, 'rejected': rejected,
+            'rejection_applied': applied}
+        report.save()
+
+    @staticmethod
+    def limitControlString(control_string, optimistic_choices, keep):
+        """Reset the values of the choices keep returns False for to 0."""
+        values = list(control_string)
+        for oc in optimistic_choices:
+            if not keep(oc):
+                values[oc.position] = '0'
+        return ''.join(values)
+
+    def measureControlString(self, benchmark, source_file, control_string,
+                             cwd=os.curdir):
+        """Build and verify the benchmark with control_string, return the
+        run time or None."""
+        cache_key = self.getObjectCacheKey(benchmark, source_file,
+                                           control_string, cwd=cwd)
+        if not (self.compileSource(benchmark, source_file, control_string,
+                                   cwd=cwd, cache_key=cache_key) and
+                self.makeAndVerify(benchmark, control_string=control_string,
+                                   cwd=cwd)):
+            logger.warn(f'   - Could not build a valid benchmark for the run '
+                        f'time measurement of {control_string}')
+            return None
+        return self.measureRuntime(benchmark, cwd)
+
+    def measureRuntime(self, benchmark, cwd=os.curdir):
+        """Return the median run time (in seconds) of the input/output pairs,
+        or the verify command if there are none, after runtime_warmup runs
+        that are not measured. Returns None if a run failed. All runs use
+        the same placement, see placeMeasurement."""
+        runs = self.getBenchmarkRuns(benchmark, cwd)
+
+        runtimes = []
+        with self.placeMeasurement() as placement:
+            for repetition in range(self.runtime_warmup +
+                                    self.runtime_repetitions):
+                runtime = 0.0
+                for cmd, timeout, returncode in runs:
+                    time_start = time.perf_counter()
+                    try:
+                        run_result = sp.run(placement.get('prefix', []) + cmd,
+                                            stdout=sp.DEVNULL,
+                                            stderr=sp.DEVNULL,
+                                            stdin=sp.DEVNULL, cwd=cwd,
+                                            timeout=timeout,
+                                            env=placement.get('env'))
+                    except Exception as e:
+                        logger.warn(f'   - Run time measurement failed:\n{e}')
+                        return None
+                    runtime += time.perf_counter() - time_start
+                    if run_result.returncode != returncode:
+                        logger.warn(f'   - Run time measurement failed, exit '
+                                    f'code was {run_result.returncode}')
+                        return None
+                if repetition >= self.runtime_warmup:
+                    runtimes.append(runtime)
+
+        if not runtimes or not runs:
+            return None
+        return sorted(runtimes)[len(runtimes) // 2]
+
+    @contextlib.contextmanager
+    def placeMeasurement(self):
+        """Claim cores for timed runs like for verification runs, see
+        placeRun. Without a core scheduler the runs are placed on pin_cpu,
+        with one OpenMP thread, if it is set."""
+        if self._scheduler or self.pin_cpu is None:
+            with self.placeRun() as placement:
+                yield placement
+            return
+        yield CoreScheduler.getPlacement((None, [self.pin_cpu]))
+
+    def getBenchmarkRuns(self, benchmark, cwd=os.curdir):
+        """Return the (command, timeout, expected exit code) triples that run
+        the benchmark, the input/output pairs or the verify command."""
+        executable_path = os.path.join(cwd, benchmark.executable)
+        runs = [([executable_path, *io_pair.input], io_pair.timeout,
+                 io_pair.returncode)
+                for io_pair in benchmark.input_output_pairs]
+        if not runs and benchmark.verify_cmd:
+            runs = [(benchmark.verify_cmd.split(' '),
+                     benchmark.verify_cmd_timeout, 0)]
+        return runs
+
+    def profileBenchmark(self, benchmark, cwd=os.curdir):
+        """Sample the (baseline) benchmark with perf. Returns the share of
+        the samples, in percent, per function; empty if perf is not
+        available or failed."""
+        if not shutil.which('perf'):
+            logger.warn(f'- Profiling requires perf, explore the choices of '
+                        f'{benchmark.name} in the default order')
+            return {}
+
+        perf_data = os.path.join(temp_directory, f'perf.{benchmark.name}.data')
+        sample_re = re.compile(r'^\s*[\d.]+%\s+(\d+)\s+\[.\]\s+(\S+)')
+        samples = collections.Counter()
+        for cmd, timeout, _ in self.getBenchmarkRuns(benchmark, cwd):
             try:
-                num_op, ocs = self.determineOptimisticChoices(benchmark,
-                                                              source_file)
-                assert isinstance(num_op, int)
-                assert isinstance(ocs, collections.Iterable)
-                assert all([isinstance(oc, OptimisticChoice) for oc in ocs])
+                sp.run(['perf', 'record', '-q', '-o', perf_data, '--', *cmd],
+                       stdout=sp.DEVNULL, stderr=sp.DEVNULL, stdin=sp.DEVNULL,
+                       cwd=cwd, timeout=timeout)
+                run_result = sp.run(['perf', 'report', '-q', '-i', perf_data,
+                                     '--stdio', '--no-children', '-n',
+                                     '--no-demangle', '--sort', 'symbol'],
+                                    stdout=sp.PIPE, stderr=sp.DEVNULL,
+                                    universal_newlines=True)
             except Exception as e:
-                logger.error(f'Unexpected error:\n{e!s}', exc_info=True)
-                return False
+                logger.warn(f'   - Profiling ({" ".join(cmd)}) failed:\n{e}')
+                continue
+            for line in run_result.stdout.splitlines():
+                match = sample_re.match(line)
+                if match:
+                    samples[match.group(2)] += int(match.group(1))
+
+        num_samples = sum(samples.values())
+        if not num_samples:
+            logger.warn(f'- No profile samples for {benchmark.name}, explore '
+                        f'the choices in the default order')
+            return {}
+
+        profile = collections.Counter()
+        for function, num in samples.items():
+            profile[function] += 100.0 * num / num_samples
+            # Clones, e.g., foo.constprop.0, count for the original function.
+            if '.' in function:
+                profile[function.split('.')[0]] += 100.0 * num / num_samples
+        logger.info(f'- Hottest functions of {benchmark.name}: ' +
+                    ', '.join(f'{function} ({weight:.1f}%)'
+                              for function, weight in profile.most_common(5)))
+        return dict(profile)
+
+    def getChoiceOrder(self, benchmark, optimistic_choices):
+        """Return the sort key for the rows of the optimistic choices table,
+        the choices of hot functions come first if the benchmark was
+        profiled."""
+        opportunity_nos = optimistic_choices.getColumn('opportunity_no')
+        function_nos = optimistic_choices.getColumn('function_no')
+        if not benchmark._profile:
+            return lambda i: (opportunity_nos[i], function_nos[i])
+        functions = optimistic_choices.getColumn('function')
+        weights = {}
+        for function, weight in benchmark._profile.items():
+            function_id = optimistic_choices.getStringId(function)
+            if function_id is not None:
+                weights[function_id] = -weight
+        return lambda i: (weights.get(functions[i], 0.0), function_nos[i],
+                          opportunity_nos[i])
+
+    def getWindowSizes(self):
+        return self._prior.getWindowSizes() if self._prior else None
+
+    def updatePrior(self, choice_explorer):
+        """Learn from the choices an exploration limited (or not)."""
+        if not self._prior:
+            return
+        for oc in choice_explorer.optimistic_choices[:choice_explorer.first_pos]:
+            self._prior.record(oc)
+        self._prior.save()
+
+    def updateStatistics(self, benchmark, save=False):
+        """Account the checks run since the last update."""
+        for key, passed, duration in self._check_records:
+            benchmark._statistics.record(key, passed, duration)
+        self._check_records = []
+        if save:
+            benchmark._statistics.save()
+
+    def traceTry(self, benchmark, source_file, choice_explorer,
+                 control_string, verdict, duration):
+        """Write the trace event of a try, the check records are not accounted
+        yet (see updateStatistics)."""
+        trace, self._trace = self._trace, collections.Counter()
+        if not self._tracer:
+            return
 
-            if not ocs:
-                continue;
+        phases = {phase: trace[phase]
+                  for phase in ['compile', 'make', 'link', 'explorer']}
+        phases['verify_cmd'] = sum(duration
+                                   for key, _, duration in self._check_records
+                                   if key == 'verify_cmd')
+        phases['run'] = sum(duration
+                            for key, _, duration in self._check_records
+                            if key != 'verify_cmd')
+        first_pos, window = choice_explorer.getWindow()
+        oc = choice_explorer.getOptimisticChoiceForPosition(first_pos)
+        self._tracer.write(
+            'try', benchmark=benchmark.name, source_file=source_file.path,
+            annotation_run=self.annotation_run, tries=choice_explorer.tries,
+            control_string_length=len(control_string),
+            num_choices=ChoiceExplorer.getNumOptimisticChoices(control_string),
+            first_pos=first_pos, window=window,
+            kind=f'[{oc.category}][{oc.kind}]', verdict=bool(verdict),
+            verdict_cache_hits=trace['verdict_cache_hits'],
+            object_cache_hits=trace['object_cache_hits'], phases=phases,
+            duration=duration)
+
+    def createSandbox(self, benchmark, cwd, path):
+        """Clone the benchmark directory cwd to path."""
+        private_files = [benchmark.executable, 'output.txt']
+        for source_file in benchmark.source_files:
+            private_files += [source_file.path, source_file.output_file]
+
+        sandbox = Sandbox(cwd, path, private_files, self.sandbox_link_mode)
+        logger.debug(f'- Create sandbox {sandbox}')
+        sandbox.create()
+        return sandbox
+
+    def createSandboxes(self, benchmark, cwd=os.curdir):
+        sandbox_root = self.sandbox_root or temp_directory
+        for i in range(self.jobs):
+            self._sandboxes.append(self.createSandbox(
+                benchmark, cwd,
+                os.path.join(sandbox_root, f'sandbox.{benchmark.name}.{i}')))
+
+    def removeSandboxes(self):
+        for sandbox in self._sandboxes:
+            sandbox.remove()
+        self._sandboxes = []
+
+    def optimizeAndRun(self, benchmark, source_file, cwd=os.curdir):
+        logger.debug(f' Determine optimistic optimization choices for '
+                     f'{source_file} in {benchmark.name}')
 
-            ocs.sort(key=lambda oc: (oc.opportunity_no, oc.function_no))
-            choice_explorer = ChoiceExplorer(self.max_tries, self.max_time,
-                                             self.time_end, num_op, ocs,
-                                             source_file.current_control_string)
+        # With verification tiers the tries are verified with the smoke tier
+        # only. The last accepted control string is verified with the full
+        # tier on checkpoints and at the end, if that fails the exploration
+        # continues from the last validated state with the full tier.
+        tiered = benchmark.hasVerificationTiers()
+        full_tier = False
+        stop = False
+        while (self.annotation_run < 14 or self.explorer) and not stop:
+            if self.explorer:
+                logger.info(f' Resume annotator run number '
+                            f'{self.annotation_run} after '
+                            f'{self.explorer.tries} tries')
+                choice_explorer = self.explorer
+            else:
+                full_tier = False
+                self.annotation_run += 1
+                logger.debug(f' Determine optimistic optimization coices for '
+                             f'annoator run number {self.annotation_run}')
+                try:
+                    num_op, ocs = self.determineOptimisticChoices(benchmark,
+                                                                  source_file,
+                                                                  cwd)
+                    assert isinstance(num_op, int)
+                    assert isinstance(ocs, (ChoiceTable, list))
+                except Exception as e:
+                    logger.error(f'Unexpected error:\n{e!s}', exc_info=True)
+                    return False
+
+                if not ocs:
+                    continue;
+
+                ocs.sort(key=self.getChoiceOrder(benchmark, ocs))
+                explorer_cls = STRATEGIES[self.strategy]
+                choice_explorer = explorer_cls(self.max_tries, self.max_time,
+                                               self._time_end, num_op, ocs,
+                                               source_file.current_control_string,
+                                               window_sizes=self.getWindowSizes())
+                self.explorer = choice_explorer
+            # The output versions accepted by the smoke tier only are not
+            # known to be valid, validated_version is the last one that is.
+            validated_explorer = (copy.deepcopy(choice_explorer) if tiered
+                                  else None)
+            validated_version = benchmark._num_out_versions
+            last_accepted, last_validated = None, None
+            evaluator = None
+            if self._sandboxes or self._coordinator:
+                evaluator = SpeculativeEvaluator(self, benchmark, source_file,
+                                                 self._sandboxes, cwd,
+                                                 full_tier, self._coordinator)
+            self._trace = collections.Counter()
             try:
                 it = choice_explorer.generator()
+                time_try = time.time()
                 control_string = next(it)
+                self._trace['explorer'] += time.time() - time_try
                 while True:
                     logger.debug(f'  Control string: '
                                 f'~{ChoiceExplorer.getNumOptimisticChoices(control_string)}\
                                 ')
-                    success = self.compileSourceOptimistically(benchmark,
-                                                               source_file,
-                                                               control_string)
+                    if evaluator:
+                        success = evaluator.evaluate(choice_explorer,
+                                                     control_string)
+                    else:
+                        success = self.compileSourceOptimistically(
+                            benchmark, source_file, control_string, cwd=cwd,
+                            full=full_tier)
+                    if success:
+                        last_accepted = control_string
+                    self.traceTry(benchmark, source_file, choice_explorer,
+                                  control_string, success,
+                                  time.time() - time_try)
+                    time_try = time.time()
                     control_string = it.send(success)
+                    self._trace['explorer'] += time.time() - time_try
+                    checkpoint = (choice_explorer.tries %
+                                  CHECKPOINT_EVERY_NUM_TRIES == 0)
+                    if checkpoint and tiered:
+                        if (full_tier or last_accepted in [None,
+                                                           last_validated] or
+                                self.compileSourceOptimistically(
+                                    benchmark, source_file, last_accepted,
+                                    force_validation=True, cwd=cwd)):
+                            validated_explorer = copy.deepcopy(choice_explorer)
+                            validated_version = benchmark._num_out_versions
+                            last_validated = last_accepted
+                            full_tier = False
+                            if evaluator:
+                                evaluator.full = False
+                        else:
+                            logger.info(f' The full verification tier '
+                                        f'rejected {last_accepted}, explore '
+                                        f'again from the last validated state '
+                                        f'with the full tier')
+                            self.explorer = validated_explorer
+                            benchmark._num_out_versions = validated_version
+                            full_tier = True
+                            break
+                    self.updateStatistics(benchmark, save=checkpoint)
+                    if checkpoint:
+                        self.writeCheckpoint()
             except StopIteration as e:
                 tries, stop = int(e.value[0]), bool(e.value[1])
-                control_string = choice_explorer.control_string
+                control_string = str(choice_explorer.control_string)
                 logger.info(f' Final control string with '
                             f'~{ChoiceExplorer.getNumOptimisticChoices(control_string)} '
                             f'optimistic choices generated after {tries} tries')
                 success = self.compileSourceOptimistically(benchmark,
                                                            source_file,
                                                            control_string,
-                                                           force_validation=True)
-                source_file.optimistic_choices += choice_explorer.optimistic_choices[:choice_explorer.first_pos]
+                                                           force_validation=True,
+                                                           cwd=cwd)
+                if not success and tiered and not full_tier:
+                    logger.info(f' The full verification tier rejected the '
+                                f'final control string, explore again from '
+                                f'the last validated state with the full '
+                                f'tier')
+                    self.explorer = validated_explorer
+                    benchmark._num_out_versions = validated_version
+                    full_tier = True
+                    stop = False
+                    continue
+                source_file.optimistic_choices.extend(choice_explorer.optimistic_choices[:choice_explorer.first_pos])
                 source_file.current_control_string = control_string
+                if self._tracer:
+                    self._tracer.write(
+                        'final', benchmark=benchmark.name,
+                        source_file=source_file.path,
+                        annotation_run=self.annotation_run, tries=tries,
+                        control_string_length=len(control_string),
+                        num_choices=ChoiceExplorer.getNumOptimisticChoices(
+                            control_string),
+                        verdict=bool(success))
+                self.explorer = None
+                self.updatePrior(choice_explorer)
                 if not success:
                     print(control_string)
                 assert success
@@ -622,31 +2149,343 @@ class Experiment(serializable):
             except Exception as e:
                 logger.error(f'Unexpected error:\n{e!s}', exc_info=True)
                 return False
+            finally:
+                if evaluator:
+                    evaluator.close()
 
         return True
 
+    def optimizeShards(self, benchmark, source_file, cwd=os.curdir):
+        """Partition the functions of the source file into up to
+        function_shards shards and tune them concurrently, each with its own
+        explorer, sandbox and process, and the annotator limited to the
+        functions of the shard (only_functions). The control strings of the
+        shards are merged and validated together. Shards that break the merge
+        are found by bisection and tuned again. With a coordinator the workers
+        evaluate, the source file is not sharded. Source files with a control
+        string already are not sharded either, the function numbers in it
+        are not the ones of the shards (see mergeShards)."""
+        if (self.explorer or self._coordinator or
+                source_file.current_control_string):
+            return self.optimizeAndRun(benchmark, source_file, cwd)
+
+        shards, function_numbers = self.getFunctionShards(benchmark,
+                                                          source_file, cwd)
+        if len(shards) < 2:
+            return self.optimizeAndRun(benchmark, source_file, cwd)
+
+        logger.info(f' Tune {len(shards)} function shards of {source_file} '
+                    f'concurrently')
+        jobs = []
+        for shard in shards:
+            job_directory = tempfile.mkdtemp(dir=temp_directory,
+                                             prefix=f'shard.{source_file}.')
+            sandbox = self.createSandbox(benchmark, cwd,
+                                         os.path.join(job_directory,
+                                                      'benchmark'))
+            # The last valid version the tries of the shard compare to.
+            for path in [source_file.output_file, benchmark.executable]:
+                path += f'.{benchmark._num_out_versions}'
+                shutil.copyfile(os.path.join(temp_directory, path),
+                                os.path.join(job_directory, path))
+
+            shard_file = self.getShardFile(source_file, shard)
+            logger.debug(f'  - Shard {len(jobs)}: {", ".join(shard)}')
+            process = multiprocessing.Process(target=self.runShard,
+                                              args=(benchmark, shard_file,
+                                                    sandbox, job_directory))
+            process.start()
+            jobs.append((process, sandbox, job_directory))
+
+        tuned_shards = []
+        for process, sandbox, job_directory in jobs:
+            process.join()
+            result_path = os.path.join(job_directory, 'result.json')
+            if process.exitcode == 0 and os.path.isfile(result_path):
+                with open(result_path, 'r') as fd:
+                    tuned_shards.append(Sourcefile.from_json(fd.read()))
+            else:
+                logger.error(f' Tuning a function shard of {source_file} '
+                             f'failed, exit code was {process.exitcode}')
+            sandbox.remove()
+            shutil.rmtree(job_directory, ignore_errors=True)
+
+        self.mergeShards(benchmark, source_file, tuned_shards,
+                         function_numbers, cwd)
+        return True
+
+    def getFunctionShards(self, benchmark, source_file, cwd=os.curdir):
+        """Partition the functions with optimistic choices into up to
+        function_shards lists with a similar number of choices each. Returns
+        the shards and the numbers of the functions in the whole translation
+        unit."""
+        _, optimistic_choices = self.determineOptimisticChoices(
+            benchmark, source_file, cwd, annotation_run=1)
+        if not optimistic_choices:
+            return [], {}
+        functions = optimistic_choices.getColumn('function')
+        function_numbers = {
+            optimistic_choices.getString(function): function_no
+            for function, function_no in zip(
+                functions, optimistic_choices.getColumn('function_no'))}
+        num_choices = collections.Counter(functions)
+        shards = [[] for _ in range(min(self.function_shards,
+                                        len(num_choices)))]
+        loads = [0] * len(shards)
+        for function_id, num in num_choices.most_common():
+            shard = loads.index(min(loads))
+            shards[shard].append(optimistic_choices.getString(function_id))
+            loads[shard] += num
+        return shards, function_numbers
+
+    @staticmethod
+    def getShardFile(source_file, functions):
+        """Return a copy of the source file that is annotated for the
+        functions only, only_functions are regular expressions."""
+        shard_file = Sourcefile(source_file.path, source_file.options,
+                                [f'^{re.escape(function)}$'
+                                 for function in functions],
+                                source_file.output_file)
+        shard_file._bitcode_path = source_file._bitcode_path
+        return shard_file
+
+    def runShard(self, benchmark, shard_file, sandbox, job_directory):
+        """Body of a process started by optimizeShards, the tuned shard is
+        written to result.json in the job directory."""
+        global temp_directory
+        temp_directory = job_directory
+        self.checkpoint_file = None
+        self._sandboxes = []
+        self.annotation_run = 0
+        self.explorer = None
+        try:
+            success = self.optimizeAndRun(benchmark, shard_file, sandbox.path)
+        except Exception as e:
+            logger.error(f' Tuning the function shard '
+                         f'{shard_file.only_functions} ended in an uncaught '
+                         f'exception:\n{e!s}', exc_info=True)
+            success = False
+        if not success:
+            sys.exit(1)
+        atomic_write(os.path.join(job_directory, 'result.json'),
+                     shard_file.to_json().encode('utf8'))
+
+    def mergeShards(self, benchmark, source_file, tuned_shards,
+                    function_numbers, cwd=os.curdir):
+        """Merge the control strings of the tuned shards and validate the
+        result. If the validation fails, the merge is bisected for the first
+        shard that breaks it, the shard is dropped and the rest merged again.
+        Dropped shards are tuned again and merged if they do not break the
+        merge then.
+
+        The annotator numbers only the functions of a shard (and their
+        callees), the function numbers of the shards are replaced by the ones
+        of the whole translation unit, function_numbers, first.
+        """
+        last_valid = True
+
+        def getControlString(shards):
+            return ''.join(control_string for _, control_string, _ in shards)
+
+        def validate(shards):
+            nonlocal last_valid
+            last_valid = self.compileSourceOptimistically(
+                benchmark, source_file, getControlString(shards),
+                force_validation=True, cwd=cwd)
+            return last_valid
+
+        def renumber(shard):
+            local_numbers = {}
+            for function, function_no in zip(
+                    shard.optimistic_choices.getColumn('function'),
+                    shard.optimistic_choices.getColumn('function_no')):
+                function = shard.optimistic_choices.getString(function)
+                if function in function_numbers:
+                    local_numbers[function_no] = function_numbers[function]
+            control_string, offsets = ChoiceExplorer.renumberFunctions(
+                shard.current_control_string, local_numbers)
+            num_dropped = len(shard.optimistic_choices) - len(offsets)
+            if num_dropped:
+                logger.debug(f'  - Drop {num_dropped} choices of functions '
+                             f'that are not numbered in {source_file}')
+            return shard, control_string, offsets
+
+        accepted, dropped = [], []
+        remaining = [renumber(shard) for shard in tuned_shards]
+        while remaining:
+            if validate(accepted + remaining):
+                accepted += remaining
+                break
+            # The merge with all remaining shards fails, find the shortest
+            # prefix of them that fails as well.
+            low, high = 1, len(remaining)
+            while low < high:
+                middle = (low + high) // 2
+                if validate(accepted + remaining[:middle]):
+                    low = middle + 1
+                else:
+                    high = middle
+            shard, _, _ = remaining[low - 1]
+            logger.info(f'  - Shard {", ".join(shard.only_functions)}'
+                        f' breaks the merge')
+            accepted += remaining[:low - 1]
+            dropped.append(shard)
+            remaining = remaining[low:]
+
+        for shard in dropped:
+            logger.info(f' Tune the function shard '
+                        f'{", ".join(shard.only_functions)} again')
+            retuned = Sourcefile(source_file.path, source_file.options,
+                                 shard.only_functions, source_file.output_file)
+            retuned._bitcode_path = source_file._bitcode_path
+            self.annotation_run = 0
+            self.explorer = None
+            if not self.optimizeAndRun(benchmark, retuned, cwd):
+                last_valid = False
+                continue
+            if validate(accepted + [renumber(retuned)]):
+                accepted.append(renumber(retuned))
+            else:
+                logger.info(f'  - Shard {", ".join(shard.only_functions)} '
+                            f'still breaks the merge, it is dropped')
+        if not last_valid:
+            validate(accepted)
+
+        control_string = ''
+        for shard, shard_control_string, offsets in accepted:
+            for oc in shard.optimistic_choices:
+                if oc.position not in offsets:
+                    continue
+                source_file.optimistic_choices.add(**dict(
+                    oc.to_dict(), function_no=function_numbers[oc.function],
+                    position=len(control_string) + offsets[oc.position]))
+            control_string += shard_control_string
+        source_file.current_control_string = control_string
+        logger.info(f' Merged {len(accepted)} function shards of '
+                    f'{source_file}')
+
     def compileSourceOptimistically(self, benchmark, source_file,
                                     control_string, compile_only=False,
-                                    force_validation=False):
+                                    force_validation=False, cwd=os.curdir,
+                                    full=False):
+        """Compile and verify the source file with control_string. Forced
+        validations use the full verification tier, other ones only if full
+        is set."""
+        full = full or force_validation
+        cache_key = self.getObjectCacheKey(benchmark, source_file,
+                                           control_string, cwd=cwd)
+        if not compile_only and not force_validation:
+            verdict = self.getCachedVerdict(benchmark, source_file,
+                                            control_string, cwd=cwd, full=full)
+            if verdict is not None and self.applyCachedVerdict(
+                    benchmark, source_file, control_string, verdict,
+                    cache_key, cwd):
+                logger.debug(f' Use cached verdict ({verdict}) for '
+                             f'{control_string}')
+                self._trace['verdict_cache_hits'] += 1
+                return verdict
+
+        time_start = time.time()
+        if not self.compileSource(benchmark, source_file, control_string,
+                                  cwd=cwd, cache_key=cache_key):
+            return False
+        compile_time = time.time() - time_start
+
+        if compile_only:
+            return True
+
+        last_valid_path = os.path.join(temp_directory,
+                                       source_file.output_file +
+                                       f'.{benchmark._num_out_versions}')
+        time_start = time.time()
+        num_timed_out = len(self._timed_out_checks)
+        verified = self.verifyCompiledSource(benchmark, source_file,
+                                             control_string, last_valid_path,
+                                             force_validation, cwd=cwd,
+                                             full=full)
+        timed_out = len(self._timed_out_checks) > num_timed_out
+        if not timed_out:
+            self.storeCachedVerdict(benchmark, source_file, cache_key,
+                                    verified is not False, cwd=cwd, full=full)
+        if self._results and not timed_out:
+            self._results.record(self.describeResult(
+                benchmark, source_file, control_string, verified,
+                compile_time, time.time() - time_start, cwd=cwd, full=full))
+        if verified is None:
+            return True
+
+        object_path = os.path.join(cwd, source_file.output_file)
+        executable_path = os.path.join(cwd, benchmark.executable)
+        if not verified:
+            self.storeBrokenVersion(benchmark, source_file, object_path,
+                                    executable_path)
+            return False
+
+        self.storeValidVersion(benchmark, source_file, object_path,
+                               executable_path)
+        return True
 
+    def applyCachedVerdict(self, benchmark, source_file, control_string,
+                           verdict, cache_key=None, cwd=os.curdir):
+        """Build the object and the executable of a control string with a
+        cached verdict and store them like verified ones, but without running
+        the checks. Returns False if they could not be built."""
+        if not (self.compileSource(benchmark, source_file, control_string,
+                                   cwd=cwd, cache_key=cache_key) and
+                self.buildExecutable(benchmark, cwd=cwd)):
+            logger.warn(f' Failed to build {control_string} with a cached '
+                        f'verdict, verify it again')
+            return False
+
+        object_path = os.path.join(cwd, source_file.output_file)
+        executable_path = os.path.join(cwd, benchmark.executable)
+        if not verdict:
+            self.storeBrokenVersion(benchmark, source_file, object_path,
+                                    executable_path)
+            return True
+
+        last_valid_path = os.path.join(temp_directory,
+                                       source_file.output_file +
+                                       f'.{benchmark._num_out_versions}')
+        if not self.isSameObject(last_valid_path, object_path):
+            self.storeValidVersion(benchmark, source_file, object_path,
+                                   executable_path)
+        return True
+
+    def compileSource(self, benchmark, source_file, control_string,
+                      cwd=os.curdir, cache_key=None):
         # executable_path = os.path.abspath(benchmark.executable)
-        executable_path = benchmark.executable
+        executable_path = os.path.join(cwd, benchmark.executable)
         if os.path.isfile(executable_path):
             logger.debug(f'  Delete existing executable @ {executable_path}')
             os.remove(executable_path)
 
+        object_path = os.path.join(cwd, source_file.output_file)
+        cached_object_path = (self._object_cache.getObject(cache_key)
+                              if cache_key else None)
+        if cached_object_path:
+            logger.debug(f'  Use cached object file {cached_object_path}')
+            if os.path.isfile(object_path):
+                os.remove(object_path)
+            shutil.copyfile(cached_object_path, object_path)
+            self._trace['object_cache_hits'] += 1
+            return True
+
         compiler = source_file.getCompiler()
         options = source_file.options + benchmark.options
         try:
             cmd = [compiler, *options, '-mllvm',
                    '-optimistic-annotations-control=' + control_string,
-                   source_file.path]
+                   source_file._bitcode_path or source_file.path]
             if source_file.only_functions:
                 cmd += ['-mllvm',
                         f'-optimistic-annotator-only-functions='
                         f'{",".join(source_file.only_functions)}']
             # print(' '.join(cmd))
-            run_result = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.DEVNULL)
+            time_start = time.time()
+            run_result = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.DEVNULL,
+                                cwd=cwd)
+            self._trace['compile'] += time.time() - time_start
             if run_result.returncode is not 0:
                 logger.warn(f'   - Compile error, exit code was '
                             f'{run_result.returncode}:\n'
@@ -658,42 +2497,236 @@ class Experiment(serializable):
                         f'     - {e!s}')
             return False
 
-        if compile_only:
-            return True
+        if cache_key and os.path.isfile(object_path):
+            self._object_cache.putObject(cache_key, object_path)
+        return True
 
+    def emitBitcode(self, benchmark, source_file, cwd=os.curdir):
+        """Run the frontend once, tries then only optimize and generate code
+        for the returned (unoptimized) bitcode file. Returns None if the
+        bitcode could not be generated."""
+        compiler = source_file.getCompiler()
+        options = source_file.options + benchmark.options
+        key = ObjectCache.getKey(compiler, options,
+                                 os.path.join(cwd, source_file.path), '',
+                                 ['bitcode'])
+        # The object file name is derived from the bitcode file name.
+        bitcode_path = os.path.join(temp_directory, f'bitcode.{key}',
+                                    os.path.splitext(os.path.basename(
+                                        source_file.path))[0] + '.bc')
+        if os.path.isfile(bitcode_path):
+            return bitcode_path
+
+        os.makedirs(os.path.dirname(bitcode_path), exist_ok=True)
+        cmd = [compiler, *options, '-Xclang', '-disable-llvm-passes',
+               '-emit-llvm', '-c', source_file.path, '-o', bitcode_path]
+        logger.debug(f' Emit unoptimized bitcode: {" ".join(cmd)}')
+        try:
+            run_result = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.DEVNULL,
+                                cwd=cwd)
+        except Exception as e:
+            logger.warn(f'   - Bitcode generation failed:\n{e!s}')
+            return None
+        if run_result.returncode != 0 or not os.path.isfile(bitcode_path):
+            logger.warn(f'   - Bitcode generation failed, exit code was '
+                        f'{run_result.returncode}, compile {source_file.path} '
+                        f'from source')
+            return None
+        logger.info(f'- Tries compile the bitcode of {source_file.path}')
+        return bitcode_path
+
+    def getObjectCacheKey(self, benchmark, source_file, control_string,
+                          cwd=os.curdir):
+        if not self._object_cache:
+            return None
+        return self.getBuildKey(benchmark, source_file, control_string, cwd)
+
+    def getBuildKey(self, benchmark, source_file, control_string,
+                    cwd=os.curdir):
+        """Hash everything that determines the object file."""
+        return ObjectCache.getKey(
+            source_file.getCompiler(), source_file.options + benchmark.options,
+            os.path.join(cwd, source_file.path),
+            ChoiceExplorer.normalizeControlString(control_string),
+            [source_file.only_functions, source_file.output_file,
+             bool(source_file._bitcode_path),
+             self.getDependencyHashes(benchmark, source_file, cwd)])
+
+    def getDependencies(self, benchmark, source_file, cwd=os.curdir):
+        """Return the files, but system headers, the source file includes.
+        They are determined once, with the -MM option of the compiler."""
+        if source_file._dependencies is not None:
+            return source_file._dependencies
+
+        # Only the options that affect the preprocessor, no outputs.
+        options = []
+        is_output = False
+        for option in source_file.options + benchmark.options:
+            if not is_output and option not in ['-c', '-o']:
+                options.append(option)
+            is_output = option == '-o'
+        cmd = [source_file.getCompiler(), *options, '-MM', '-MT', 'deps',
+               source_file.path]
+        source_file._dependencies = []
+        try:
+            run_result = sp.run(cmd, stdout=sp.PIPE, stderr=sp.DEVNULL,
+                                cwd=cwd)
+        except Exception as e:
+            logger.warn(f'- Failed to determine the dependencies of '
+                        f'{source_file}:\n{e}')
+            return source_file._dependencies
+        if run_result.returncode != 0:
+            logger.warn(f'- Failed to determine the dependencies of '
+                        f'{source_file}, exit code was '
+                        f'{run_result.returncode}')
+            return source_file._dependencies
+
+        rule = run_result.stdout.decode('utf8').replace('\\\n', ' ')
+        for dependency in rule.split(':', 1)[-1].split():
+            if os.path.normpath(dependency) != os.path.normpath(
+                    source_file.path):
+                source_file._dependencies.append(dependency)
+        logger.debug(f'- Dependencies of {source_file}: '
+                     f'{" ".join(source_file._dependencies)}')
+        return source_file._dependencies
+
+    def getDependencyHashes(self, benchmark, source_file, cwd=os.curdir):
+        hashes = []
+        for dependency in self.getDependencies(benchmark, source_file, cwd):
+            path = os.path.join(cwd, dependency)
+            hashes.append([dependency, hash_file(path).hexdigest()
+                           if os.path.isfile(path) else None])
+        return hashes
+
+    def getVerificationFingerprint(self, benchmark, source_file,
+                                   cwd=os.curdir, full=True):
+        """Hash everything but the tuned object file that determines the
+        verification verdict, e.g., the other source files and the expected
+        outputs of the verification tier."""
+        input_output_pairs = benchmark.getInputOutputPairs(full)
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps(
+            [benchmark.name, benchmark.options, benchmark.executable,
+             benchmark.make_cmd, benchmark.getVerifyCommand(full),
+             [[io_pair.input, io_pair.output, io_pair.timeout,
+               io_pair.returncode, io_pair.use_stdout, io_pair.use_stderr]
+              for io_pair in input_output_pairs]]).encode('utf8'))
+        paths = [other.path for other in benchmark.source_files
+                 if other.path != source_file.path]
+        paths += [io_pair.output for io_pair in input_output_pairs]
+        for path in paths:
+            path = os.path.join(cwd, path)
+            if path and os.path.isfile(path):
+                hash_file(path, hasher)
+        return hasher.hexdigest()
+
+    def getCachedVerdict(self, benchmark, source_file, control_string,
+                         cwd=os.curdir, full=False):
+        """Return the verdict of the object cache, or the results database,
+        None if neither knows it."""
+        if not self._object_cache and not self._results:
+            return None
+        build_key = self.getBuildKey(benchmark, source_file, control_string,
+                                     cwd)
+        fingerprint = self.getVerificationFingerprint(benchmark, source_file,
+                                                      cwd=cwd, full=full)
+        verdict = None
+        if self._object_cache:
+            verdict = self._object_cache.getVerdict(build_key, fingerprint)
+        if verdict is None and self._results:
+            verdict = self._results.getVerdict(build_key, fingerprint)
+        return verdict
+
+    def storeCachedVerdict(self, benchmark, source_file, cache_key, verdict,
+                           cwd=os.curdir, full=False):
+        if not cache_key:
+            return
+        fingerprint = self.getVerificationFingerprint(benchmark, source_file,
+                                                      cwd=cwd, full=full)
+        self._object_cache.putVerdict(cache_key, fingerprint, verdict)
+
+    def describeResult(self, benchmark, source_file, control_string, verdict,
+                       compile_time, verify_time, cwd=os.curdir, full=False):
+        """Return the row of the results database for an evaluated control
+        string, see ResultsDatabase."""
+        artifact_hashes = []
+        for path in [source_file.output_file, benchmark.executable]:
+            path = os.path.join(cwd, path)
+            artifact_hashes.append(hash_file(path).hexdigest()
+                                   if os.path.isfile(path) else None)
+        return {'benchmark': benchmark.name, 'source_file': source_file.path,
+                'source_hash': hash_file(os.path.join(
+                    cwd, source_file.path)).hexdigest(),
+                'build_key': self.getBuildKey(benchmark, source_file,
+                                              control_string, cwd),
+                'fingerprint': self.getVerificationFingerprint(
+                    benchmark, source_file, cwd=cwd, full=full),
+                'tier': ('full' if full or not benchmark.hasVerificationTiers()
+                         else 'smoke'),
+                'control_string': control_string,
+                'num_choices': ChoiceExplorer.getNumOptimisticChoices(
+                    control_string),
+                'annotation_run': self.annotation_run,
+                'verdict': verdict is not False,
+                'compile_time': compile_time, 'verify_time': verify_time,
+                'object_hash': artifact_hashes[0],
+                'executable_hash': artifact_hashes[1]}
+
+    def verifyCompiledSource(self, benchmark, source_file, control_string,
+                             last_valid_path, force_validation=False,
+                             cwd=os.curdir, full=True):
+        """Verify the freshly compiled source file.
+
+        Returns None if the output is equal to the one at last_valid_path, and
+        therefore known to be valid, otherwise the verification result.
+        """
         logger.debug(f' Optimistic compilation with '
                      f'~{ChoiceExplorer.getNumOptimisticChoices(control_string)} '
                      f'optimistic choices done.')
 
         logger.debug(f' Compare output to last valid output version [{control_string}]')
-        if filecmp.cmp(os.path.join(temp_directory,
-                                    source_file.output_file +
-                                    f'.{benchmark._num_out_versions}'),
-                       source_file.output_file, shallow=False):
+        if self.isSameObject(last_valid_path,
+                             os.path.join(cwd, source_file.output_file)):
             logger.debug(f' Files match, no change to the output')
             if force_validation:
                 logger.debug(f' Validation forced!')
             else:
-                return True
+                return None
         else:
             logger.debug(f' Files do not match, continue with verification')
 
-        if not self.makeAndVerify(benchmark, control_string=control_string):
-            output_path = os.path.join(temp_directory,
-                                       source_file.output_file + ".broken")
-            if os.path.isfile(output_path):
-                os.remove(output_path)
-            if os.path.isfile(source_file.output_file):
-                shutil.copyfile(source_file.output_file, output_path)
-
-            output_path = os.path.join(temp_directory,
-                                       executable_path +'.broken')
-            if os.path.isfile(output_path):
-                os.remove(output_path)
-            if os.path.isfile(executable_path):
-                shutil.copyfile(executable_path, output_path)
-            return False
+        return self.makeAndVerify(benchmark, control_string=control_string,
+                                  cwd=cwd, full=full)
+
+    def isSameObject(self, path, other_path):
+        if filecmp.cmp(path, other_path, shallow=False):
+            return True
 
+        # Debug information, e.g., line numbers, can differ for the same code.
+        if self.compare_object_code and same_object_code(path, other_path):
+            logger.debug(f' Object code matches, only debug information or '
+                         f'other metadata differ')
+            return True
+        return False
+
+    def storeBrokenVersion(self, benchmark, source_file, object_path,
+                           executable_path):
+        output_path = os.path.join(temp_directory,
+                                   source_file.output_file + ".broken")
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+        if os.path.isfile(object_path):
+            shutil.copyfile(object_path, output_path)
+
+        output_path = os.path.join(temp_directory,
+                                   benchmark.executable + '.broken')
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+        if os.path.isfile(executable_path):
+            shutil.copyfile(executable_path, output_path)
+
+    def storeValidVersion(self, benchmark, source_file, object_path,
+                          executable_path):
         benchmark._num_out_versions += 1
         logger.debug(f' Files did not match and verification was successful, '
                      f'store output as last valid'
@@ -702,10 +2735,10 @@ class Experiment(serializable):
         output_path = os.path.join(temp_directory,
                                    source_file.output_file +
                                    f'.{benchmark._num_out_versions}')
-        shutil.copyfile(source_file.output_file, output_path)
+        shutil.copyfile(object_path, output_path)
 
         output_path = os.path.join(temp_directory,
-                                   executable_path +
+                                   benchmark.executable +
                                    f'.{benchmark._num_out_versions}')
         shutil.copyfile(executable_path, output_path)
         # try:
@@ -714,44 +2747,40 @@ class Experiment(serializable):
         # except Exception:
             # pass
 
-        return True
-
-    def determineOptimisticChoices(self, benchmark, source_file):
+    def determineOptimisticChoices(self, benchmark, source_file,
+                                   cwd=os.curdir, annotation_run=None):
+        annotation_run = annotation_run or self.annotation_run
         compiler = source_file.getCompiler()
         options = source_file.options + benchmark.options
-        try:
-            cmd = [compiler, *options, '-mllvm',
-                   f'-optimistic-annotation-runs={self.annotation_run}',
-                   '-mllvm', '-print-optimistic-opportunities',
-                   '-mllvm', '-optimistic-annotations-control=' +
-                   f'{source_file.current_control_string}',
-                   source_file.path]
-            if source_file.only_functions:
-                cmd += ['-mllvm', f'-optimistic-annotator-only-functions={",".join(source_file.only_functions)}']
-
-            run_result = sp.run(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE)
-            if run_result.returncode is not 0:
-                logger.warn(f'   - Compile error, exit code was '
-                            f'{run_result.returncode}:\n'
-                            f'     - Command: {" ".join(cmd)}')
+        cmd = [compiler, *options, '-mllvm',
+               f'-optimistic-annotation-runs={annotation_run}',
+               '-mllvm', '-print-optimistic-opportunities',
+               '-mllvm', '-optimistic-annotations-control=' +
+               f'{source_file.current_control_string}',
+               source_file._bitcode_path or source_file.path]
+        if source_file.only_functions:
+            cmd += ['-mllvm', f'-optimistic-annotator-only-functions={",".join(source_file.only_functions)}']
+
+        cache_key = None
+        matches = None
+        if self._object_cache:
+            cache_key = ObjectCache.getKey(
+                compiler, options, os.path.join(cwd, source_file.path),
+                source_file.current_control_string,
+                ['opportunities', annotation_run,
+                 source_file.only_functions, bool(source_file._bitcode_path),
+                 self.getDependencyHashes(benchmark, source_file, cwd)])
+            matches = self._object_cache.getOpportunities(cache_key)
+            if matches is not None:
+                logger.debug(f'  - Use cached opportunities')
+
+        if matches is None:
+            matches = self.discoverOpportunities(cmd, cwd)
+            if matches is None:
                 return (0, [])
+            if cache_key:
+                self._object_cache.putOpportunities(cache_key, matches)
 
-        except Exception as e:
-            logger.error(f'Unexpected error:\n{e}', exc_info=True)
-            return (0, [])
-
-        oc_re = re.compile(r'^\[OC\]'
-                           r'\[(\d+)\]'
-                           r'\[\d+\]'
-                           r'\[(\d+)\]'
-                           r'\[(\d+)\]'
-                           r'\[([^\]]+)\]'
-                           r'\[([^\]]+)\]'
-                           r'\s*@ ([^\s]*) in (.*)',
-                           re.MULTILINE)
-
-        run_output = run_result.stderr.decode('utf8')
-        matches = oc_re.findall(run_output)
         if not matches:
             logger.info(f' No opportunities for optimistic optimization found'
                         f' ({" ".join(cmd)})')
@@ -761,21 +2790,36 @@ class Experiment(serializable):
         logger.debug(f'  - Found {num_opportunities} optimistic optimization '
                      f'opportunities')
 
-        optimistic_choices = []
-        position = 0
-        for match in matches:
-            assert isinstance(match, collections.Iterable)
-            assert len(match) is 7
-            oc = OptimisticChoice(*match, position)
-            if self.oc_whitelist is not None and (f'[{oc.category}][{oc.kind}]'
-                                                  not in self.oc_whitelist):
-                oc.fix(0)
-                continue
-            if f'[{oc.category}][{oc.kind}]' in self.oc_blacklist:
-                oc.fix(0)
-                continue
-            position += 1
-            optimistic_choices.append(oc)
+        assert all(len(match) == 7 for match in matches)
+        optimistic_choices = ChoiceTable()
+        optimistic_choices.addRows(matches)
+
+        # The filters are evaluated once per kind and function and applied
+        # to the (interned) ids of the rows.
+        categories = optimistic_choices.getColumn('category')
+        kinds = optimistic_choices.getColumn('kind')
+        functions = optimistic_choices.getColumn('function')
+        filtered_kinds = {}
+        for category_kind in set(zip(categories, kinds)):
+            kind = '[{}][{}]'.format(*map(optimistic_choices.getString,
+                                          category_kind))
+            filtered_kinds[category_kind] = (
+                (self.oc_whitelist is not None and
+                 kind not in self.oc_whitelist) or
+                kind in self.oc_blacklist)
+        filtered_functions = set()
+        if benchmark._profile and self.profile_min_weight:
+            filtered_functions = set(
+                function for function in set(functions)
+                if benchmark._profile.get(optimistic_choices.getString(
+                    function), 0.0) < self.profile_min_weight)
+        optimistic_choices.take([
+            i for i, (category, kind, function) in enumerate(zip(
+                categories, kinds, functions))
+            if not (filtered_kinds[category, kind] or
+                    function in filtered_functions)])
+        optimistic_choices.getColumn('position')[:] = array(
+            'i', range(len(optimistic_choices)))
 
         logger.debug(f' Filtered {num_opportunities-len(optimistic_choices)} '
                      f'optimistic optimization opportunities based on '
@@ -787,23 +2831,115 @@ class Experiment(serializable):
         logger.info(f' Optimistic choices to work with: '
                     f'{len(optimistic_choices)}:')
 
-        oc = optimistic_choices[0]
-        category, kind, position, num = oc.category, oc.kind, oc.position, 0
-        for oc in optimistic_choices:
-            if oc.category == category and oc.kind == kind:
-                num += 1
+        kinds = list(zip(optimistic_choices.getColumn('category'),
+                         optimistic_choices.getColumn('kind')))
+        first = 0
+        for i in range(1, len(kinds) + 1):
+            if i < len(kinds) and kinds[i] == kinds[first]:
                 continue
-            logger.info(f'  - [{category}][{kind}] : {num:6} times starting '
-                        f'@ {position:10}')
-            category, kind, position, num = oc.category, oc.kind, oc.position, 1
-        logger.info(f'  - [{category}][{kind}] : {num:6} times starting '
-                    f'@ {position:10}')
+            oc = optimistic_choices[first]
+            logger.info(f'  - [{oc.category}][{oc.kind}] : {i - first:6} '
+                        f'times starting @ {oc.position:10}')
+            first = i
 
         return (num_opportunities, optimistic_choices)
 
-    def makeAndVerify(self, benchmark, initial=False, control_string=''):
+    def discoverOpportunities(self, cmd, cwd=os.curdir):
+        """Run the compiler to print the opportunities, the [OC] lines are
+        parsed while they are emitted. Returns None on error."""
+        oc_re = re.compile(r'^\[OC\]'
+                           r'\[(\d+)\]'
+                           r'\[\d+\]'
+                           r'\[(\d+)\]'
+                           r'\[(\d+)\]'
+                           r'\[([^\]]+)\]'
+                           r'\[([^\]]+)\]'
+                           r'\s*@ ([^\s]*) in (.*)')
+        matches = []
+        try:
+            proc = sp.Popen(cmd, stdout=sp.DEVNULL, stderr=sp.PIPE, cwd=cwd)
+            for line in proc.stderr:
+                match = oc_re.match(line.decode('utf8').rstrip('\n'))
+                if match:
+                    matches.append(match.groups())
+            proc.stderr.close()
+            returncode = proc.wait()
+        except Exception as e:
+            logger.error(f'Unexpected error:\n{e}', exc_info=True)
+            return None
+
+        if returncode != 0:
+            logger.warn(f'   - Compile error, exit code was '
+                        f'{returncode}:\n'
+                        f'     - Command: {" ".join(cmd)}')
+            return None
+        return matches
+
+    def recordLinkCommands(self, benchmark, cwd=os.curdir):
+        """Record the commands make runs to link the executable from the
+        existing object files, thus only the tuned object has to be relinked
+        per try (instead of running make)."""
+        benchmark._link_cmds = []
+        make_cmd = benchmark.make_cmd.split(' ')
+        if 'make' not in os.path.basename(make_cmd[0]):
+            logger.info(f'- Incremental relinking requires a make command or '
+                        f'an explicit link command, use {benchmark.make_cmd}')
+            return
+
+        # Ask make what it would do if only the executable was missing.
+        executable_path = os.path.join(cwd, benchmark.executable)
+        saved_executable_path = os.path.join(temp_directory,
+                                             benchmark.executable + '.link')
+        shutil.move(executable_path, saved_executable_path)
+        try:
+            run_result = sp.run(make_cmd + ['-n'], stdout=sp.PIPE,
+                                stderr=sp.DEVNULL, cwd=cwd,
+                                universal_newlines=True)
+        except Exception as e:
+            logger.warn(f'   - Recording the link command failed:\n{e}')
+            return
+        finally:
+            shutil.move(saved_executable_path, executable_path)
+
+        link_cmds = [line.strip() for line in run_result.stdout.splitlines()
+                     if line.strip()]
+        # Make would rebuild more than the executable or the commands depend on
+        # the benchmark directory (which breaks sandboxes), use make instead.
+        sources = [source_file.path for source_file in benchmark.source_files]
+        if (run_result.returncode != 0 or not link_cmds or
+                any(os.path.abspath(cwd) in cmd or
+                    any(source in cmd.split(' ') for source in sources)
+                    for cmd in link_cmds)):
+            logger.info(f'- Could not record the link command, use '
+                        f'{benchmark.make_cmd}')
+            return
+
+        logger.info(f'- Recorded link command: {" && ".join(link_cmds)}')
+        benchmark._link_cmds = link_cmds
+
+    def link(self, benchmark, cwd=os.curdir):
+        for link_cmd in benchmark._link_cmds:
+            logger.debug(f'   - Link benchmark ({link_cmd})')
+            try:
+                run_result = sp.run(link_cmd, shell=True, stdout=sp.DEVNULL,
+                                    stderr=sp.DEVNULL, cwd=cwd)
+            except Exception as e:
+                logger.warn(f'   - Link ({link_cmd}) failed:\n{e}')
+                return False
+            if run_result.returncode != 0:
+                logger.debug(f'   - Link ({link_cmd}) failed, exit code was '
+                             f'{run_result.returncode}, fall back to '
+                             f'{benchmark.make_cmd}')
+                executable_path = os.path.join(cwd, benchmark.executable)
+                if os.path.isfile(executable_path):
+                    os.remove(executable_path)
+                return False
+        return os.path.isfile(os.path.join(cwd, benchmark.executable))
+
+    def makeAndVerify(self, benchmark, initial=False, control_string='',
+                      cwd=os.curdir, full=True):
         # executable_path = os.path.abspath(benchmark.executable)
-        executable_path = benchmark.executable
+        executable_path = os.path.join(cwd, benchmark.executable)
 
         if initial:
             for source_file in benchmark.source_files:
@@ -813,37 +2949,23 @@ class Experiment(serializable):
                 success = self.compileSourceOptimistically(benchmark,
                                                            source_file,
                                                            control_string='',
-                                                           compile_only=True)
+                                                           compile_only=True,
+                                                           cwd=cwd)
                 if not success:
                     logger.warn(f'   - Non-optimistic compilation of '
                                 f'{source_file.path} failed')
                     return False
 
 
-        if not os.path.isfile(executable_path) or initial:
-            if os.path.isfile(executable_path):
-                logger.debug(f'   - Delete existing executable @ '
-                             f'{executable_path}')
-                os.remove(executable_path)
-
-            logger.debug(f'   - Build benchmark ({benchmark.make_cmd})')
-            try:
-                sp.run(benchmark.make_cmd.split(' '), stdout=sp.DEVNULL,
-                       stderr=sp.DEVNULL)
-            except Exception as e:
-                logger.warn(f'   - Build ({benchmark.make_cmd}) failed:\n{e}')
-                return False
-
-        logger.debug(f'   - Check for executable @ {benchmark.executable}')
-        if not os.path.isfile(executable_path):
-            logger.debug(f'    - No executable found @ {executable_path}')
+        if not self.buildExecutable(benchmark, initial, cwd):
             return False
 
         if initial:
             for source_file in benchmark.source_files:
                 logger.debug(f'   - Check for compiled source file @ '
                              f'{source_file.output_file}')
-                if not os.path.isfile(source_file.output_file):
+                object_path = os.path.join(cwd, source_file.output_file)
+                if not os.path.isfile(object_path):
                     logger.error(f'    - No output file found')
                     return False
 
@@ -853,50 +2975,261 @@ class Experiment(serializable):
                 output_path = os.path.join(temp_directory,
                                            source_file.output_file +
                                            f'.{benchmark._num_out_versions}')
-                shutil.copyfile(source_file.output_file, output_path)
+                shutil.copyfile(object_path, output_path)
                 assert os.path.isfile(output_path)
 
                 output_path = os.path.join(temp_directory,
-                                           executable_path +
+                                           benchmark.executable +
                                            f'.{benchmark._num_out_versions}')
                 shutil.copyfile(executable_path, output_path)
                 assert os.path.isfile(output_path)
 
-        if benchmark.verify_cmd:
-            logger.debug(f'   - Run verify command {benchmark.verify_cmd}')
-            try:
-                run_result = sp.run(benchmark.verify_cmd.split(' '),
-                                    stdout=sp.DEVNULL, stderr=sp.DEVNULL,
-                                    timeout=benchmark.verify_cmd_timeout)
-                if run_result.returncode == 0:
-                    logger.debug(f'   - Verify command determined match')
-                else:
-                    logger.debug(f'   - Verify command determined mismatch')
-                    return False
-            except Exception as e:
-                logger.warn(f'   - Verify command failed:\n{e}')
-                return False
+            if self.relink and not benchmark.link_cmd:
+                self.recordLinkCommands(benchmark, cwd)
 
-        if benchmark.input_output_pairs:
-            logger.debug(f'   - Start verification of '
-                         f'{len(benchmark.input_output_pairs)} input/output'
-                         f' pairs')
-            for io_pair in benchmark.input_output_pairs:
-                assert isinstance(io_pair, InputOutputPair)
+        checks = self.getChecks(benchmark, initial, control_string, cwd,
+                                full)
+
+        # Runs of benchmarks that write output.txt cannot overlap.
+        parallel = (not initial and
+                    not os.path.isfile(os.path.join(cwd, 'output.txt')))
+        if not initial:
+            checks = benchmark._statistics.order(checks)
+        num_records = len(self._check_records)
+        if not self.runChecks(checks, parallel):
+            return False
+
+        if initial and self.timeout_factor:
+            self.deriveTimeouts(benchmark, checks,
+                                self._check_records[num_records:])
+
+        logger.debug(f'    - Verification successful')
+        return True
+
+    def buildExecutable(self, benchmark, initial=False, cwd=os.curdir):
+        """Build the executable in cwd, unless it exists and initial is not
+        set. Returns False if there is no executable afterwards."""
+        executable_path = os.path.join(cwd, benchmark.executable)
+        if not os.path.isfile(executable_path) or initial:
+            if os.path.isfile(executable_path):
+                logger.debug(f'   - Delete existing executable @ '
+                             f'{executable_path}')
+                os.remove(executable_path)
+
+            time_start = time.time()
+            linked = (not initial and self.relink and benchmark._link_cmds and
+                      self.link(benchmark, cwd))
+            self._trace['link'] += time.time() - time_start
+            if not linked:
+                logger.debug(f'   - Build benchmark ({benchmark.make_cmd})')
+                time_start = time.time()
                 try:
-                    cmd = [executable_path, *io_pair.input]
-                    if not self.runAndVerify(cmd, io_pair, initial,
-                                             control_string):
-                        return False
+                    sp.run(benchmark.make_cmd.split(' '), stdout=sp.DEVNULL,
+                           stderr=sp.DEVNULL, cwd=cwd)
                 except Exception as e:
-                    logger.warn(f'Uncaught exception during run and verify:\n'
+                    logger.warn(f'   - Build ({benchmark.make_cmd}) failed:\n'
                                 f'{e}')
                     return False
+                finally:
+                    self._trace['make'] += time.time() - time_start
 
-        logger.debug(f'    - Verification successful')
+        logger.debug(f'   - Check for executable @ {benchmark.executable}')
+        if not os.path.isfile(executable_path):
+            logger.debug(f'    - No executable found @ {executable_path}')
+            return False
+        return True
+
+    def getChecks(self, benchmark, initial=False, control_string='',
+                  cwd=os.curdir, full=True):
+        """Return the verification checks, (key, check) pairs, of the
+        executable in cwd, see runChecks."""
+        executable_path = os.path.join(cwd, benchmark.executable)
+        # The initial verification determines the baseline run time.
+        timeouts = {} if initial else benchmark._timeouts
+        checks = []
+        if benchmark.getVerifyCommand(full):
+            checks.append(('verify_cmd',
+                           lambda cancel, placement: self.runVerifyCommand(
+                               benchmark, cwd, cancel,
+                               timeouts.get('verify_cmd'), placement)))
+        input_output_pairs = benchmark.getInputOutputPairs(full)
+        if input_output_pairs:
+            logger.debug(f'   - Start verification of '
+                         f'{len(input_output_pairs)} input/output'
+                         f' pairs')
+        for io_pair in input_output_pairs:
+            assert isinstance(io_pair, InputOutputPair)
+            key = io_pair.getCheckKey()
+            checks.append((key, lambda cancel, placement, io_pair=io_pair,
+                           key=key:
+                           self.runAndVerifyPair(executable_path, io_pair,
+                                                 initial, control_string, cwd,
+                                                 cancel, timeouts.get(key),
+                                                 placement)))
+        return checks
+
+    def deriveTimeouts(self, benchmark, checks, check_records):
+        """Set the timeout of each check to timeout_factor times its median
+        run time on the baseline, the initial run (in check_records) and
+        timeout_runs - 1 more. Static timeouts are never exceeded."""
+        durations = collections.defaultdict(list)
+        for key, passed, duration in check_records:
+            durations[key].append(duration)
+        static_timeouts = {io_pair.getCheckKey(): io_pair.timeout
+                           for io_pair in benchmark.input_output_pairs}
+        static_timeouts['verify_cmd'] = benchmark.verify_cmd_timeout
+
+        benchmark._timeouts = {}
+        for key, check in checks:
+            while len(durations[key]) < self.timeout_runs:
+                # Placed like the verification runs, see runChecks.
+                with self.placeRun() as placement:
+                    time_start = time.time()
+                    passed = check(None, placement)
+                    duration = time.time() - time_start
+                if not passed:
+                    logger.warn(f'- Baseline run of {key} failed, keep the '
+                                f'static timeout')
+                    break
+                durations[key].append(duration)
+            else:
+                median = sorted(durations[key])[len(durations[key]) // 2]
+                static_timeout = static_timeouts[key]
+                timeout = min(static_timeout,
+                              max(MIN_DERIVED_TIMEOUT,
+                                  self.timeout_factor * median))
+                benchmark._timeouts[key] = timeout
+                logger.info(f'- Timeout of {key}: {timeout:.1f}s '
+                            f'({self.timeout_factor}x the median baseline run '
+                            f'time {median:.3f}s, static timeout '
+                            f'{static_timeout}s)')
+
+    def runChecks(self, checks, parallel):
+        """Run the verification checks, (key, check) pairs, in order, up to
+        verify_jobs at a time if parallel is set. Once a check failed the
+        remaining ones are cancelled. Each check waits for its cores first,
+        see placeRun."""
+        def runCheck(key, check, cancel):
+            with self.placeRun(cancel) as placement:
+                if placement is None:
+                    return False
+                time_start = time.time()
+                passed = check(cancel, placement)
+            # Cancelled checks did not determine anything.
+            if passed or not (cancel and cancel.is_set()):
+                self._check_records.append((key, passed,
+                                            time.time() - time_start))
+            return passed
+
+        if not parallel or self.verify_jobs < 2 or len(checks) < 2:
+            return all(runCheck(key, check, None) for key, check in checks)
+
+        cancel = threading.Event()
+        success = True
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.verify_jobs, len(checks))) as pool:
+            futures = [pool.submit(runCheck, key, check, cancel)
+                       for key, check in checks]
+            for future in concurrent.futures.as_completed(futures):
+                if future.result():
+                    continue
+                success = False
+                cancel.set()
+                for other_future in futures:
+                    other_future.cancel()
+                break
+        return success
+
+    @contextlib.contextmanager
+    def placeRun(self, cancel=None):
+        """Claim cores for a benchmark run, see CoreScheduler. Yields the
+        placement, the command prefix and the environment of the run, None
+        if cancel was set while waiting."""
+        if not self._scheduler:
+            yield {}
+            return
+        with self._scheduler.claim(cancel) as placement:
+            yield placement
+
+    def runVerifyCommand(self, benchmark, cwd=os.curdir, cancel=None,
+                         timeout=None, placement={}):
+        logger.debug(f'   - Run verify command {benchmark.verify_cmd}')
+        try:
+            returncode, _, _ = self.runProcess(
+                benchmark.verify_cmd.split(' '), sp.DEVNULL, sp.DEVNULL,
+                sp.DEVNULL, timeout or benchmark.verify_cmd_timeout, cwd,
+                cancel, placement)
+            if returncode == 0:
+                logger.debug(f'   - Verify command determined match')
+            elif returncode is None:
+                logger.debug(f'   - Verify command cancelled')
+                return False
+            else:
+                logger.debug(f'   - Verify command determined mismatch')
+                return False
+        except sp.TimeoutExpired:
+            logger.debug(f'   - Verify command timed out')
+            self._timed_out_checks.append('verify_cmd')
+            return False
+        except Exception as e:
+            logger.warn(f'   - Verify command failed:\n{e}')
+            return False
         return True
 
-    def runAndVerify(self, cmd, io_pair, initial, control_string):
+    def runAndVerifyPair(self, executable_path, io_pair, initial,
+                         control_string, cwd=os.curdir, cancel=None,
+                         timeout=None, placement={}):
+        try:
+            cmd = [executable_path, *io_pair.input]
+            return self.runAndVerify(cmd, io_pair, initial, control_string,
+                                     cwd=cwd, cancel=cancel, timeout=timeout,
+                                     placement=placement)
+        except Exception as e:
+            logger.warn(f'Uncaught exception during run and verify:\n'
+                        f'{e}')
+            return False
+
+    def runProcess(self, cmd, stdout, stderr, stdin, timeout, cwd=os.curdir,
+                   cancel=None, placement={}):
+        """Like subprocess.run but the process is killed once cancel is set.
+        The command is run with the placement, see placeRun.
+
+        Returns the exit code (None if cancelled), stdout and stderr.
+        """
+        proc = sp.Popen(placement.get('prefix', []) + cmd, stdout=stdout,
+                        stderr=stderr, stdin=stdin, cwd=cwd,
+                        env=placement.get('env'), start_new_session=True)
+        time_end = time.time() + timeout
+        while True:
+            remaining = max(0, time_end - time.time())
+            try:
+                out, err = proc.communicate(
+                    timeout=(min(remaining, CANCEL_POLL_INTERVAL) if cancel
+                             else remaining))
+                return proc.returncode, out, err
+            except sp.TimeoutExpired:
+                if time.time() >= time_end:
+                    self.killProcess(proc)
+                    proc.communicate()
+                    raise sp.TimeoutExpired(cmd, timeout)
+                if cancel is not None and cancel.is_set():
+                    self.killProcess(proc)
+                    proc.communicate()
+                    return None, None, None
+
+    @staticmethod
+    def killProcess(proc):
+        """Kill the process and the processes it started, they may hold its
+        output pipes open. Processes are started in a session of their own,
+        see runProcess."""
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            proc.kill()
+
+    def runAndVerify(self, cmd, io_pair, initial, control_string,
+                     cwd=os.curdir, cancel=None, timeout=None, placement={}):
+        timeout = timeout or io_pair.timeout
         stdout_pipe = sp.PIPE if io_pair.use_stdout else sp.DEVNULL
         if not io_pair.use_stderr:
             stderr_pipe = sp.DEVNULL
@@ -906,17 +3239,41 @@ class Experiment(serializable):
             stderr_pipe = sp.PIPE
         stdin = sp.DEVNULL
 
+        expected_output = io_pair.output
+        expected_output_file = os.path.join(cwd, io_pair.output)
+        if io_pair.output and os.path.isfile(expected_output_file):
+            with open(expected_output_file, 'r') as fd:
+                expected_output = fd.read()
+        # if expected_output.endswith(os.linesep):
+            # expected_output = expected_output[:-len(os.linesep)]
+
+        # Benchmarks that write output.txt are verified after they finished.
+        output_file = os.path.join(cwd, 'output.txt')
+        streaming = (not initial and io_pair.streaming is not False and
+                     (io_pair.use_stdout or io_pair.use_stderr) and
+                     not os.path.isfile(output_file) and
+                     (io_pair.streaming or
+                      InputOutputPair.isLineWisePattern(expected_output)))
+
         logger.debug(f'    - Run command "{" ".join(cmd)}"')
         try:
             for arg in cmd:
-                if arg.startswith('<') and os.path.isfile(arg[1:]):
-                    stdin = open(arg[1:], 'r')
-            run_result = sp.run(cmd, stdout=stdout_pipe, stderr=stderr_pipe,
-                                timeout=io_pair.timeout, stdin=stdin)
+                if (arg.startswith('<') and
+                        os.path.isfile(os.path.join(cwd, arg[1:]))):
+                    stdin = open(os.path.join(cwd, arg[1:]), 'r')
+            if streaming:
+                returncode, run_output = self.runStreaming(
+                    cmd, io_pair, expected_output, stdout_pipe, stderr_pipe,
+                    stdin, cwd, cancel, timeout, placement)
+            else:
+                returncode, stdout, stderr = self.runProcess(
+                    cmd, stdout_pipe, stderr_pipe, stdin, timeout, cwd,
+                    cancel, placement)
             if stdin != sp.DEVNULL:
                 stdin.close()
         except sp.TimeoutExpired:
-            logger.debug(f'     - Run failed due to time out ({io_pair.timeout}s)')
+            logger.debug(f'     - Run failed due to time out ({timeout}s)')
+            self._timed_out_checks.append(io_pair.getCheckKey())
             try:
                 if stdin != sp.DEVNULL:
                     stdin.close()
@@ -932,31 +3289,34 @@ class Experiment(serializable):
                 pass
             return False
 
+        if cancel and cancel.is_set():
+            logger.debug(f'    - Run cancelled')
+            return False
+
+        if returncode is None:
+            logger.debug(f'    - Run aborted due to output mismatch')
+            if STORE_MISMATCH_PATH:
+                self.storeMismatch(cmd, io_pair, control_string, run_output)
+            return False
+
         logger.debug(f'    - Check return value')
-        if run_result.returncode is not io_pair.returncode:
+        if returncode is not io_pair.returncode:
             logger.debug(f'  Run failed due to exit code mismatch, expected '
-                         f'{io_pair.returncode} got {run_result.returncode}')
+                         f'{io_pair.returncode} got {returncode}')
             return False
 
         logger.debug(f'    - Collect run output')
-        run_output = ''
-        if os.path.isfile('output.txt'):
-            with open('output.txt', 'r') as fd:
+        if os.path.isfile(output_file):
+            with open(output_file, 'r') as fd:
                 run_output = fd.read()
-        else:
+        elif not streaming:
+            run_output = ''
             if io_pair.use_stdout:
-                run_output += run_result.stdout.decode('utf8')
+                run_output += stdout.decode('utf8')
             elif io_pair.use_stderr:
-                run_output += run_result.stderr.decode('utf8')
+                run_output += stderr.decode('utf8')
 
         logger.debug(f'    - Try to match output with expected pattern')
-        expected_output = io_pair.output
-        if os.path.isfile(io_pair.output):
-            with open(io_pair.output, 'r') as fd:
-                expected_output = fd.read()
-        # if expected_output.endswith(os.linesep):
-            # expected_output = expected_output[:-len(os.linesep)]
-
         match = re.fullmatch(expected_output, run_output)
         if match:
             logger.debug(f'    - Output matched expected pattern '
@@ -965,12 +3325,7 @@ class Experiment(serializable):
 
         logger.debug(f'    - Output did not match expected pattern')
         if STORE_MISMATCH_PATH:
-            with open(STORE_MISMATCH_PATH, 'a') as fd:
-                fd.write(f'Command: {" ".join(cmd)}{os.linesep}')
-                fd.write(f'Control: {control_string}{os.linesep}')
-                fd.write(f'I/O pair: {io_pair.input} / '
-                         f'{io_pair.output}{os.linesep}')
-                fd.write(run_output + os.linesep * 3)
+            self.storeMismatch(cmd, io_pair, control_string, run_output)
 
         if initial:
             run_output = run_output.splitlines()
@@ -985,23 +3340,235 @@ class Experiment(serializable):
                                  f'"{run_output[i]!r}"')
         return False
 
+    def runStreaming(self, cmd, io_pair, expected_output, stdout_pipe,
+                     stderr_pipe, stdin, cwd=os.curdir, cancel=None,
+                     timeout=None, placement={}):
+        """Run cmd and match its output line by line against the expected
+        output while it runs. The process is killed on the first mismatch,
+        or once cancel is set.
+
+        Returns the exit code (None if the run was aborted) and the output.
+        """
+        expected_lines = expected_output.splitlines()
+        proc = sp.Popen(placement.get('prefix', []) + cmd, stdout=stdout_pipe,
+                        stderr=stderr_pipe, stdin=stdin, cwd=cwd,
+                        env=placement.get('env'), start_new_session=True)
+        pipe = proc.stdout if io_pair.use_stdout else proc.stderr
+
+        # Lines are read in a thread such that the timeout can be enforced.
+        lines = queue.Queue()
+        def read():
+            for line in iter(pipe.readline, b''):
+                lines.put(line)
+            lines.put(None)
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+
+        timeout = timeout or io_pair.timeout
+        time_end = time.time() + timeout
+        run_output = []
+        try:
+            while True:
+                remaining = max(0, time_end - time.time())
+                try:
+                    line = lines.get(timeout=min(remaining,
+                                                 CANCEL_POLL_INTERVAL))
+                except queue.Empty:
+                    if time.time() >= time_end:
+                        raise
+                    if cancel and cancel.is_set():
+                        self.killProcess(proc)
+                        proc.wait()
+                        return None, ''.join(run_output)
+                    continue
+                if line is None:
+                    break
+                line = line.decode('utf8', 'replace')
+                run_output.append(line)
+                if not line.endswith('\n'):
+                    continue
 
-for cls in [Sourcefile, InputOutputPair, Benchmark, Experiment]:
+                i = len(run_output) - 1
+                expected_line = (expected_lines[i] if i < len(expected_lines)
+                                 else None)
+                if (expected_line is None or
+                        not re.fullmatch(expected_line, line[:-1])):
+                    logger.debug(f'    - Output mismatch in line {i}:\n'
+                                 f'"{expected_line!r}"\n"{line[:-1]!r}"')
+                    self.killProcess(proc)
+                    proc.wait()
+                    return None, ''.join(run_output)
+
+            returncode = proc.wait(timeout=max(0, time_end - time.time()))
+        except (queue.Empty, sp.TimeoutExpired):
+            self.killProcess(proc)
+            proc.wait()
+            raise sp.TimeoutExpired(cmd, timeout)
+        finally:
+            reader.join(timeout=1)
+            pipe.close()
+
+        return returncode, ''.join(run_output)
+
+    def storeMismatch(self, cmd, io_pair, control_string, run_output):
+        with open(STORE_MISMATCH_PATH, 'a') as fd:
+            fd.write(f'Command: {" ".join(cmd)}{os.linesep}')
+            fd.write(f'Control: {control_string}{os.linesep}')
+            fd.write(f'I/O pair: {io_pair.input} / '
+                     f'{io_pair.output}{os.linesep}')
+            fd.write(run_output + os.linesep * 3)
+
+
+for cls in [ControlString, ChoiceTable, OptimisticChoice, ChoiceExplorer,
+            GroupTestingExplorer, Sourcefile, InputOutputPair, Benchmark,
+            VerificationStatistics, ChoicePrior, SpeedupReport, Experiment]:
     serializable.classes[cls.__type__] = cls
 
-benchmark_files = ['./test/benchmark.ot']
-
-if len(sys.argv) > 1:
-    benchmark_files = sys.argv[1:]
-
-oc_blacklist= []#['[Par][Alignment]', '[Mem][Alignment]', '[Mem][ResAlign ]']
-oc_whitelist = []#['[Fn][RetNoAlia ]','[Par][NoAlias  ]']
-
-#max_time is in seconds!
-ex = Experiment(benchmark_files, #max_time=5,
-                oc_whitelist=oc_whitelist,
-                oc_blacklist=oc_blacklist)
-ex.run()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Optimistic tuner')
+    parser.add_argument('benchmark_files', nargs='*',
+                        default=['./test/benchmark.ot'],
+                        help='benchmark (.ot) files to tune')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        default=os.path.join(temp_directory, 'checkpoint.json'),
+                        help='periodically write the experiment state to FILE')
+    parser.add_argument('--resume', metavar='CHECKPOINT',
+                        help='resume the experiment checkpointed in CHECKPOINT')
+    parser.add_argument('--cache', metavar='DIRECTORY',
+                        help='cache object files and verification verdicts '
+                        'in DIRECTORY, it is shared across runs')
+    parser.add_argument('--prior', metavar='FILE',
+                        help='size the exploration windows with the failure '
+                        'statistics in FILE and record them there, FILE is '
+                        'shared across runs')
+    parser.add_argument('--results', metavar='FILE',
+                        help='record every evaluated control string in the '
+                        'SQLite database FILE and reuse the verdicts known '
+                        'there')
+    parser.add_argument('--trace', metavar='FILE',
+                        default=os.path.join(temp_directory, 'trace.jsonl'),
+                        help='append an event (JSON line) per try to FILE')
+    parser.add_argument('--report', metavar='TRACE',
+                        help='summarize the tuning trace TRACE and exit')
+    parser.add_argument('--coordinator', metavar='ADDRESS',
+                        help='serve the candidates to workers connected to '
+                        'ADDRESS (host:port or a Unix socket path), workers '
+                        'need the key in $OPTIMISTIC_TUNER_AUTHKEY')
+    parser.add_argument('--worker', metavar='ADDRESS',
+                        help='evaluate candidates for the coordinator at '
+                        'ADDRESS until it is done')
+    args = parser.parse_args()
+
+    if args.report:
+        print(summarize_trace(args.report))
+        sys.exit(0)
+
+    if args.worker:
+        try:
+            run_worker(args.worker, evaluateRemotely)
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(0)
+
+    oc_blacklist= []#['[Par][Alignment]', '[Mem][Alignment]', '[Mem][ResAlign ]']
+    oc_whitelist = []#['[Fn][RetNoAlia ]','[Par][NoAlias  ]']
+
+    # Number of control strings evaluated concurrently, e.g., os.cpu_count()
+    jobs = 1
+
+    # Number of verification runs (input/output pairs and the verify command)
+    # executed concurrently per evaluated control string
+    verify_jobs = 1
+
+    # Core budget, benchmarks (and source files of benchmarks with independent
+    # sources) are tuned concurrently if it exceeds jobs * verify_jobs, e.g.,
+    # os.cpu_count()
+    cores = 1
+
+    # Run the compiler frontend once per source file and only the
+    # optimization and code generation per try
+    frontend_once = False
+
+    # Relink the tuned object with the recorded link command instead of
+    # running make per try
+    relink = False
+
+    # Persistent cache for object files and verification verdicts (or None),
+    # e.g., os.path.join(os.path.expanduser('~/.cache'), 'optimistic_tuner')
+    cache_directory = args.cache
+
+    # Search strategy for the optimistic choices, one of STRATEGIES
+    strategy = 'bisection'
+
+    # Failure statistics per optimistic choice kind, shared across runs (or
+    # None), e.g., os.path.join(args.cache, 'choice_prior.json')
+    prior_file = args.prior
+
+    # Measure the run time of the benchmark with the tuned source files, per
+    # optimistic choice category, on the given CPU with one OpenMP thread (or
+    # None, then the runs are placed like the verification runs, see
+    # cores_per_run)
+    measure_runtime = False
+    pin_cpu = None
+
+    # Reject categories of optimistic choices that do not speed the benchmark
+    # up by this factor (or None)
+    min_speedup = None
+
+    # Profile the benchmark with perf and tune the choices in hot functions
+    # first, skip functions with less than profile_min_weight percent of the
+    # samples
+    profile = False
+    profile_min_weight = 0.0
+
+    # Number of function shards of a source file tuned concurrently
+    function_shards = 1
+
+    # Kill verification runs after this multiple of the median baseline run
+    # time (or None for the static timeouts), e.g., 10
+    timeout_factor = None
+
+    # Database of all evaluated control strings, their known verdicts are
+    # reused (or None), e.g., os.path.join(args.cache, 'results.sqlite')
+    results_file = args.results
+
+    # Place each verification run on this many cores (of one NUMA node) and
+    # run it with as many OpenMP threads, runs wait for free cores (or None)
+    cores_per_run = None
+
+    if args.resume:
+        with open(args.resume, 'r') as fd:
+            ex = Experiment.from_json(fd.read())
+        ex.checkpoint_file = os.path.abspath(args.resume)
+        logger.info(f'Resume experiment from checkpoint {args.resume}')
+    else:
+        #max_time is in seconds!
+        ex = Experiment(args.benchmark_files, #max_time=5,
+                        oc_whitelist=oc_whitelist,
+                        oc_blacklist=oc_blacklist,
+                        jobs=jobs,
+                        verify_jobs=verify_jobs,
+                        cores=cores,
+                        relink=relink,
+                        frontend_once=frontend_once,
+                        prior_file=prior_file,
+                        strategy=strategy,
+                        measure_runtime=measure_runtime,
+                        pin_cpu=pin_cpu,
+                        min_speedup=min_speedup,
+                        profile=profile,
+                        profile_min_weight=profile_min_weight,
+                        function_shards=function_shards,
+                        timeout_factor=timeout_factor,
+                        cores_per_run=cores_per_run,
+                        results_file=results_file,
+                        cache_directory=cache_directory,
+                        trace_file=args.trace,
+                        coordinator_address=args.coordinator,
+                        checkpoint_file=args.checkpoint)
+        logger.info(f'Checkpoints are written to {ex.checkpoint_file}')
+        logger.info(f'Tries are traced to {ex.trace_file}')
+    ex.run()
 
 # Dump an experiment (or anything serializable) to json:
 #   ex.to_json()
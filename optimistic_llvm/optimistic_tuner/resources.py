@@ -0,0 +1,159 @@
+import os
+import re
+import glob
+import time
+import shutil
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Interval (in seconds) in which waiting runs look for a free slot
+SLOT_POLL_INTERVAL = 0.05
+# The CPUs of the NUMA nodes, one cpulist file per node
+NUMA_NODE_CPULISTS = '/sys/devices/system/node/node*/cpulist'
+
+
+def parse_cpulist(cpulist):
+    """Return the CPUs of a cpulist, e.g., '0-3,8-11'."""
+    cpus = []
+    for part in cpulist.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus += range(int(first), int(last or first) + 1)
+    return cpus
+
+
+def get_available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def get_numa_nodes(cpus):
+    """Return the available CPUs grouped by NUMA node, (node, cpus) pairs,
+    a single group of node None if the topology is unknown."""
+    nodes = []
+    for cpulist_path in glob.glob(NUMA_NODE_CPULISTS):
+        node = int(re.search(r'node(\d+)', cpulist_path).group(1))
+        with open(cpulist_path, 'r') as fd:
+            node_cpus = [cpu for cpu in parse_cpulist(fd.read())
+                         if cpu in cpus]
+        if node_cpus:
+            nodes.append((node, node_cpus))
+    if sum(len(node_cpus) for _, node_cpus in nodes) != len(cpus):
+        return [(None, cpus)]
+    return sorted(nodes)
+
+
+def get_binding_prefix(cpus, node=None):
+    """Return the command prefix that runs a command on the CPUs, and the
+    memory of the NUMA node (if any), empty if no tool for it exists.
+
+    The binding is done by numactl or taskset, not in the forked child
+    (preexec_fn), as that is not safe in the presence of threads.
+    """
+    cpulist = ','.join(str(cpu) for cpu in cpus)
+    if shutil.which('numactl'):
+        prefix = ['numactl', f'--physcpubind={cpulist}']
+        if node is not None:
+            prefix.append(f'--membind={node}')
+        return prefix
+    if shutil.which('taskset'):
+        return ['taskset', '-c', cpulist]
+    return []
+
+
+class CoreScheduler(object):
+    """Partitions the available cores into slots for concurrent benchmark
+    runs.
+
+    Slots hold cores_per_run cores of one NUMA node, if the nodes are large
+    enough, otherwise consecutive cores across nodes. Runs are bound to the
+    cores (and the memory of the node) of their slot with numactl or taskset
+    and run with as many OpenMP threads, bound to the cores. A run claims a slot
+    with an exclusive lock on the slot file in lock_directory and waits
+    until one is free. All processes on the node that use the same
+    lock_directory share the slots, e.g., the verification threads, the
+    speculative and the remote workers, and concurrent jobs.
+    """
+
+    def __init__(self, cores_per_run, lock_directory=None):
+        self.cores_per_run = max(1, cores_per_run)
+        self.lock_directory = lock_directory or os.path.join(
+            tempfile.gettempdir(), f'optimistic_tuner.slots.{cores_per_run}')
+        os.makedirs(self.lock_directory, exist_ok=True)
+
+        cpus = get_available_cpus()
+        # The slots, (node, cpus) pairs, node is None for slots that are not
+        # confined to one NUMA node.
+        self.slots = []
+        for node, node_cpus in get_numa_nodes(cpus):
+            for i in range(0, len(node_cpus) - self.cores_per_run + 1,
+                           self.cores_per_run):
+                self.slots.append((node, node_cpus[i:i + self.cores_per_run]))
+        if not self.slots:
+            self.slots = [(None, cpus[i:i + self.cores_per_run])
+                          for i in range(0, len(cpus), self.cores_per_run)]
+
+    def __repr__(self):
+        return (f'{len(self.slots)} slots of {self.cores_per_run} cores '
+                f'({self.lock_directory})')
+
+    @staticmethod
+    def canBind():
+        return bool(get_binding_prefix([0]))
+
+    def getSlotPath(self, slot):
+        _, cpus = slot
+        return os.path.join(self.lock_directory,
+                            'cpus.' + ','.join(str(cpu) for cpu in cpus))
+
+    def tryClaim(self, slot):
+        """Return the open slot file if the slot was free, None otherwise."""
+        fd = os.open(self.getSlotPath(slot), os.O_RDWR | os.O_CREAT, 0o644)
+        if not fcntl:
+            # Without file locks the slots are not claimed exclusively.
+            return fd
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            os.close(fd)
+            return None
+
+    @contextlib.contextmanager
+    def claim(self, cancel=None):
+        """Claim a free slot, waiting for one if necessary. Yields the
+        placement of a run on the slot (see getPlacement), None if cancel was
+        set while waiting."""
+        while True:
+            for slot in self.slots:
+                fd = self.tryClaim(slot)
+                if fd is not None:
+                    break
+            else:
+                if cancel and cancel.is_set():
+                    yield None
+                    return
+                time.sleep(SLOT_POLL_INTERVAL)
+                continue
+            break
+
+        try:
+            yield self.getPlacement(slot)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def getPlacement(slot):
+        """Return the command prefix and the environment of a run on the
+        slot."""
+        node, cpus = slot
+        return {'prefix': get_binding_prefix(cpus, node),
+                'env': dict(os.environ, OMP_NUM_THREADS=str(len(cpus)),
+                            OMP_PLACES='cores', OMP_PROC_BIND='close')}
@@ -0,0 +1,78 @@
+import os
+import time
+import sqlite3
+
+# The columns of the tries table, besides the id
+COLUMNS = [('time', 'REAL'), ('benchmark', 'TEXT'), ('source_file', 'TEXT'),
+           ('source_hash', 'TEXT'), ('build_key', 'TEXT'),
+           ('fingerprint', 'TEXT'), ('tier', 'TEXT'),
+           ('control_string', 'TEXT'), ('num_choices', 'INTEGER'),
+           ('annotation_run', 'INTEGER'), ('verdict', 'INTEGER'),
+           ('compile_time', 'REAL'), ('verify_time', 'REAL'),
+           ('object_hash', 'TEXT'), ('executable_hash', 'TEXT')]
+INDICES = {'tries_build_key': ['build_key', 'fingerprint'],
+           'tries_source': ['benchmark', 'source_hash']}
+# Time (in seconds) a writer waits for concurrent writers
+LOCK_TIMEOUT = 60.0
+
+
+class ResultsDatabase(object):
+    """An SQLite database of the evaluated control strings of all runs.
+
+    A row holds the benchmark, the hash of the source file, the control
+    string, the verdict, the compile and verification time and the hashes of
+    the object file and the executable. The build key and the verification
+    fingerprint (see Experiment.getBuildKey) determine the verdict, rows with
+    the same ones are known results. Connections are opened per process,
+    thus the database can be shared by concurrent jobs.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._connection = None
+        self._pid = None
+
+    def __repr__(self):
+        return self.path
+
+    def __getstate__(self):
+        return {'path': self.path, '_connection': None, '_pid': None}
+
+    def getConnection(self):
+        if self._connection and self._pid == os.getpid():
+            return self._connection
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        self._pid = os.getpid()
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS tries '
+                '(id INTEGER PRIMARY KEY AUTOINCREMENT, ' +
+                ', '.join(f'{name} {sql_type}' for name, sql_type in COLUMNS) +
+                ')')
+            for index, columns in INDICES.items():
+                self._connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS {index} ON tries '
+                    f'({", ".join(columns)})')
+        return self._connection
+
+    def record(self, result):
+        """Add a result, a dict with (a subset of) the COLUMNS."""
+        result = dict(result, time=result.get('time', time.time()))
+        names = [name for name, _ in COLUMNS if name in result]
+        connection = self.getConnection()
+        with connection:
+            connection.execute(
+                f'INSERT INTO tries ({", ".join(names)}) VALUES '
+                f'({", ".join("?" * len(names))})',
+                [result[name] for name in names])
+
+    def getVerdict(self, build_key, fingerprint):
+        """Return the last verdict recorded for the build key and the
+        fingerprint, None if there is none."""
+        row = self.getConnection().execute(
+            'SELECT verdict FROM tries WHERE build_key = ? AND '
+            'fingerprint = ? ORDER BY id DESC LIMIT 1',
+            (build_key, fingerprint)).fetchone()
+        return None if row is None else bool(row[0])
@@ -0,0 +1,115 @@
+import os
+import errno
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request to clone (reflink) a file on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+LINK_MODES = ['auto', 'reflink', 'hardlink', 'copy']
+
+
+class Sandbox(object):
+    """A private clone of a benchmark directory.
+
+    Files are cloned with reflinks if the file system supports it, otherwise
+    with hardlinks, and copied as a last resort (or if link_mode is 'copy').
+    Private files, e.g., the tuned sources, object files, and the executable,
+    are never hardlinked as they are (re)written during a try. Tools that
+    modify other files in place, instead of replacing them, require
+    link_mode 'reflink' or 'copy'.
+    """
+
+    def __init__(self, source_directory, path, private_files=[],
+                 link_mode='auto'):
+        assert link_mode in LINK_MODES
+        self.source_directory = os.path.abspath(source_directory)
+        self.path = os.path.abspath(path)
+        self.private_files = set(os.path.normpath(f) for f in private_files)
+        self.link_mode = link_mode
+        self._can_reflink = link_mode in ['auto', 'reflink']
+        self._can_hardlink = link_mode in ['auto', 'hardlink']
+
+    def __repr__(self):
+        return self.path
+
+    def getPath(self, path):
+        return os.path.join(self.path, path)
+
+    def create(self):
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+
+        for root, dirs, files in os.walk(self.source_directory):
+            relative_root = os.path.relpath(root, self.source_directory)
+            os.makedirs(os.path.join(self.path, relative_root), exist_ok=True)
+
+            for d in list(dirs):
+                if os.path.islink(os.path.join(root, d)):
+                    dirs.remove(d)
+                    files.append(d)
+
+            for f in files:
+                relative_path = os.path.normpath(os.path.join(relative_root, f))
+                self.cloneFile(relative_path)
+
+    def refresh(self, paths=[]):
+        """Clone the private files, and the given paths, again."""
+        for relative_path in self.private_files.union(
+                os.path.normpath(p) for p in paths):
+            self.cloneFile(relative_path)
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def cloneFile(self, relative_path):
+        source = os.path.join(self.source_directory, relative_path)
+        target = os.path.join(self.path, relative_path)
+        if os.path.lexists(target):
+            os.remove(target)
+        if not os.path.lexists(source):
+            return
+
+        if os.path.islink(source):
+            os.symlink(os.readlink(source), target)
+            return
+
+        if self._can_reflink and self.reflink(source, target):
+            return
+
+        if self._can_hardlink and relative_path not in self.private_files:
+            try:
+                os.link(source, target)
+                return
+            except OSError:
+                self._can_hardlink = False
+
+        shutil.copy2(source, target)
+
+    def reflink(self, source, target):
+        if fcntl is None:
+            self._can_reflink = False
+            return False
+
+        with open(source, 'rb') as source_fd:
+            with open(target, 'wb') as target_fd:
+                try:
+                    fcntl.ioctl(target_fd.fileno(), FICLONE,
+                                source_fd.fileno())
+                except OSError as e:
+                    if e.errno in [errno.EOPNOTSUPP, errno.ENOTTY,
+                                   errno.EXDEV, errno.EINVAL]:
+                        self._can_reflink = False
+                    success = False
+                else:
+                    success = True
+
+        if success:
+            shutil.copystat(source, target)
+        else:
+            os.remove(target)
+        return success
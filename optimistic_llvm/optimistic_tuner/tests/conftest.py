@@ -0,0 +1,19 @@
+import os
+import sys
+import stat
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def benchmark_directory(tmp_path):
+    """A benchmark directory with an executable ./prog printing 'result 42',
+    and 'failed' if called with an argument."""
+    prog = tmp_path / 'prog'
+    prog.write_text('#!/bin/sh\n'
+                    'if [ $# -gt 0 ]; then echo failed; exit 1; fi\n'
+                    'echo result 42\n')
+    prog.chmod(prog.stat().st_mode | stat.S_IXUSR)
+    return tmp_path
@@ -0,0 +1,60 @@
+import shutil
+
+import pytest
+
+import optimistic_tuner as ot
+
+
+@pytest.mark.skipif(not shutil.which('gcc'), reason='needs a C compiler')
+def test_build_key_hashes_included_headers(tmp_path, monkeypatch):
+    monkeypatch.setattr(ot.Sourcefile, 'getCompiler', lambda self: 'gcc')
+    (tmp_path / 'main.c').write_text('#include "config.h"\n'
+                                     'int main() { return VALUE; }\n')
+    header = tmp_path / 'config.h'
+    header.write_text('#define VALUE 0\n')
+    benchmark = ot.Benchmark('prog', [], ['-c', '-o', 'main.o'], './prog', [])
+    source_file = ot.Sourcefile('main.c')
+    experiment = ot.Experiment([])
+
+    assert experiment.getDependencies(benchmark, source_file,
+                                      cwd=str(tmp_path)) == ['config.h']
+    key = experiment.getBuildKey(benchmark, source_file, '', cwd=str(tmp_path))
+    assert key == experiment.getBuildKey(benchmark, source_file, '',
+                                         cwd=str(tmp_path))
+    header.write_text('#define VALUE 1\n')
+    assert key != experiment.getBuildKey(benchmark, source_file, '',
+                                         cwd=str(tmp_path))
+
+
+def test_timed_out_runs_are_recorded(tmp_path):
+    prog = tmp_path / 'prog'
+    prog.write_text('#!/bin/sh\nsleep 1\necho result 42\n')
+    prog.chmod(0o755)
+    experiment = ot.Experiment([])
+    io_pair = ot.InputOutputPair([], 'result 42\n', 0.2)
+    benchmark = ot.Benchmark('prog', [], [], './prog', [io_pair])
+    checks = experiment.getChecks(benchmark, cwd=str(tmp_path))
+    assert not experiment.runChecks(checks, parallel=False)
+    assert experiment._timed_out_checks == [io_pair.getCheckKey()]
+
+
+def test_opportunities_of_bitcode_are_cached_separately(tmp_path,
+                                                        monkeypatch):
+    monkeypatch.setattr(ot.Experiment, 'getDependencyHashes',
+                        lambda self, benchmark, source_file, cwd: [])
+    (tmp_path / 'main.c').write_text('int main() { return 0; }\n')
+    experiment = ot.Experiment([], cache_directory=str(tmp_path / 'cache'))
+    commands = []
+
+    def discover(cmd, cwd):
+        commands.append(cmd)
+        return [('2', '0', '0', 'memory', 'readonly', 'a', 'main')]
+
+    monkeypatch.setattr(experiment, 'discoverOpportunities', discover)
+    benchmark = ot.Benchmark('prog', [], [], './prog', [])
+    source_file = ot.Sourcefile('main.c')
+    for bitcode_path in [None, None, 'main.bc', 'main.bc']:
+        source_file._bitcode_path = bitcode_path
+        experiment.determineOptimisticChoices(benchmark, source_file,
+                                              cwd=str(tmp_path))
+    assert len(commands) == 2
@@ -0,0 +1,56 @@
+import optimistic_tuner as ot
+from choice_table import ChoiceTable
+
+
+def make_explorer():
+    choices = ChoiceTable()
+    choices.addRows([(3, i % 2, i // 4, 'memory', f'kind{i % 2}', f'oc{i}',
+                      f'function{i // 4}') for i in range(12)])
+    return ot.ChoiceExplorer(None, None, None, 12, choices, '')
+
+
+def explore(explorer, num_tries):
+    """Run the exploration, a candidate is valid if it has few 2s."""
+    candidates = []
+    for _ in range(num_tries):
+        candidate = explorer.getCandidate()
+        if candidate is None:
+            break
+        candidates.append(candidate)
+        explorer.tries += 1
+        explorer.update(candidate.count('2') < 3)
+    return candidates
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint_file = tmp_path / 'checkpoint.json'
+    experiment = ot.Experiment([], max_tries=100, timeout_factor=10,
+                               checkpoint_file=str(checkpoint_file),
+                               annotation_run=2)
+    benchmark = ot.Benchmark('prog', [], ['-O2'], './prog',
+                             [ot.InputOutputPair(['1'], 'result 42\n', 5)])
+    experiment.current_benchmark = benchmark
+    experiment.current_benchmark_file = 'prog.ot'
+    experiment.explorer = make_explorer()
+    explore(experiment.explorer, 3)
+    experiment.writeCheckpoint()
+
+    resumed = ot.Experiment.from_json(checkpoint_file.read_text())
+    assert isinstance(resumed, ot.Experiment)
+    assert resumed.checkpoint_file == str(checkpoint_file)
+    assert (resumed.max_tries, resumed.timeout_factor,
+            resumed.annotation_run) == (100, 10, 2)
+    assert resumed.current_benchmark.to_json() == benchmark.to_json()
+
+    explorer, restored = experiment.explorer, resumed.explorer
+    assert str(restored.control_string) == str(explorer.control_string)
+    assert (restored.first_pos, restored.last_pos, restored.tries) == \
+        (explorer.first_pos, explorer.last_pos, explorer.tries)
+    assert ([oc.to_dict() for oc in restored.optimistic_choices] ==
+            [oc.to_dict() for oc in explorer.optimistic_choices])
+
+    # The resumed exploration continues where the checkpointed one stopped.
+    candidates = explore(explorer, 50)
+    assert candidates
+    assert explore(restored, 50) == candidates
+    assert str(restored.control_string) == str(explorer.control_string)
@@ -0,0 +1,83 @@
+import optimistic_tuner as ot
+from choice_table import ChoiceTable
+
+# [OC] fields: max_options, opportunity_no, function_no, category, kind,
+# name, function
+MATCHES = [('2', '0', '1', 'memory', 'readonly', 'a', 'bar'),
+           ('3', '1', '0', 'call', 'nounwind', 'b', 'foo'),
+           ('2', '0', '0', 'memory', 'readonly', 'c', 'foo'),
+           ('2', '1', '1', 'call', 'nounwind', 'd', 'bar')]
+
+
+def make_table():
+    table = ChoiceTable()
+    table.addRows(MATCHES)
+    return table
+
+
+def determine(monkeypatch, **kwargs):
+    experiment = ot.Experiment([], **kwargs)
+    monkeypatch.setattr(experiment, 'discoverOpportunities',
+                        lambda cmd, cwd: list(MATCHES))
+    benchmark = ot.Benchmark('prog', [], [], './prog', [])
+    return experiment.determineOptimisticChoices(benchmark,
+                                                 ot.Sourcefile('main.c'))
+
+
+def test_add_rows():
+    table = make_table()
+    assert [oc.name for oc in table] == ['a', 'b', 'c', 'd']
+    assert [oc.position for oc in table] == [0, 1, 2, 3]
+    oc = table[1]
+    assert (oc.max_options, oc.opportunity_no, oc.function_no, oc.category,
+            oc.kind, oc.function, oc.fixed, oc.value) == (
+                3, 1, 0, 'call', 'nounwind', 'foo', False, 2)
+    # Only the categories, kinds and functions are interned.
+    assert sorted(table._strings) == ['bar', 'call', 'foo', 'memory',
+                                      'nounwind', 'readonly']
+
+
+def test_sort():
+    table = make_table()
+    benchmark = ot.Benchmark('prog', [], [], './prog', [])
+    experiment = ot.Experiment([])
+    table.sort(experiment.getChoiceOrder(benchmark, table))
+    assert [oc.name for oc in table] == ['c', 'a', 'b', 'd']
+
+    benchmark._profile = {'bar': 90.0, 'foo': 10.0, 'baz': 5.0}
+    table.sort(experiment.getChoiceOrder(benchmark, table))
+    assert [oc.name for oc in table] == ['a', 'd', 'c', 'b']
+    assert [oc.function for oc in table] == ['bar', 'bar', 'foo', 'foo']
+
+
+def test_views_write_through():
+    table = make_table()
+    table[2].fix(0)
+    table[3].function = 'baz'
+    assert table.getColumn('fixed').tolist() == [0, 0, 1, 0]
+    assert table[2].value == 0
+    assert table[3].function == 'baz'
+    copy = ChoiceTable(**table.to_dict())
+    assert [oc.to_dict() for oc in copy] == [oc.to_dict() for oc in table]
+
+
+def test_filter_kinds(monkeypatch):
+    num_opportunities, table = determine(monkeypatch,
+                                         oc_blacklist=['[call][nounwind]'])
+    assert num_opportunities == 4
+    assert [oc.name for oc in table] == ['a', 'c']
+    assert [oc.position for oc in table] == [0, 1]
+
+    _, table = determine(monkeypatch, oc_whitelist=['[call][nounwind]'])
+    assert [oc.name for oc in table] == ['b', 'd']
+
+
+def test_filter_cold_functions(monkeypatch):
+    experiment = ot.Experiment([], profile_min_weight=20.0)
+    monkeypatch.setattr(experiment, 'discoverOpportunities',
+                        lambda cmd, cwd: list(MATCHES))
+    benchmark = ot.Benchmark('prog', [], [], './prog', [])
+    benchmark._profile = {'bar': 90.0, 'foo': 10.0}
+    _, table = experiment.determineOptimisticChoices(benchmark,
+                                                     ot.Sourcefile('main.c'))
+    assert [oc.name for oc in table] == ['a', 'd']
@@ -0,0 +1,50 @@
+import optimistic_tuner as ot
+from control_string import ControlString
+
+
+def test_append_emits_markers_on_change():
+    control_string = ControlString()
+    positions = [control_string.append(0, 0, 2),
+                 control_string.append(0, 0, 1),
+                 control_string.append(1, 0, 0),
+                 control_string.append(1, 2, 3)]
+    assert str(control_string) == '#f0f#c021#f1f0#c23'
+    assert positions == [7, 8, 13, 17]
+    assert len(control_string) == 18
+    assert control_string.getNumValues() == 4
+    assert [control_string.getValue(i) for i in range(4)] == [2, 1, 0, 3]
+
+
+def test_update_prefix_and_truncate():
+    control_string = ControlString()
+    for function_no in range(3):
+        control_string.append(function_no, 1, 2)
+    control_string.setValue(1, 0)
+    assert str(control_string) == '#f0f#c12#f1f0#f2f2'
+    assert control_string.getPrefix(1) == '#f0f#c12#f1f0'
+    assert control_string.getPosition(3) == len(control_string)
+
+    control_string.truncate(1)
+    assert str(control_string) == '#f0f#c12'
+    assert control_string.getNumValues() == 1
+    control_string.truncate(0)
+    assert str(control_string) == ''
+
+
+def test_serialization_round_trip():
+    control_string = ControlString('#f3f#c0')
+    control_string.append(3, 0, 1)
+    control_string.append(4, 0, 2)
+    restored = ot.serializable.from_json(control_string.to_json())
+    # The markers are repeated after an initial string.
+    assert str(restored) == str(control_string) == '#f3f#c0#f3f#c01#f4f2'
+    assert [restored.getPosition(i) for i in range(2)] == [14, 19]
+    restored.setValue(0, 0)
+    assert str(restored) == '#f3f#c0#f3f#c00#f4f2'
+
+
+def test_normalize_control_string():
+    normalize = ot.ChoiceExplorer.normalizeControlString
+    assert normalize('#f0f#c0120#f1f00') == '#f0f#c012'
+    assert normalize('#f0f#c000#c11') == '#f0f#c11'
+    assert normalize('#f0f#c1#f1f#c02') == '#f1f#c02'
@@ -0,0 +1,138 @@
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+import distributed
+from distributed import (AUTHKEY_ENV, Coordinator, WorkerError, get_authkey,
+                         run_worker)
+import optimistic_tuner as ot
+
+
+def square(task):
+    return task * task
+
+
+def start_workers(address, handlers):
+    workers = [threading.Thread(target=run_worker, args=(address, handler),
+                                daemon=True)
+               for handler in handlers]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def no_authkey(monkeypatch):
+    # Restored after the test, the coordinator may set it.
+    monkeypatch.setenv(AUTHKEY_ENV, '')
+    monkeypatch.setattr(distributed, 'CONNECT_RETRY_INTERVAL', 0.05)
+
+
+def test_unix_socket(tmp_path):
+    address = str(tmp_path / 'coordinator.sock')
+    coordinator = Coordinator(address)
+    assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+    workers = start_workers(address, [square] * 3)
+    try:
+        assert coordinator.map(range(20)) == [i * i for i in range(20)]
+    finally:
+        coordinator.close()
+    for worker in workers:
+        worker.join(timeout=10)
+        assert not worker.is_alive()
+
+
+@pytest.mark.filterwarnings(
+    'ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_localhost_generates_key(capsys):
+    address = f'localhost:{get_free_port()}'
+    coordinator = Coordinator(address)
+    authkey = os.environ[AUTHKEY_ENV]
+    assert len(authkey) == 32
+    assert f'{AUTHKEY_ENV}={authkey}' in capsys.readouterr().out
+
+    # The first worker fails with its first task, the task is handed to the
+    # others.
+    def failing_worker(task):
+        raise SystemExit(1)
+
+    workers = start_workers(address, [failing_worker, square, square])
+    try:
+        coordinator.waitForWorkers()
+        assert coordinator.map(range(10)) == [i * i for i in range(10)]
+    finally:
+        coordinator.close()
+    for worker in workers:
+        worker.join(timeout=10)
+        assert not worker.is_alive()
+
+
+def test_workers_require_key():
+    with pytest.raises(ValueError):
+        get_authkey('example.com:9000')
+    with pytest.raises(ValueError):
+        run_worker('localhost:9000', square)
+    with pytest.raises(ValueError):
+        get_authkey('/tmp/coordinator.sock')
+
+
+def exit_worker(task):
+    raise SystemExit(1)
+
+
+@pytest.mark.filterwarnings(
+    'ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_tasks_fail_once_all_workers_disconnected(tmp_path):
+    address = str(tmp_path / 'coordinator.sock')
+    coordinator = Coordinator(address)
+    workers = start_workers(address, [exit_worker])
+    try:
+        coordinator.waitForWorkers()
+        with pytest.raises(ConnectionError):
+            coordinator.map(range(5))
+        for worker in workers:
+            worker.join(timeout=10)
+        with pytest.raises(ConnectionError):
+            coordinator.submit(0).result(timeout=10)
+    finally:
+        coordinator.close()
+
+
+def evaluate(task):
+    # Fails like a broken worker on the candidate 'fail'.
+    candidate = task[3]
+    if candidate == 'fail':
+        raise RuntimeError('broken worker')
+    return candidate == 'valid', None, [], {}, None
+
+
+def test_failed_evaluations_are_rejected(tmp_path):
+    address = str(tmp_path / 'coordinator.sock')
+    coordinator = Coordinator(address)
+    workers = start_workers(address, [evaluate])
+    last_valid_path = tmp_path / 'main.o.0'
+    last_valid_path.write_bytes(b'')
+    benchmark = ot.Benchmark('prog', [], [], './prog', [])
+    evaluator = ot.SpeculativeEvaluator(ot.Experiment([]), benchmark,
+                                        ot.Sourcefile('main.c'), [],
+                                        str(tmp_path), coordinator=coordinator)
+    try:
+        with pytest.raises(WorkerError):
+            coordinator.map([(None, None, None, 'fail')])
+        results = evaluator.evaluateRemotely(['valid', 'fail', 'invalid'],
+                                             str(last_valid_path))
+        assert [result[0] for result in results] == [True, False, False]
+    finally:
+        evaluator.close()
+        coordinator.close()
+    for worker in workers:
+        worker.join(timeout=10)
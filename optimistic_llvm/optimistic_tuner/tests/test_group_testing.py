@@ -0,0 +1,54 @@
+import math
+import random
+
+import pytest
+
+import optimistic_tuner as ot
+from choice_table import ChoiceTable
+
+NUM_CHOICES = 64
+
+
+def explore(bad_choices):
+    """Explore NUM_CHOICES choices with two options each, a candidate fails
+    if it makes any of the bad choices optimistic. Returns the final values
+    and the number of evaluations."""
+    choices = ChoiceTable()
+    choices.addRows([(2, i, 0, 'memory', 'readonly', f'oc{i}', 'foo')
+                     for i in range(NUM_CHOICES)])
+    explorer = ot.GroupTestingExplorer(None, None, None, NUM_CHOICES, choices,
+                                       '')
+    positions = choices.getColumn('position')[:NUM_CHOICES]
+
+    def oracle(candidate):
+        return all(positions[i] >= len(candidate) or
+                   candidate[positions[i]] == '0' for i in bad_choices)
+
+    num_evaluations = 0
+    generator = explorer.generator()
+    try:
+        candidate = next(generator)
+        while True:
+            num_evaluations += 1
+            candidate = generator.send(oracle(candidate))
+    except StopIteration as stop:
+        assert stop.value == (num_evaluations, False)
+    values = choices.getColumn('value')[:NUM_CHOICES].tolist()
+    return values, num_evaluations
+
+
+@pytest.mark.parametrize('num_bad', [0, 1, 2, 3])
+def test_group_testing(num_bad):
+    # Hwang's generalized binary splitting needs at most log2(C(n, d)) + d - 1
+    # tries for d culprits. The explorer does not know their number, it needs
+    # to rule out one more.
+    num_defects = num_bad + 1
+    bound = math.log2(math.comb(NUM_CHOICES, num_defects)) + num_defects - 1
+    for seed in range(20):
+        bad_choices = random.Random(seed).sample(range(NUM_CHOICES), num_bad)
+        values, num_evaluations = explore(bad_choices)
+
+        # All choices that can be optimistic are, the bad ones are not.
+        assert values == [0 if i in bad_choices else 1
+                          for i in range(NUM_CHOICES)]
+        assert num_evaluations <= bound
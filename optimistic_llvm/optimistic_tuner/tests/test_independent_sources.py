@@ -0,0 +1,39 @@
+import optimistic_tuner as ot
+
+
+def verify_sources(monkeypatch, tmp_path, tuned, passes):
+    """Verify the tuned sources together, passes tells if the benchmark
+    passes the verification with the given source contents."""
+    for path, content in tuned.items():
+        (tmp_path / path).write_text(content)
+    experiment = ot.Experiment([])
+
+    def make_and_verify(benchmark, initial=False, cwd='.'):
+        return passes({path: (tmp_path / path).read_text()
+                       for path in tuned})
+
+    monkeypatch.setattr(experiment, 'makeAndVerify', make_and_verify)
+    benchmark = ot.Benchmark('prog', [], [], './prog', [],
+                             independent_sources=True)
+    originals = {path: b'original' for path in tuned}
+    return experiment.verifyIndependentSources(
+        benchmark, str(tmp_path / 'benchmark.ot'), originals)
+
+
+def test_tuned_sources_pass_together(monkeypatch, tmp_path):
+    assert verify_sources(monkeypatch, tmp_path,
+                          {'a.c': 'tuned', 'b.c': 'tuned'},
+                          lambda sources: True)
+    assert (tmp_path / 'a.c').read_text() == 'tuned'
+    assert (tmp_path / 'b.c').read_text() == 'tuned'
+
+
+def test_tuned_sources_fail_together(monkeypatch, tmp_path):
+    # Each tuned source passes with the other original one only.
+    def passes(sources):
+        return list(sources.values()).count('tuned') < 2
+
+    assert not verify_sources(monkeypatch, tmp_path,
+                              {'a.c': 'tuned', 'b.c': 'tuned'}, passes)
+    assert (tmp_path / 'a.c').read_text() == 'tuned'
+    assert (tmp_path / 'b.c').read_text() == 'original'
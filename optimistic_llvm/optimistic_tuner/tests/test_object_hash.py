@@ -0,0 +1,60 @@
+import shutil
+import subprocess
+
+import pytest
+
+import optimistic_tuner as ot
+from object_hash import hash_object_code, same_object_code
+
+SOURCE = ('int counter;\n'
+          'int scale(int x) { return x * 3 + counter; }\n')
+
+
+def compile_object(tmp_path, name, source=SOURCE, options=[]):
+    source_path = tmp_path / f'{name}.c'
+    source_path.write_text(source)
+    object_path = tmp_path / f'{name}.o'
+    subprocess.run(['gcc', '-O2', '-c', str(source_path), '-o',
+                    str(object_path)] + options, check=True)
+    return str(object_path)
+
+
+@pytest.mark.skipif(not shutil.which('gcc'), reason='needs a C compiler')
+def test_metadata_is_ignored(tmp_path):
+    plain = compile_object(tmp_path, 'plain')
+    assert hash_object_code(plain) is not None
+    assert same_object_code(plain, compile_object(tmp_path, 'debug',
+                                                  options=['-g']))
+    # Differently recorded command lines (clang: -frecord-command-line).
+    assert same_object_code(
+        compile_object(tmp_path, 'recorded', options=['-frecord-gcc-switches']),
+        compile_object(tmp_path, 'recorded_define',
+                       options=['-frecord-gcc-switches', '-DUNUSED=1']))
+    assert same_object_code(plain, str(tmp_path / 'recorded.o'))
+
+
+@pytest.mark.skipif(not shutil.which('gcc'), reason='needs a C compiler')
+def test_code_changes_are_detected(tmp_path):
+    plain = compile_object(tmp_path, 'plain')
+    changed = compile_object(tmp_path, 'changed',
+                             SOURCE.replace('x * 3', 'x * 5'))
+    assert not same_object_code(plain, changed)
+    renamed = compile_object(tmp_path, 'renamed',
+                             SOURCE.replace('counter', 'total'))
+    assert not same_object_code(plain, renamed)
+
+
+def test_other_files_are_not_compared(tmp_path):
+    text = tmp_path / 'main.o'
+    text.write_text('not an object file\n')
+    assert hash_object_code(str(text)) is None
+    assert hash_object_code(str(tmp_path / 'missing.o')) is None
+    assert not same_object_code(str(text), str(text))
+
+    # The experiment falls back to comparing the files.
+    experiment = ot.Experiment([])
+    copy = tmp_path / 'copy.o'
+    copy.write_text('not an object file\n')
+    assert experiment.isSameObject(str(text), str(copy))
+    copy.write_text('not an object file either\n')
+    assert not experiment.isSameObject(str(text), str(copy))
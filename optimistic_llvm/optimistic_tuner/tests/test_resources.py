@@ -0,0 +1,87 @@
+import threading
+
+import resources
+import optimistic_tuner as ot
+from resources import CoreScheduler, parse_cpulist
+
+
+def make_scheduler(monkeypatch, tmp_path, cores_per_run, cpus, nodes):
+    monkeypatch.setattr(resources, 'get_available_cpus', lambda: cpus)
+    monkeypatch.setattr(resources, 'get_numa_nodes', lambda cpus: nodes)
+    return CoreScheduler(cores_per_run, str(tmp_path / 'slots'))
+
+
+def test_parse_cpulist():
+    assert parse_cpulist('0-3,8,10-11\n') == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpulist('') == []
+
+
+def test_slots_stay_on_numa_nodes(monkeypatch, tmp_path):
+    scheduler = make_scheduler(monkeypatch, tmp_path, 2, list(range(6)),
+                               [(0, [0, 1, 2]), (1, [3, 4, 5])])
+    assert scheduler.slots == [(0, [0, 1]), (1, [3, 4])]
+
+
+def test_slots_span_nodes_that_are_too_small(monkeypatch, tmp_path):
+    scheduler = make_scheduler(monkeypatch, tmp_path, 4, list(range(6)),
+                               [(0, [0, 1, 2]), (1, [3, 4, 5])])
+    assert scheduler.slots == [(None, [0, 1, 2, 3]), (None, [4, 5])]
+
+
+def test_placement_binds_cpus_and_openmp_threads(monkeypatch):
+    monkeypatch.setattr(resources.shutil, 'which',
+                        lambda tool: tool == 'taskset')
+    placement = CoreScheduler.getPlacement((0, [2, 3]))
+    assert placement['prefix'] == ['taskset', '-c', '2,3']
+    assert placement['env']['OMP_NUM_THREADS'] == '2'
+    assert placement['env']['OMP_PROC_BIND'] == 'close'
+
+    monkeypatch.setattr(resources.shutil, 'which',
+                        lambda tool: tool == 'numactl')
+    placement = CoreScheduler.getPlacement((1, [2, 3]))
+    assert placement['prefix'] == ['numactl', '--physcpubind=2,3',
+                                   '--membind=1']
+
+
+def test_claim_waits_for_a_free_slot(monkeypatch, tmp_path):
+    scheduler = make_scheduler(monkeypatch, tmp_path, 1, [0], [(None, [0])])
+    claimed = threading.Event()
+
+    def claim():
+        with scheduler.claim():
+            claimed.set()
+
+    with scheduler.claim() as placement:
+        assert placement is not None
+        cancel = threading.Event()
+        cancel.set()
+        with scheduler.claim(cancel) as cancelled:
+            assert cancelled is None
+
+        waiting = threading.Thread(target=claim)
+        waiting.start()
+        assert not claimed.wait(0.2)
+    assert claimed.wait(5)
+    waiting.join()
+
+
+def test_placed_run(benchmark_directory):
+    experiment = ot.Experiment([], cores_per_run=1)
+    with experiment.placeRun() as placement:
+        returncode, out, _ = experiment.runProcess(
+            ['sh', '-c', 'echo $OMP_NUM_THREADS'], ot.sp.PIPE, ot.sp.DEVNULL,
+            ot.sp.DEVNULL, 5, str(benchmark_directory), None, placement)
+    assert returncode == 0
+    assert out.strip() == b'1'
+
+
+def test_measured_runs_are_placed(tmp_path):
+    prog = tmp_path / 'prog'
+    prog.write_text('#!/bin/sh\necho $OMP_NUM_THREADS >> threads\n')
+    prog.chmod(0o755)
+    io_pair = ot.InputOutputPair([], '', 5)
+    benchmark = ot.Benchmark('prog', [], [], './prog', [io_pair])
+    experiment = ot.Experiment([], pin_cpu=0, runtime_repetitions=2,
+                               runtime_warmup=1)
+    assert experiment.measureRuntime(benchmark, cwd=str(tmp_path)) is not None
+    assert (tmp_path / 'threads').read_text() == '1\n' * 3
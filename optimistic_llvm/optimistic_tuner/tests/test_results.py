@@ -0,0 +1,63 @@
+import multiprocessing
+import pickle
+import sqlite3
+
+from results import ResultsDatabase
+
+NUM_WRITERS = 4
+NUM_ROWS = 50
+
+
+def make_result(build_key, verdict, **kwargs):
+    return dict({'benchmark': 'prog', 'source_file': 'main.c',
+                 'build_key': build_key, 'fingerprint': 'full',
+                 'control_string': '#f0f#c01', 'verdict': verdict}, **kwargs)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'db' / 'results.sqlite')
+    database = ResultsDatabase(path)
+    assert database.getVerdict('a', 'full') is None
+    database.record(make_result('a', True))
+    database.record(make_result('b', False, compile_time=1.5))
+    database.record(make_result('a', False))
+    assert database.getVerdict('a', 'full') is False
+    assert database.getVerdict('b', 'full') is False
+    assert database.getVerdict('b', 'smoke') is None
+
+    # Reopened, and unpickled without the connection, like in a job.
+    reopened = pickle.loads(pickle.dumps(ResultsDatabase(path)))
+    assert reopened._connection is None
+    assert reopened.getVerdict('a', 'full') is False
+    reopened.record(make_result('a', True))
+    assert database.getVerdict('a', 'full') is True
+    rows = sqlite3.connect(path).execute(
+        'SELECT build_key, verdict, compile_time FROM tries '
+        'ORDER BY id').fetchall()
+    assert rows == [('a', 1, None), ('b', 0, 1.5), ('a', 0, None),
+                    ('a', 1, None)]
+
+
+def write(database, writer):
+    for i in range(NUM_ROWS):
+        database.record(make_result(f'{writer}.{i}', i % 2 == 0))
+
+
+def test_concurrent_writers(tmp_path):
+    database = ResultsDatabase(str(tmp_path / 'results.sqlite'))
+    database.record(make_result('initial', True))
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=write, args=(database, writer))
+               for writer in range(NUM_WRITERS)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(timeout=60)
+        assert writer.exitcode == 0
+
+    count, = database.getConnection().execute(
+        'SELECT COUNT(*) FROM tries').fetchone()
+    assert count == NUM_WRITERS * NUM_ROWS + 1
+    for writer in range(NUM_WRITERS):
+        assert database.getVerdict(f'{writer}.0', 'full') is True
+        assert database.getVerdict(f'{writer}.1', 'full') is False
@@ -0,0 +1,63 @@
+import optimistic_tuner as ot
+from control_string import ControlString
+
+
+def make_shard(functions, choices):
+    """A tuned shard, choices are (function, opportunity_no, value) and the
+    function numbers local to the shard, as the annotator numbers them."""
+    source_file = ot.Experiment.getShardFile(ot.Sourcefile('main.c'),
+                                             functions)
+    control_string = ControlString()
+    for name, (function, opportunity_no, value) in enumerate(choices):
+        function_no = functions.index(function)
+        position = control_string.append(function_no, opportunity_no, value)
+        source_file.optimistic_choices.add(3, opportunity_no, function_no,
+                                           'cat', 'kind', str(name), function,
+                                           position, True, value)
+    source_file.current_control_string = str(control_string)
+    return source_file
+
+
+def test_shard_functions_are_anchored_and_escaped():
+    shard_file = ot.Experiment.getShardFile(ot.Sourcefile('main.c'),
+                                            ['f', 'foo.cold'])
+    assert shard_file.only_functions == ['^f$', '^foo\\.cold$']
+
+
+def test_renumber_functions():
+    control_string, offsets = ot.ChoiceExplorer.renumberFunctions(
+        '#f0f#c012#f1f3#c10', {0: 7, 1: 12})
+    assert control_string == '#f7f#c012#f12f3#c10'
+    assert [control_string[offset] for offset in offsets.values()] == \
+        ['1', '2', '3', '0']
+
+    # Values of functions without a number are dropped.
+    control_string, offsets = ot.ChoiceExplorer.renumberFunctions(
+        '#f0f#c012#f1f3#c10', {1: 4})
+    assert control_string == '#f4f#c03#c10'
+    assert sorted(offsets) == [13, 17]
+
+
+def test_merge_shards_renumbers_functions(monkeypatch):
+    experiment = ot.Experiment([])
+    validated = []
+
+    def compile_source(benchmark, source_file, control_string, **kwargs):
+        validated.append(control_string)
+        return True
+
+    monkeypatch.setattr(experiment, 'compileSourceOptimistically',
+                        compile_source)
+    source_file = ot.Sourcefile('main.c')
+    shards = [make_shard(['bar'], [('bar', 0, 2), ('bar', 1, 1)]),
+              make_shard(['foo', 'qux'], [('foo', 0, 1), ('qux', 0, 2)])]
+    function_numbers = {'foo': 0, 'bar': 1, 'baz': 2, 'qux': 3}
+    experiment.mergeShards(None, source_file, shards, function_numbers)
+
+    merged = '#f1f#c02#c11#f0f#c01#f3f2'
+    assert validated == [merged]
+    assert source_file.current_control_string == merged
+    choices = [(oc.function, oc.function_no, merged[oc.position])
+               for oc in source_file.optimistic_choices]
+    assert choices == [('bar', 1, '2'), ('bar', 1, '1'), ('foo', 0, '1'),
+                       ('qux', 3, '2')]
@@ -0,0 +1,92 @@
+import collections
+
+import pytest
+
+import optimistic_tuner as ot
+from choice_table import ChoiceTable
+
+BAD_CHOICES = {3: 1, 17: 0, 18: 1, 40: 2}
+
+
+class FakeSandbox:
+    path = '.'
+
+    def refresh(self):
+        pass
+
+
+class FakePool:
+    """Evaluates the candidates of a SpeculativeEvaluator in order."""
+
+    def __init__(self, oracle):
+        self.oracle = oracle
+        self.num_rounds = 0
+
+    def map(self, fn, tasks):
+        self.num_rounds += 1
+        return [(self.oracle(task[0]), None, [], {}, None) for task in tasks]
+
+    def shutdown(self):
+        pass
+
+
+def make_explorer(strategy):
+    choices = ChoiceTable()
+    choices.addRows([(4, i % 8, i // 8, 'memory', f'kind{i // 16}', f'oc{i}',
+                      f'function{i // 8}') for i in range(48)])
+    return ot.STRATEGIES[strategy](None, None, None, 48, choices, '')
+
+
+def make_oracle(explorer):
+    """A candidate fails if one of the bad choices has a value above the
+    allowed one."""
+    positions = explorer.optimistic_choices.getColumn('position')
+
+    def oracle(candidate):
+        return all(positions[i] >= len(candidate) or
+                   int(candidate[positions[i]]) <= value
+                   for i, value in BAD_CHOICES.items())
+    return oracle
+
+
+def explore(explorer, evaluate):
+    """Run the exploration, returns the decisions and the final string."""
+    decisions = []
+    generator = explorer.generator()
+    try:
+        candidate = next(generator)
+        while True:
+            result = evaluate(explorer, candidate)
+            decisions.append((candidate, result))
+            candidate = generator.send(result)
+    except StopIteration:
+        pass
+    return decisions, str(explorer.control_string)
+
+
+@pytest.mark.parametrize('strategy', ['bisection', 'group_testing'])
+def test_speculation_commits_the_sequential_decisions(strategy):
+    explorer = make_explorer(strategy)
+    oracle = make_oracle(explorer)
+    sequential = explore(explorer, lambda explorer, candidate:
+                         oracle(candidate))
+    assert len(sequential[0]) > 8
+
+    for num_jobs in [2, 4, 8]:
+        experiment = ot.Experiment([])
+        experiment._trace = collections.Counter()
+        experiment.getCachedVerdict = lambda *args, **kwargs: None
+        benchmark = ot.Benchmark('prog', [], [], './prog', [])
+        benchmark._num_out_versions = 0
+        source_file = ot.Sourcefile('main.c', output_file='main.o')
+        evaluator = ot.SpeculativeEvaluator(experiment, benchmark,
+                                            source_file,
+                                            [FakeSandbox()] * num_jobs)
+        evaluator.pool.shutdown()
+        evaluator.pool = FakePool(oracle)
+        try:
+            assert explore(make_explorer(strategy),
+                           evaluator.evaluate) == sequential
+        finally:
+            evaluator.close()
+        assert evaluator.pool.num_rounds < len(sequential[0])
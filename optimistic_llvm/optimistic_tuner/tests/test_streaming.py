@@ -0,0 +1,58 @@
+import time
+
+import optimistic_tuner as ot
+
+
+def run(cmd, output, timeout=5, streaming=None, experiment=None):
+    experiment = experiment or ot.Experiment([])
+    io_pair = ot.InputOutputPair([], output, timeout, streaming=streaming)
+    return experiment.runAndVerify(['sh', '-c', cmd], io_pair, False, '')
+
+
+def test_line_wise_pattern():
+    assert ot.InputOutputPair.isLineWisePattern('result \\d+\nok\n')
+    assert not ot.InputOutputPair.isLineWisePattern('result\\s+42\n')
+    assert not ot.InputOutputPair.isLineWisePattern('(?s)result.*')
+    assert not ot.InputOutputPair.isLineWisePattern('result (\n42)\n')
+
+
+def test_streaming_match(monkeypatch):
+    experiment = ot.Experiment([])
+    streamed = []
+    run_streaming = experiment.runStreaming
+    monkeypatch.setattr(experiment, 'runStreaming',
+                        lambda *args: streamed.append(args) or
+                        run_streaming(*args))
+    assert run('echo result 42; echo ok', 'result \\d+\nok\n',
+               experiment=experiment)
+    assert len(streamed) == 1
+    assert not run('echo result 42; echo ok; echo extra', 'result \\d+\nok\n',
+                   experiment=experiment)
+
+
+def test_streaming_mismatch_aborts_early():
+    time_start = time.time()
+    assert not run('echo result 42; echo result 43; sleep 5; echo ok',
+                   'result 42\nresult 42\nok\n')
+    assert time.time() - time_start < 2
+
+
+def test_pattern_that_is_not_line_wise_is_matched_as_a_whole(monkeypatch):
+    experiment = ot.Experiment([])
+
+    def run_streaming(*args):
+        raise AssertionError('the pattern is not line-wise')
+
+    monkeypatch.setattr(experiment, 'runStreaming', run_streaming)
+    assert run('echo result; echo 42', 'result\\s42\n', experiment=experiment)
+    assert not run('echo result; echo 43', 'result\\s42\n',
+                   experiment=experiment)
+
+
+def test_streaming_timeout():
+    experiment = ot.Experiment([])
+    time_start = time.time()
+    assert not run('echo result 42; sleep 5; echo ok', 'result 42\nok\n',
+                   timeout=0.3, experiment=experiment)
+    assert time.time() - time_start < 2
+    assert len(experiment._timed_out_checks) == 1
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+import optimistic_tuner as ot
+from choice_table import ChoiceTable
+from control_string import ControlString
+
+NUM_CHOICES = 8
+# Only the full tier catches the optimistic value of this choice.
+BAD_CHOICE = 5
+
+
+def tune(tmp_path, monkeypatch, tiered):
+    """Tune a source file, a fake runChecks rejects the bad choice if the full
+    tier is run. Returns the tuned source file and the verdicts, (bad choice
+    is optimistic, full tier was run, verdict) triples."""
+    cwd = tmp_path / f'benchmark.{tiered}'
+    cwd.mkdir()
+    full = ot.InputOutputPair(['large'], '', 5)
+    io_pairs = [full]
+    if tiered:
+        io_pairs.insert(0, ot.InputOutputPair(['small'], '', 5, tier='smoke'))
+    source_file = ot.Sourcefile('main.c', output_file='main.o')
+    benchmark = ot.Benchmark('prog', [source_file], [], 'prog', io_pairs,
+                             make_cmd='touch prog')
+    experiment = ot.Experiment([])
+
+    choices = ChoiceTable()
+    choices.addRows([(2, i, 0, 'memory', 'readonly', f'oc{i}', 'foo')
+                     for i in range(NUM_CHOICES)])
+    # The positions of the values in the control strings, see ChoiceExplorer.
+    control_string = ControlString()
+    position = [control_string.append(0, i, 1)
+                for i in range(NUM_CHOICES)][BAD_CHOICE]
+
+    def determine_choices(benchmark, source_file, cwd):
+        if experiment.annotation_run > 1:
+            return 0, ChoiceTable()
+        return NUM_CHOICES, choices
+
+    compiled = ['']
+
+    def compile_source(benchmark, source_file, control_string, cwd,
+                       cache_key=None):
+        compiled[0] = control_string
+        executable_path = os.path.join(cwd, benchmark.executable)
+        if os.path.isfile(executable_path):
+            os.remove(executable_path)
+        with open(os.path.join(cwd, source_file.output_file), 'w') as fd:
+            fd.write(control_string)
+        return True
+
+    verdicts = []
+
+    def run_checks(checks, parallel):
+        control_string = compiled[0]
+        bad = (len(control_string) > position and
+               control_string[position] != '0')
+        full_tier = full.getCheckKey() in [key for key, check in checks]
+        verdicts.append((bad, full_tier, not (bad and full_tier)))
+        return verdicts[-1][2]
+
+    monkeypatch.setattr(experiment, 'determineOptimisticChoices',
+                        determine_choices)
+    monkeypatch.setattr(experiment, 'compileSource', compile_source)
+    monkeypatch.setattr(experiment, 'runChecks', run_checks)
+
+    assert experiment.makeAndVerify(benchmark, initial=True, cwd=str(cwd))
+    assert experiment.optimizeAndRun(benchmark, source_file, str(cwd))
+    return source_file, verdicts
+
+
+@pytest.mark.parametrize('checkpoint_every', [3, 1000])
+def test_full_tier_rejection_is_explored_again(tmp_path, monkeypatch,
+                                               checkpoint_every):
+    monkeypatch.setattr(ot, 'temp_directory', str(tmp_path))
+    # Accepted strings are validated on checkpoints or only at the end.
+    monkeypatch.setattr(ot, 'CHECKPOINT_EVERY_NUM_TRIES', checkpoint_every)
+    source_file, verdicts = tune(tmp_path, monkeypatch, tiered=True)
+
+    # The bad choice was accepted by the smoke tier, rejected by the full one.
+    assert (True, False, True) in verdicts
+    assert (True, True, False) in verdicts
+    oc = source_file.optimistic_choices[BAD_CHOICE]
+    assert oc.name == f'oc{BAD_CHOICE}' and oc.value == 0
+
+    # The result is the one of the exploration with the full tier only.
+    untiered_file, _ = tune(tmp_path, monkeypatch, tiered=False)
+    assert (source_file.current_control_string ==
+            untiered_file.current_control_string)
+    assert ([oc.value for oc in source_file.optimistic_choices] ==
+            [oc.value for oc in untiered_file.optimistic_choices])
@@ -0,0 +1,57 @@
+import pytest
+
+import optimistic_tuner as ot
+
+
+def make_benchmark(input_output_pairs, verify_cmd='true'):
+    return ot.Benchmark('prog', [], [], './prog', input_output_pairs,
+                        verify_cmd=verify_cmd, verify_cmd_timeout=7)
+
+
+def derive_timeouts(experiment, benchmark, cwd):
+    checks = experiment.getChecks(benchmark, initial=True, cwd=str(cwd))
+    assert experiment.runChecks(checks, parallel=False)
+    experiment.deriveTimeouts(benchmark, checks, experiment._check_records)
+
+
+@pytest.mark.parametrize('cores_per_run', [None, 1])
+def test_derive_timeouts(benchmark_directory, cores_per_run):
+    experiment = ot.Experiment([], timeout_factor=10, timeout_runs=3,
+                               cores_per_run=cores_per_run)
+    io_pair = ot.InputOutputPair([], 'result 42\n', 5)
+    benchmark = make_benchmark([io_pair])
+    derive_timeouts(experiment, benchmark, benchmark_directory)
+
+    # The runs are fast, the timeouts are clamped to the lower bound.
+    assert benchmark._timeouts == {
+        'verify_cmd': ot.MIN_DERIVED_TIMEOUT,
+        io_pair.getCheckKey(): ot.MIN_DERIVED_TIMEOUT}
+
+
+def test_derive_timeouts_never_exceed_static_ones(benchmark_directory):
+    experiment = ot.Experiment([], timeout_factor=10, timeout_runs=2)
+    io_pair = ot.InputOutputPair([], 'result 42\n', 0.5)
+    benchmark = make_benchmark([io_pair], verify_cmd='')
+    derive_timeouts(experiment, benchmark, benchmark_directory)
+    assert benchmark._timeouts == {io_pair.getCheckKey(): 0.5}
+
+
+def test_derive_timeouts_keeps_static_timeout_of_failing_runs(
+        benchmark_directory):
+    experiment = ot.Experiment([], timeout_factor=10, timeout_runs=3)
+    io_pair = ot.InputOutputPair([], 'result 42\n', 5)
+    benchmark = make_benchmark([io_pair], verify_cmd='')
+    checks = experiment.getChecks(benchmark, initial=True,
+                                  cwd=str(benchmark_directory))
+    assert experiment.runChecks(checks, parallel=False)
+
+    (benchmark_directory / 'prog').write_text('#!/bin/sh\nexit 1\n')
+    experiment.deriveTimeouts(benchmark, checks, experiment._check_records)
+    assert benchmark._timeouts == {}
+
+
+def test_run_process_times_out_without_cancel(benchmark_directory):
+    experiment = ot.Experiment([])
+    with pytest.raises(ot.sp.TimeoutExpired):
+        experiment.runProcess(['sleep', '5'], ot.sp.DEVNULL, ot.sp.DEVNULL,
+                              ot.sp.DEVNULL, 0.2, str(benchmark_directory))
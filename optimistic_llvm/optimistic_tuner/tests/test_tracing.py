@@ -0,0 +1,61 @@
+import json
+
+from tracing import Tracer, summarize_trace
+
+
+def make_try(time, duration, phases, verdict, source_file='a.c',
+             kind='[memory][readonly]', window=8, verdict_cache_hits=0,
+             object_cache_hits=0):
+    return {'event': 'try', 'benchmark': 'prog', 'source_file': source_file,
+            'time': time, 'duration': duration, 'phases': phases,
+            'verdict': verdict, 'kind': kind, 'window': window,
+            'verdict_cache_hits': verdict_cache_hits,
+            'object_cache_hits': object_cache_hits}
+
+
+def test_summarize_trace(tmp_path):
+    trace = tmp_path / 'trace.jsonl'
+    events = [
+        make_try(100.0, 2.0, {'compile': 1.0, 'run': 0.5, 'explorer': 0.1},
+                 True, object_cache_hits=1),
+        make_try(103.0, 3.0, {'compile': 1.5, 'make': 0.5, 'run': 1.0},
+                 False, window=4, verdict_cache_hits=1),
+        make_try(104.0, 1.0, {'compile': 0.5, 'verify_cmd': 0.25}, True,
+                 source_file='b.c', kind='[call][nounwind]', window=2,
+                 verdict_cache_hits=2),
+        {'event': 'final', 'benchmark': 'prog', 'source_file': 'a.c',
+         'time': 105.0}]
+    # The last line of an interrupted run is incomplete.
+    trace.write_text(''.join(json.dumps(event) + '\n' for event in events) +
+                     '{"event": "try", "bench')
+
+    lines = summarize_trace(str(trace)).splitlines()
+    assert lines[1] == ('3 tries for 2 source files, 1 annotation runs '
+                        'finished, 7.0s wall time')
+    phases = {line.split()[0]: line.split()[1:] for line in lines[4:11]}
+    assert phases['compile'] == ['3.0s', '56.1%']
+    assert phases['make'] == ['0.5s', '9.3%']
+    assert phases['link'] == ['0.0s', '0.0%']
+    assert phases['verify_cmd'] == ['0.2s', '4.7%']
+    assert phases['run'] == ['1.5s', '28.0%']
+    assert phases['explorer'] == ['0.1s', '1.9%']
+    assert phases['tries'] == ['6.0s', '(avg', '2.00s', 'per', 'try)']
+    assert 'Verdicts: 2 accepted, 1 rejected' in lines
+    assert 'Cache hits: 3 verdicts, 1 objects' in lines
+    kinds = {line.split()[0]: line.split()[1:] for line in lines[-2:]}
+    assert kinds == {'[memory][readonly]': ['2', '1', '5.0s', '8', '6.0', '4'],
+                     '[call][nounwind]': ['1', '0', '1.0s', '2', '2.0', '2']}
+
+
+def test_tracer_appends_events(tmp_path):
+    trace = tmp_path / 'traces' / 'trace.jsonl'
+    tracer = Tracer(str(trace))
+    tracer.write('final', benchmark='prog', source_file='a.c')
+    assert 'No tries recorded' in summarize_trace(str(trace))
+    fields = make_try(0.0, 0.5, {'run': 0.5}, False)
+    del fields['event'], fields['time']
+    tracer.write('try', **fields)
+    events = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [event['event'] for event in events] == ['final', 'try']
+    assert summarize_trace(str(trace)).splitlines()[1].startswith(
+        '1 tries for 1 source files, 1 annotation runs finished')
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import collections
+
+# The phases of a try, in report order
+PHASES = ['compile', 'make', 'link', 'verify_cmd', 'run', 'explorer']
+
+
+class Tracer(object):
+    """Appends events, one JSON object per line, to a trace file.
+
+    Each event is written with a single write to the file opened in append
+    mode, thus concurrent jobs can share a trace file.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def __repr__(self):
+        return self.path
+
+    def write(self, event, **fields):
+        record = dict(fields, event=event, time=time.time())
+        line = json.dumps(record) + '\n'
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode('utf8'))
+        finally:
+            os.close(fd)
+
+
+def read_trace(path):
+    events = []
+    with open(path, 'r') as fd:
+        for line in fd:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                # The last line of an interrupted run can be incomplete.
+                continue
+    return events
+
+
+def summarize_trace(path):
+    """Return a report of the trace at path: where the time of the tries
+    went and how the exploration converged per [category][kind]."""
+    events = read_trace(path)
+    tries = [event for event in events if event['event'] == 'try']
+    finals = [event for event in events if event['event'] == 'final']
+    lines = [f'Trace {path}']
+    if not tries:
+        lines.append('No tries recorded')
+        return os.linesep.join(lines)
+
+    source_files = set((event['benchmark'], event['source_file'])
+                       for event in tries)
+    wall_time = (max(event['time'] for event in events) -
+                 min(event['time'] - event.get('duration', 0)
+                     for event in events))
+    lines.append(f'{len(tries)} tries for {len(source_files)} source files, '
+                 f'{len(finals)} annotation runs finished, '
+                 f'{wall_time:.1f}s wall time')
+
+    phases = collections.Counter()
+    for event in tries:
+        phases.update(event['phases'])
+    total = sum(phases.values()) or 1.0
+    lines.append('')
+    lines.append('Time per phase (runs of concurrent jobs are summed up):')
+    for phase in PHASES + sorted(set(phases) - set(PHASES)):
+        lines.append(f'  {phase:12} {phases[phase]:10.1f}s '
+                     f'{100.0 * phases[phase] / total:5.1f}%')
+    try_time = sum(event['duration'] for event in tries)
+    lines.append(f'  {"tries":12} {try_time:10.1f}s '
+                 f'(avg {try_time / len(tries):.2f}s per try)')
+
+    accepted = sum(1 for event in tries if event['verdict'])
+    verdict_hits = sum(event['verdict_cache_hits'] for event in tries)
+    object_hits = sum(event['object_cache_hits'] for event in tries)
+    lines.append('')
+    lines.append(f'Verdicts: {accepted} accepted, {len(tries) - accepted} '
+                 f'rejected')
+    lines.append(f'Cache hits: {verdict_hits} verdicts, {object_hits} '
+                 f'objects')
+
+    kinds = collections.OrderedDict()
+    for event in tries:
+        kinds.setdefault(event['kind'], []).append(event)
+    lines.append('')
+    lines.append('Convergence per [category][kind]:')
+    lines.append(f'  {"kind":24} {"tries":>6} {"rejected":>8} {"time":>9} '
+                 f'{"first window":>12} {"avg window":>10} '
+                 f'{"last window":>11}')
+    for kind, kind_tries in kinds.items():
+        windows = [event['window'] for event in kind_tries]
+        lines.append(f'  {kind:24} {len(kind_tries):6} '
+                     f'{sum(1 for event in kind_tries if not event["verdict"]):8} '
+                     f'{sum(event["duration"] for event in kind_tries):8.1f}s '
+                     f'{windows[0]:12} {sum(windows) / len(windows):10.1f} '
+                     f'{windows[-1]:11}')
+    return os.linesep.join(lines)
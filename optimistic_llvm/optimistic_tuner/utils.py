@@ -1,4 +1,7 @@
+import os
 import json
+import shutil
+import tempfile
 
 
 def is_valid_input(i, re):
@@ -18,7 +21,36 @@ def select_from_list(lst):
     return get_valid_input('')
 
 
+def atomic_write(path, data):
+    """Write data (bytes) to path such that readers never see partial files,
+    even if several processes write the same path concurrently."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    prefix='.tmp.')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_fd:
+            tmp_fd.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_copy(source, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    prefix='.tmp.')
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 class serializable(object):
+    __slots__ = ()
     classes = {}
 
     @staticmethod
@@ -26,7 +58,11 @@ class serializable(object):
         if '__type__' in dir(type(val)):
             dct = {'__type__': val.__type__}
             # dct = {}
-            for k, v in val.__dict__.items():
+            # Classes with a compact internal representation provide the
+            # constructor arguments via to_dict.
+            items = (val.to_dict() if hasattr(val, 'to_dict')
+                     else val.__dict__)
+            for k, v in items.items():
                 if not k.startswith('_'):
                     dct[k] = serializable.class_encoder(v)
             return dct